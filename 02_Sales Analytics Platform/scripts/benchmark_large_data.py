@@ -0,0 +1,123 @@
+"""
+Benchmark the large-data training mode against the default estimators.
+
+Builds the revenue (daily time-series) and churn feature tables from
+data/raw, holds out the last 20% of days (revenue) or a stratified 20% of
+companies (churn), optionally replicates the training part with small noise
+to emulate larger datasets, and compares fit time, memory and score on the
+untouched held-out rows of:
+    - the default estimators (random forest / gradient boosting, float64)
+    - histogram gradient boosting on float32 matrices
+    - histogram gradient boosting on a stratified subsample
+
+Usage:
+    python scripts/benchmark_large_data.py
+    python scripts/benchmark_large_data.py --scale 200 --max-rows 200000
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src.config import config
+from src.models.advanced_ml import (
+    ChurnPredictionEngine, SalesForecastingEngine, benchmark_estimators, revenue_candidates
+)
+from src.models.churn_scoring import CHURN_FEATURES
+
+
+def replicate(X: pd.DataFrame, y: pd.Series, scale: int, noise: float = 0.01):
+    """Stack scale jittered copies of a feature table (keeps the row order within each copy)."""
+    if scale <= 1:
+        return X, y
+    rng = np.random.default_rng(config.ml.random_state)
+    X_big = np.tile(X.to_numpy(dtype=np.float64), (scale, 1))
+    X_big *= 1 + noise * rng.standard_normal(X_big.shape)
+    return pd.DataFrame(X_big, columns=X.columns), pd.Series(np.tile(y.to_numpy(), scale), name=y.name)
+
+
+def split_and_replicate(X: pd.DataFrame, y: pd.Series, scale: int, shuffle: bool = False, test_size: float = 0.2):
+    """
+    Hold out a test set first, then replicate only the training rows.
+
+    Replicating before the split would put near-copies of every test row in
+    the training set and measure memorization instead of accuracy.
+
+    Returns:
+        tuple: X_train, y_train (replicated), X_test, y_test (original rows)
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, shuffle=shuffle,
+                                                        stratify=y if shuffle else None,
+                                                        random_state=config.ml.random_state)
+    X_train, y_train = replicate(X_train, y_train, scale)
+    return X_train, y_train, X_test, y_test
+
+
+def revenue_estimators(max_rows):
+    default = revenue_candidates()
+    large = revenue_candidates(large_data=True)['hist_gradient_boosting']
+    estimators = {
+        'random_forest': (default['random_forest'], np.float64, None),
+        'gradient_boosting': (default['gradient_boosting'], np.float64, None),
+        'hist_gradient_boosting': (large, np.float32, None),
+    }
+    if max_rows:
+        estimators['hist_gradient_boosting_subsample'] = (large, np.float32, max_rows)
+    return estimators
+
+
+def churn_estimators(max_rows):
+    estimators = {
+        'random_forest': (RandomForestClassifier(n_estimators=100, max_depth=10, class_weight='balanced',
+                                                 random_state=42), np.float64, None),
+        'hist_gradient_boosting': (HistGradientBoostingClassifier(max_iter=100, class_weight='balanced',
+                                                                  random_state=42), np.float32, None),
+    }
+    if max_rows:
+        estimators['hist_gradient_boosting_subsample'] = (estimators['hist_gradient_boosting'][0],
+                                                          np.float32, max_rows)
+    return estimators
+
+
+def main():
+    """Run the benchmark and print one table per task."""
+    parser = argparse.ArgumentParser(description="Benchmark large-data training mode")
+    parser.add_argument("--data-dir", default="data/raw", help="Directory with transactions/companies/interactions")
+    parser.add_argument("--scale", type=int, default=1, help="Replicate the feature tables this many times")
+    parser.add_argument("--max-rows", type=int, default=None, help="Training rows for the subsampled variant")
+    parser.add_argument("--output", default=None, help="Optional CSV path for the combined results")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    transactions = pd.read_csv(data_dir / 'transactions.csv', parse_dates=['transaction_date'])
+    companies = pd.read_csv(data_dir / 'companies.csv', parse_dates=['created_date'])
+    interactions = pd.read_csv(data_dir / 'customer_interactions.csv', parse_dates=['interaction_date'])
+
+    daily = SalesForecastingEngine().prepare_time_series_features(transactions)
+    feature_cols = [col for col in daily.columns if col not in ['date', 'revenue']]
+    X, y, X_test, y_test = split_and_replicate(daily[feature_cols], daily['revenue'], args.scale)
+    revenue = benchmark_estimators(revenue_estimators(args.max_rows), X, y, X_test=X_test, y_test=y_test)
+    revenue.insert(0, 'task', 'revenue (R²)')
+
+    features = ChurnPredictionEngine().prepare_churn_features(companies, transactions, interactions)
+    X, y, X_test, y_test = split_and_replicate(features[CHURN_FEATURES].fillna(0), features['is_churned'],
+                                               args.scale, shuffle=True)
+    churn = benchmark_estimators(churn_estimators(args.max_rows), X, y, scoring='roc_auc', shuffle=True,
+                                 X_test=X_test, y_test=y_test)
+    churn.insert(0, 'task', 'churn (ROC AUC)')
+
+    results = pd.concat([revenue, churn], ignore_index=True)
+    with pd.option_context('display.width', 160, 'display.float_format', '{:.4f}'.format):
+        print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"\n[OK] Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -45,8 +45,16 @@ class StreamingConfig:
     socketio_port: int = int(os.getenv("SOCKETIO_PORT", "8001"))
     event_queue_size: int = 1000
     broadcast_interval: int = 5  # seconds
+    tail_poll_interval: float = float(os.getenv("STREAM_TAIL_POLL_INTERVAL", "0.25"))  # seconds between file checks
+    event_batch_size: int = int(os.getenv("STREAM_EVENT_BATCH_SIZE", "1000"))  # sales per 'sales_batch' message
+    event_encoding: str = os.getenv("STREAM_EVENT_ENCODING", "json")  # 'json' or 'msgpack' (binary)
     ping_timeout: int = 60
     ping_interval: int = 25
+    inference_host: str = os.getenv("INFERENCE_HOST", "0.0.0.0")
+    inference_port: int = int(os.getenv("INFERENCE_PORT", "8002"))
+    inference_url: str = os.getenv("INFERENCE_URL", "http://localhost:8002")
+    inference_max_batch_size: int = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "64"))  # requests per model call
+    inference_max_wait_ms: float = float(os.getenv("INFERENCE_MAX_WAIT_MS", "5"))  # wait for more requests per batch
 
 @dataclass
 class MLConfig:
@@ -58,6 +66,10 @@ class MLConfig:
     n_estimators: int = 100
     max_depth: int = 10
     feature_importance_threshold: float = 0.01
+    n_jobs: int = int(os.getenv("ML_N_JOBS", "-1"))  # worker budget for parallel training, -1 = all cores
+    parallel_backend: str = os.getenv("ML_PARALLEL_BACKEND", "loky")  # joblib backend: loky (processes) or threading
+    tuning_time_budget: float = float(os.getenv("ML_TUNING_TIME_BUDGET", "900"))  # seconds of wall clock per search
+    tuning_cpu_budget: float = float(os.getenv("ML_TUNING_CPU_BUDGET", "3600"))  # worker CPU seconds per search
 
 @dataclass
 class DataConfig:
@@ -158,11 +170,17 @@ class Config:
             },
             "streaming": {
                 "port": self.streaming.socketio_port,
-                "broadcast_interval": self.streaming.broadcast_interval
+                "broadcast_interval": self.streaming.broadcast_interval,
+                "event_batch_size": self.streaming.event_batch_size,
+                "event_encoding": self.streaming.event_encoding,
+                "inference_port": self.streaming.inference_port,
+                "inference_max_batch_size": self.streaming.inference_max_batch_size,
+                "inference_max_wait_ms": self.streaming.inference_max_wait_ms
             },
             "ml": {
                 "random_state": self.ml.random_state,
-                "n_estimators": self.ml.n_estimators
+                "n_estimators": self.ml.n_estimators,
+                "n_jobs": self.ml.n_jobs
             },
             "api": {
                 "model": self.api.openai_model,
@@ -9,7 +9,7 @@ from dash import Dash
 import dash_bootstrap_components as dbc
 
 from .layout import create_layout
-from .callbacks import register_callbacks
+from .callbacks import register_callbacks, record_live_sale
 from .realtime_client import start_realtime_client, sales_event_queue
 import threading
 import time
@@ -52,6 +52,7 @@ def start_realtime_background():
                 while not sales_event_queue.empty():
                     event = sales_event_queue.get()
                     logger.info(f"Processing real-time event: {event.get('type', 'unknown')}")
+                    record_live_sale(event)
                     # Event processing logic can be extended here
                     # e.g., trigger callbacks, update stores, send notifications
                 time.sleep(2)
@@ -6,11 +6,20 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
+from collections import defaultdict
+from datetime import datetime
+import logging
+import threading
 import sys
 
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from src.features.features import compute_all_kpis
+from src.features.features import compute_all_kpis, compute_percentile_kpis
+from src.etl.rollup import build_daily_rollup, filter_rollup, rollup_order_value_sketch, rollup_top_k
+from src.features.heavy_hitters import SpaceSaving
+from src.features.anomalies import RevenueAnomalyDetector
+
+logger = logging.getLogger(__name__)
 
 # Load data globally
 try:
@@ -18,6 +27,46 @@ try:
 except:
     DF = pd.DataFrame()
 
+# Daily region/channel rollup with order-value sketches and top-K summaries
+ROLLUP = build_daily_rollup(DF) if not DF.empty else pd.DataFrame()
+
+# Live top-K summaries per (region, channel), fed by real-time sale events
+LIVE_TOP_PRODUCTS = defaultdict(SpaceSaving)
+LIVE_TOP_CUSTOMERS = defaultdict(SpaceSaving)
+LIVE_LOCK = threading.Lock()
+
+# Daily revenue anomalies per (region, channel), warmed up from the rollup history
+REVENUE_ANOMALIES = RevenueAnomalyDetector()
+if not ROLLUP.empty:
+    REVENUE_ANOMALIES.update_rollup(ROLLUP)
+
+def record_live_sale(event):
+    """Fold a real-time sale event into the live top-K summaries and the anomaly detector"""
+    revenue = event.get('revenue')
+    if revenue is None:
+        revenue = event.get('qty', 0) * event.get('price', 0)
+    partition = (event.get('region'), event.get('channel'))
+    with LIVE_LOCK:
+        if 'product_id' in event:
+            LIVE_TOP_PRODUCTS[partition].update(event['product_id'], float(revenue))
+        if 'customer_id' in event:
+            LIVE_TOP_CUSTOMERS[partition].update(event['customer_id'], float(revenue))
+        anomalies = REVENUE_ANOMALIES.update(event) if 'date' in event else []
+    for anomaly in anomalies:
+        logger.warning(f"Revenue {anomaly['direction']} in {anomaly['region']}/{anomaly['channel']} on "
+                       f"{anomaly['bucket']:%Y-%m-%d}: ${anomaly['revenue']:,.0f} vs ${anomaly['expected']:,.0f} "
+                       f"expected (z = {anomaly['z_score']:.1f})")
+
+def live_summaries(live, end_date, regions, channels):
+    """Live summaries matching the filters (only when the range reaches today)"""
+    if end_date and pd.Timestamp(end_date).date() < datetime.now().date():
+        return []
+    with LIVE_LOCK:
+        return [
+            SpaceSaving().merge(summary) for (region, channel), summary in live.items()
+            if (not regions or region in regions) and (not channels or channel in channels)
+        ]
+
 def filter_data(df, date_range, regions, channels):
     """Filter dataframe based on selections"""
     df_filtered = df.copy()
@@ -77,6 +126,29 @@ def register_callbacks(app):
             f"{kpis['total_customers']:,}"
         )
     
+    # Order value percentile KPIs (merged rollup sketches, no order scan)
+    @app.callback(
+        [Output('kpi-median-order-value', 'children'),
+         Output('kpi-p90-order-value', 'children'),
+         Output('kpi-p99-order-value', 'children')],
+        [Input('date-range', 'start_date'),
+         Input('date-range', 'end_date'),
+         Input('region-filter', 'value'),
+         Input('channel-filter', 'value')]
+    )
+    def update_percentile_kpis(start_date, end_date, regions, channels):
+        if ROLLUP.empty:
+            return "$0", "$0", "$0"
+        
+        rollup_filtered = filter_rollup(ROLLUP, [start_date, end_date], regions, channels)
+        kpis = compute_percentile_kpis(rollup_order_value_sketch(rollup_filtered))
+        
+        return (
+            f"${kpis['order_value_median']:,.0f}",
+            f"${kpis['order_value_p90']:,.0f}",
+            f"${kpis['order_value_p99']:,.0f}"
+        )
+    
     # Daily sales chart
     @app.callback(
         Output('daily-sales-chart', 'figure'),
@@ -140,8 +212,11 @@ def register_callbacks(app):
         if DF.empty:
             return go.Figure()
         
-        df_filtered = filter_data(DF, [start_date, end_date], regions, channels)
-        top_products = df_filtered.groupby('product_id').agg({'revenue': 'sum'}).nlargest(10, 'revenue').reset_index()
+        rollup_filtered = filter_rollup(ROLLUP, [start_date, end_date], regions, channels)
+        live = live_summaries(LIVE_TOP_PRODUCTS, end_date, regions, channels)
+        top_products = rollup_top_k(rollup_filtered, 'top_products_topk', 10, live).rename(
+            columns={'key': 'product_id', 'count': 'revenue'}
+        )
         
         fig = px.bar(top_products, x='revenue', y='product_id', orientation='h', title='')
         fig.update_layout(
@@ -165,8 +240,11 @@ def register_callbacks(app):
         if DF.empty:
             return go.Figure()
         
-        df_filtered = filter_data(DF, [start_date, end_date], regions, channels)
-        top_customers = df_filtered.groupby('customer_id').agg({'revenue': 'sum'}).nlargest(10, 'revenue').reset_index()
+        rollup_filtered = filter_rollup(ROLLUP, [start_date, end_date], regions, channels)
+        live = live_summaries(LIVE_TOP_CUSTOMERS, end_date, regions, channels)
+        top_customers = rollup_top_k(rollup_filtered, 'top_customers_topk', 10, live).rename(
+            columns={'key': 'customer_id', 'count': 'revenue'}
+        )
         
         fig = px.bar(top_customers, x='revenue', y='customer_id', orientation='h', title='')
         fig.update_layout(
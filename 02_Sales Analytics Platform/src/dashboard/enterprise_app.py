@@ -16,6 +16,11 @@ from pathlib import Path
 
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.features.ltv import ltv_box_stats
+from src.features.feature_store import data_version
+from src.models.forecast_cache import ForecastCache
+from src.realtime.inference_client import InferenceClient
+from src.models.win_probability import OPEN_STAGES
 
 # Initialize app with professional theme
 app = Dash(
@@ -43,6 +48,41 @@ except:
     reps = pd.DataFrame()
     activities = pd.DataFrame()
 
+# Forecasts are precomputed after ETL/model updates; clicks only read the cache,
+# misses go to the inference service so the dashboard never loads models itself
+forecast_cache = ForecastCache()
+inference_client = InferenceClient()
+TRANSACTIONS_VERSION = data_version(transactions) if DATA_LOADED else None
+FORECAST_DAYS = 30
+
+# Open deals are batch-scored by `python -m src.models.win_probability`
+DEAL_SCORES_PATH = Path('data/processed/deal_win_probability.csv')
+_deal_scores = {'mtime': None, 'frame': None}
+
+def load_deal_scores():
+    """Latest deal win-probability scores (re-read only when the file changes), or None"""
+    if not DEAL_SCORES_PATH.exists():
+        return None
+    mtime = DEAL_SCORES_PATH.stat().st_mtime
+    if mtime != _deal_scores['mtime']:
+        _deal_scores.update(mtime=mtime, frame=pd.read_csv(DEAL_SCORES_PATH))
+    return _deal_scores['frame']
+
+# Customer LTV is refreshed nightly by `python -m src.features.ltv`
+LTV_PATH = Path('data/processed/customer_ltv.csv')
+_ltv_box = {'mtime': None, 'frame': None}
+
+def load_ltv_box_stats():
+    """Box statistics of the nightly LTV per company size (recomputed only when the file changes), or None"""
+    if not LTV_PATH.exists():
+        return None
+    mtime = LTV_PATH.stat().st_mtime
+    if mtime != _ltv_box['mtime']:
+        ltv = pd.read_csv(LTV_PATH, index_col=0)
+        segments = companies.set_index('company_id')['company_size'] if not companies.empty else pd.Series(dtype=object)
+        _ltv_box.update(mtime=mtime, frame=ltv_box_stats(ltv, segments))
+    return _ltv_box['frame']
+
 # Create comprehensive layout
 def create_enterprise_layout():
     return dbc.Container([
@@ -399,6 +439,107 @@ app.layout = create_enterprise_layout()
 # Callback implementations will go here
 # (Callbacks are defined separately to keep code modular)
 
+@app.callback(
+    Output('ltv-distribution', 'figure'),
+    Input('dashboard-tabs', 'active_tab')
+)
+def update_ltv_distribution(active_tab):
+    """Projected customer lifetime value by company size (precomputed box statistics)"""
+    fig = go.Figure()
+    if active_tab != 'customers':
+        return fig
+    
+    stats = load_ltv_box_stats()
+    if stats is None or stats.empty:
+        fig.add_annotation(text="No LTV data yet. Run python -m src.features.ltv",
+                           showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+        return fig
+    
+    fig.add_trace(go.Box(
+        x=stats['segment'],
+        q1=stats['q1'],
+        median=stats['median'],
+        q3=stats['q3'],
+        lowerfence=stats['lowerfence'],
+        upperfence=stats['upperfence'],
+        mean=stats['mean'],
+        boxpoints=False
+    ))
+    fig.update_layout(
+        yaxis_title="Lifetime Value ($)",
+        showlegend=False,
+        margin=dict(l=20, r=20, t=20, b=20)
+    )
+    return fig
+
+@app.callback(
+    Output('forecast-chart', 'figure'),
+    Input('btn-forecast', 'n_clicks'),
+    prevent_initial_call=True
+)
+def update_forecast_chart(n_clicks):
+    """30-day revenue forecast served from the forecast cache or the inference service"""
+    fig = go.Figure()
+    if not DATA_LOADED or transactions.empty:
+        return fig
+    
+    forecast = forecast_cache.get(TRANSACTIONS_VERSION, FORECAST_DAYS)
+    if forecast is None:
+        try:
+            forecast = inference_client.revenue_forecast(FORECAST_DAYS)
+        except (ConnectionError, ValueError) as e:
+            fig.add_annotation(text=f"Forecast unavailable: {e}",
+                               showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+            return fig
+    
+    daily = transactions.groupby(transactions['transaction_date'].dt.normalize())['amount'].sum().tail(90)
+    fig.add_trace(go.Scatter(x=daily.index, y=daily.values, name='Actual', line=dict(color='#2c3e50')))
+    fig.add_trace(go.Scatter(x=forecast['date'], y=forecast['predicted_revenue'], name='Forecast',
+                             line=dict(color='#18bc9c', dash='dash')))
+    fig.update_layout(
+        yaxis_title="Revenue ($)",
+        hovermode='x unified',
+        margin=dict(l=20, r=20, t=20, b=20)
+    )
+    return fig
+
+@app.callback(
+    Output('close-probability', 'figure'),
+    Input('dashboard-tabs', 'active_tab')
+)
+def update_close_probability(active_tab):
+    """Model win probability of open deals by stage, next to the static stage probability"""
+    fig = go.Figure()
+    if not DATA_LOADED or active_tab != 'predictive':
+        return fig
+    
+    scores = load_deal_scores()
+    if scores is None:
+        fig.add_annotation(text="No deal scores yet - run python -m src.models.win_probability",
+                           showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+        return fig
+    
+    stages = [stage for stage in OPEN_STAGES if stage in set(scores['stage'])]
+    # Box statistics are summarized per stage so a million deals do not ship to the browser
+    quantiles = scores.groupby('stage')['win_probability'].quantile([0.05, 0.25, 0.5, 0.75, 0.95]).unstack()
+    quantiles = quantiles.reindex(stages)
+    fig.add_trace(go.Box(
+        x=stages, q1=quantiles[0.25], median=quantiles[0.5], q3=quantiles[0.75],
+        lowerfence=quantiles[0.05], upperfence=quantiles[0.95],
+        mean=scores.groupby('stage')['win_probability'].mean().reindex(stages),
+        name='Model', marker_color='#18bc9c'
+    ))
+    fig.add_trace(go.Scatter(
+        x=stages, y=scores.groupby('stage')['stage_probability'].mean().reindex(stages),
+        mode='markers', name='Stage default', marker=dict(color='#2c3e50', symbol='diamond', size=10)
+    ))
+    fig.update_layout(
+        yaxis_title="Win Probability",
+        yaxis_tickformat='.0%',
+        margin=dict(l=20, r=20, t=20, b=20)
+    )
+    return fig
+
 if __name__ == "__main__":
     if DATA_LOADED:
         print("\n" + "="*60)
@@ -102,6 +102,13 @@ def create_layout():
                     dbc.Col(create_kpi_card("Customers", "0", "users", "warning"), md=3)
                 ], className="mb-4"),
 
+                # Order value percentiles
+                dbc.Row([
+                    dbc.Col(create_kpi_card("Median Order Value", "$0", "balance-scale", "info"), md=4),
+                    dbc.Col(create_kpi_card("P90 Order Value", "$0", "chart-bar", "primary"), md=4),
+                    dbc.Col(create_kpi_card("P99 Order Value", "$0", "chart-bar", "danger"), md=4)
+                ], className="mb-4"),
+
                 # Charts Row 1
                 dbc.Row([
                     dbc.Col([
@@ -4,6 +4,11 @@ Dash client for real-time sales updates using SocketIO
 import socketio
 import threading
 import queue
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.realtime.events import BATCH_EVENT, decode_sales_batch
 
 # Thread-safe queue for passing events to Dash
 sales_event_queue = queue.Queue()
@@ -24,6 +29,12 @@ def on_new_sale(data):
     print(f"[Realtime] New sale event: {data}")
     sales_event_queue.put(data)
 
+@sio.on(BATCH_EVENT)
+def on_sales_batch(payload):
+    # JSON or msgpack batches are unpacked into the same per-sale dicts as 'new_sale'
+    for sale in decode_sales_batch(payload):
+        sales_event_queue.put(sale)
+
 def start_realtime_client():
     def run():
         try:
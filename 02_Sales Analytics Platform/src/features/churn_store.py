@@ -0,0 +1,225 @@
+"""
+Snapshot-based churn feature store.
+
+Churn features depend on the date recency is measured from. Computing them
+against the wall clock makes every run different and forces a rebuild from
+all transactions each time. This store materializes the per-company feature
+table for explicit reference dates instead: a snapshot at date D only sees
+transactions and interactions dated on or before D, and is stored so training
+and scoring read identical, reproducible features.
+
+Snapshots are built incrementally. The store keeps running per-company
+aggregates up to a watermark (the latest snapshot date); a newer snapshot only
+aggregates rows dated after the watermark and merges them in. The rows up to
+the watermark are fingerprinted on every column the aggregates read, so
+late-arriving or corrected history (including a transaction moved to another
+company or a corrected NPS score) triggers a full rebuild instead of silently
+diverging. Snapshots for dates
+before the watermark (backfills) are computed from scratch without touching
+the running state.
+
+Functions:
+    latest_activity_date: Last day with a transaction or interaction
+
+Classes:
+    ChurnFeatureStore: Per-company churn features materialized per reference date
+"""
+from pathlib import Path
+from typing import List, Optional
+import logging
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from src.models.churn_scoring import (
+    _merge_aggregates, build_churn_features, interaction_aggregates, transaction_aggregates
+)
+
+logger = logging.getLogger(__name__)
+
+# Date column, every other column the aggregates read, aggregate function
+SOURCES = {
+    'transactions': ('transaction_date', ('company_id', 'amount'), transaction_aggregates),
+    'interactions': ('interaction_date', ('company_id', 'interaction_id', 'satisfaction_score', 'nps_score'),
+                     interaction_aggregates),
+}
+
+
+def latest_activity_date(transactions: pd.DataFrame, interactions: pd.DataFrame) -> pd.Timestamp:
+    """Last day with a transaction or interaction (the default snapshot date)."""
+    dates = [pd.to_datetime(frame[date_col]).max() for frame, (date_col, _, _) in
+             zip((transactions, interactions), SOURCES.values()) if len(frame)]
+    if not dates:
+        raise ValueError("No transactions or interactions to take a snapshot of")
+    return max(dates).normalize()
+
+
+class ChurnFeatureStore:
+    """
+    Per-company churn features materialized for explicit reference dates.
+
+    Usage:
+        store = ChurnFeatureStore('data/processed/churn_features')
+        features = store.materialize(companies, transactions, interactions, '2026-03-31')
+        engine = ChurnPredictionEngine(feature_store=store)
+        engine.train_churn_model(store.snapshot('2026-03-31'))
+    """
+
+    def __init__(self, path: str = 'data/processed/churn_features'):
+        self.path = Path(path)
+        self._state = None
+
+    @property
+    def watermark(self) -> Optional[pd.Timestamp]:
+        """Reference date the running aggregates are current to (None when empty)."""
+        state = self._load()
+        return state['watermark'] if state else None
+
+    def snapshots(self) -> List[pd.Timestamp]:
+        """Reference dates with a materialized snapshot, oldest first."""
+        if not self.path.exists():
+            return []
+        return sorted(pd.Timestamp(file.stem.split('_', 1)[1]) for file in self.path.glob('snapshot_*.pkl'))
+
+    def snapshot(self, reference_date=None) -> pd.DataFrame:
+        """
+        Stored feature table for a reference date (default: latest snapshot).
+
+        Raises:
+            KeyError: If no snapshot exists for the date
+        """
+        if reference_date is None:
+            dates = self.snapshots()
+            if not dates:
+                raise KeyError(f"No churn feature snapshots in {self.path}")
+            reference_date = dates[-1]
+        file = self._snapshot_file(pd.Timestamp(reference_date).normalize())
+        if not file.exists():
+            raise KeyError(f"No churn feature snapshot for {pd.Timestamp(reference_date):%Y-%m-%d}")
+        with open(file, 'rb') as f:
+            return pickle.load(f)
+
+    def materialize(self, companies: pd.DataFrame, transactions: pd.DataFrame, interactions: pd.DataFrame,
+                    reference_date=None) -> pd.DataFrame:
+        """
+        Build and store the feature snapshot for a reference date.
+
+        Rows dated after the reference date are ignored, so the frames may hold
+        more recent data than the snapshot.
+
+        Args:
+            companies (pd.DataFrame): Company records
+            transactions (pd.DataFrame): Transactions (all known, or at least every row after the watermark)
+            interactions (pd.DataFrame): Interactions, same as transactions
+            reference_date: Snapshot date (default: latest activity date)
+
+        Returns:
+            pd.DataFrame: Companies with CHURN_FEATURES and the is_churned label
+        """
+        frames = {'transactions': transactions, 'interactions': interactions}
+        reference_date = pd.Timestamp(reference_date if reference_date is not None
+                                      else latest_activity_date(transactions, interactions)).normalize()
+        state = self._load()
+
+        if state is not None and reference_date < state['watermark']:
+            # Backfill: point-in-time aggregates without moving the watermark
+            aggregates = {name: aggregate(_between(frames[name], date_col, None, reference_date))
+                          for name, (date_col, _, aggregate) in SOURCES.items()}
+            logger.info(f"Backfilled churn snapshot {reference_date:%Y-%m-%d} from scratch")
+        elif state is not None and self._history_unchanged(frames, state):
+            aggregates = {}
+            for name, (date_col, _, aggregate) in SOURCES.items():
+                new_rows = _between(frames[name], date_col, state['watermark'], reference_date)
+                aggregates[name] = _merge_aggregates([state['aggregates'][name], aggregate(new_rows)]) \
+                    if len(new_rows) else state['aggregates'][name]
+            self._save_state(aggregates, reference_date, frames)
+            logger.info(f"Advanced churn features {state['watermark']:%Y-%m-%d} -> {reference_date:%Y-%m-%d}")
+        else:
+            if state is not None:
+                logger.info("Activity before the watermark changed; rebuilding churn feature aggregates")
+            aggregates = {name: aggregate(_between(frames[name], date_col, None, reference_date))
+                          for name, (date_col, _, aggregate) in SOURCES.items()}
+            self._save_state(aggregates, reference_date, frames)
+
+        features = build_churn_features(companies, aggregates['transactions'], aggregates['interactions'],
+                                        reference_date)
+        features['reference_date'] = reference_date
+        self._write(self._snapshot_file(reference_date), features)
+        return features
+
+    def clear(self):
+        """Delete the running aggregates and every snapshot."""
+        self._state = None
+        if self.path.exists():
+            for file in self.path.glob('*.pkl'):
+                file.unlink()
+
+    def _history_unchanged(self, frames: dict, state: dict) -> bool:
+        """Rows up to the watermark still fingerprint to what the aggregates were built from."""
+        return all(
+            _fingerprint(_between(frames[name], date_col, None, state['watermark']), date_col, columns)
+            == state['versions'][name]
+            for name, (date_col, columns, _) in SOURCES.items()
+        )
+
+    def _save_state(self, aggregates: dict, watermark: pd.Timestamp, frames: dict):
+        versions = {name: _fingerprint(_between(frames[name], date_col, None, watermark), date_col, columns)
+                    for name, (date_col, columns, _) in SOURCES.items()}
+        self._state = {'aggregates': aggregates, 'watermark': watermark, 'versions': versions}
+        self._write(self.path / 'state.pkl', self._state)
+
+    def _load(self) -> Optional[dict]:
+        file = self.path / 'state.pkl'
+        if self._state is None and file.exists():
+            with open(file, 'rb') as f:
+                self._state = pickle.load(f)
+        return self._state
+
+    def _snapshot_file(self, reference_date: pd.Timestamp) -> Path:
+        return self.path / f'snapshot_{reference_date:%Y-%m-%d}.pkl'
+
+    def _write(self, file: Path, value):
+        """Persist atomically."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        temp = file.with_suffix('.tmp')
+        with open(temp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, file)
+
+
+def _fingerprint(frame: pd.DataFrame, date_col: str, columns) -> str:
+    """
+    Order-independent fingerprint of the date and aggregated columns of a frame.
+
+    Identifiers are hashed as strings and values as floats, so the same data
+    read with different dtypes (e.g. int vs float amounts) fingerprints the same.
+    """
+    if frame.empty:
+        return '0-0'
+    data = {'date': pd.to_datetime(frame[date_col]).to_numpy()}
+    for column in columns:
+        values = frame[column]
+        data[column] = values.to_numpy(dtype=np.float64) if pd.api.types.is_numeric_dtype(values) \
+            else values.astype(str).to_numpy()
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(data), index=False).to_numpy()
+    return f"{len(frame)}-{int(hashes.sum(dtype=np.uint64)):016x}"
+
+
+def _between(frame: pd.DataFrame, date_col: str, after, through) -> pd.DataFrame:
+    """Rows dated after `after` (exclusive day) and on or before `through` (inclusive day)."""
+    days = pd.to_datetime(frame[date_col]).dt.normalize()
+    mask = days <= through
+    if after is not None:
+        mask &= days > after
+    return frame[mask.to_numpy()]
+
+
+if __name__ == "__main__":
+    companies = pd.read_csv('data/raw/companies.csv', parse_dates=['created_date'])
+    transactions = pd.read_csv('data/raw/transactions.csv', parse_dates=['transaction_date'])
+    interactions = pd.read_csv('data/raw/customer_interactions.csv', parse_dates=['interaction_date'])
+    store = ChurnFeatureStore()
+    features = store.materialize(companies, transactions, interactions)
+    print(f"[OK] Churn feature snapshot {store.watermark:%Y-%m-%d}: {len(features):,} companies")
@@ -0,0 +1,319 @@
+"""
+Cohort retention engine.
+
+This module assigns every customer to the period (month or week) of their first
+purchase and builds cohort x period-offset retention and revenue matrices. All
+work is done on integer period ordinals with numpy/pandas vectorized operations,
+so tens of millions of orders are reduced to a compact customer-period table
+in a single pass.
+
+The matrices can be maintained incrementally: ``CohortAccumulator.update``
+folds newly landed orders into the existing state, including late-arriving
+orders that move a customer into an earlier cohort.
+
+Functions:
+    assign_cohorts: Map each customer to their first-purchase cohort
+    build_cohort_matrices: Batch compute retention and revenue matrices
+
+Classes:
+    CohortMatrices: Result container with retention and revenue views
+    CohortAccumulator: Incrementally updatable cohort state
+"""
+from dataclasses import dataclass
+from typing import Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FREQS = ('M', 'W')
+
+# Customer-period pairs are packed into a single int64 key: the customer code
+# in the high bits and the (offset) period ordinal in the low bits.
+_PERIOD_BITS = 21
+_PERIOD_OFFSET = 1 << (_PERIOD_BITS - 1)
+_PERIOD_MASK = (1 << _PERIOD_BITS) - 1
+_NO_COHORT = np.iinfo(np.int64).max
+
+
+def _period_ordinals(dates: pd.Series, freq: str) -> np.ndarray:
+    """
+    Convert dates to integer period ordinals.
+
+    Months are counted from 1970-01, weeks (starting Monday) from the week
+    containing 1970-01-01.
+    """
+    days = pd.to_datetime(dates).to_numpy().astype('datetime64[D]')
+    if freq == 'M':
+        return days.astype('datetime64[M]').astype(np.int64)
+    # 1970-01-01 was a Thursday; shift so weeks start on Monday
+    return (days.astype(np.int64) + 3) // 7
+
+
+def _period_starts(ordinals: np.ndarray, freq: str) -> pd.DatetimeIndex:
+    """Convert period ordinals back to the timestamp of the period start."""
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    if freq == 'M':
+        return pd.DatetimeIndex(ordinals.astype('datetime64[M]').astype('datetime64[ns]'))
+    return pd.DatetimeIndex((ordinals * 7 - 3).astype('datetime64[D]').astype('datetime64[ns]'))
+
+
+def _validate_freq(freq: str) -> str:
+    freq = freq.upper()
+    if freq not in SUPPORTED_FREQS:
+        raise ValueError(f"Unsupported cohort frequency '{freq}'. Use one of {SUPPORTED_FREQS}")
+    return freq
+
+
+@dataclass
+class CohortMatrices:
+    """
+    Cohort analysis result.
+
+    Attributes:
+        freq (str): Period frequency ('M' or 'W')
+        cohort_sizes (pd.Series): Number of customers per cohort
+        active_customers (pd.DataFrame): Cohort x offset count of active customers
+        revenue (pd.DataFrame): Cohort x offset revenue
+    """
+    freq: str
+    cohort_sizes: pd.Series
+    active_customers: pd.DataFrame
+    revenue: pd.DataFrame
+
+    @property
+    def retention(self) -> pd.DataFrame:
+        """Share of each cohort active in every period offset (0-1)."""
+        return self.active_customers.div(self.cohort_sizes, axis=0)
+
+    @property
+    def revenue_per_customer(self) -> pd.DataFrame:
+        """Revenue per original cohort member for every period offset."""
+        return self.revenue.div(self.cohort_sizes, axis=0)
+
+    @property
+    def cumulative_revenue_per_customer(self) -> pd.DataFrame:
+        """Cumulative revenue per original cohort member."""
+        return self.revenue_per_customer.cumsum(axis=1)
+
+
+class CohortAccumulator:
+    """
+    Incrementally maintained cohort retention and revenue state.
+
+    The state is a sorted table of distinct customer-period pairs plus the
+    cohort x offset aggregates, so each update costs time proportional to the
+    new orders (plus an array insert) rather than to the full history.
+
+    Usage:
+        acc = CohortAccumulator(freq='M')
+        acc.update(history_df)
+        acc.update(todays_orders_df)
+        retention = acc.matrices().retention
+    """
+
+    def __init__(
+        self,
+        freq: str = 'M',
+        customer_col: str = 'customer_id',
+        date_col: str = 'date',
+        revenue_col: str = 'revenue'
+    ):
+        self.freq = _validate_freq(freq)
+        self.customer_col = customer_col
+        self.date_col = date_col
+        self.revenue_col = revenue_col
+
+        self._customers = pd.Index([])
+        self._first_period = np.empty(0, dtype=np.int64)
+        self._pair_keys = np.empty(0, dtype=np.int64)
+        self._pair_revenue = np.empty(0, dtype=np.float64)
+        self._active = pd.Series(dtype=np.float64)
+        self._revenue = pd.Series(dtype=np.float64)
+        self.orders_processed = 0
+
+    @property
+    def n_customers(self) -> int:
+        """Number of distinct customers seen so far."""
+        return len(self._customers)
+
+    def update(self, orders: pd.DataFrame) -> 'CohortAccumulator':
+        """
+        Fold new orders into the cohort state.
+
+        Args:
+            orders (pd.DataFrame): Orders with customer, date and revenue columns
+
+        Returns:
+            CohortAccumulator: self, to allow chaining
+        """
+        if orders.empty:
+            return self
+
+        codes = self._customer_codes(orders[self.customer_col])
+        periods = _period_ordinals(orders[self.date_col], self.freq)
+        if self.revenue_col in orders.columns:
+            revenue = orders[self.revenue_col].to_numpy(dtype=np.float64)
+        else:
+            revenue = (orders['qty'] * orders['price']).to_numpy(dtype=np.float64)
+
+        # Collapse orders to the customer-period grain
+        keys = (codes << _PERIOD_BITS) | (periods + _PERIOD_OFFSET)
+        key_codes, new_keys = pd.factorize(keys)
+        new_keys = np.asarray(new_keys, dtype=np.int64)
+        new_revenue = np.bincount(key_codes, weights=revenue, minlength=len(new_keys))
+        pair_customer = new_keys >> _PERIOD_BITS
+        pair_period = (new_keys & _PERIOD_MASK) - _PERIOD_OFFSET
+
+        # First purchase period per customer within this batch
+        batch_first = pd.Series(pair_period).groupby(pair_customer).min()
+        customers_in_batch = batch_first.index.to_numpy(dtype=np.int64)
+        old_first = self._first_period[customers_in_batch]
+        new_first = np.minimum(old_first, batch_first.to_numpy(dtype=np.int64))
+
+        # Late-arriving orders can move known customers into an earlier cohort
+        moved = (old_first != _NO_COHORT) & (new_first < old_first)
+        if moved.any():
+            self._rehome(customers_in_batch[moved], new_first[moved])
+        self._first_period[customers_in_batch] = new_first
+
+        # Split batch pairs into already-known and brand new ones
+        positions = np.searchsorted(self._pair_keys, new_keys)
+        known = positions < len(self._pair_keys)
+        known[known] = self._pair_keys[positions[known]] == new_keys[known]
+
+        cohorts = self._first_period[pair_customer]
+        self._accumulate(cohorts, pair_period - cohorts, (~known).astype(np.float64), new_revenue)
+
+        np.add.at(self._pair_revenue, positions[known], new_revenue[known])
+        order = np.argsort(new_keys[~known], kind='stable')
+        insert_keys = new_keys[~known][order]
+        insert_at = np.searchsorted(self._pair_keys, insert_keys)
+        self._pair_keys = np.insert(self._pair_keys, insert_at, insert_keys)
+        self._pair_revenue = np.insert(self._pair_revenue, insert_at, new_revenue[~known][order])
+
+        self.orders_processed += len(orders)
+        logger.debug(f"Cohort update: {len(orders):,} orders, {int((~known).sum()):,} new customer-periods")
+        return self
+
+    def matrices(self, max_periods: Optional[int] = None) -> CohortMatrices:
+        """
+        Materialize the current cohort matrices.
+
+        Args:
+            max_periods (int, optional): Truncate to the first N period offsets
+
+        Returns:
+            CohortMatrices: Cohort sizes, active customer and revenue matrices
+        """
+        if self.n_customers == 0:
+            empty = pd.DataFrame(dtype=np.float64)
+            return CohortMatrices(self.freq, pd.Series(dtype=np.int64), empty, empty.copy())
+
+        sizes = pd.Series(self._first_period).value_counts().sort_index()
+        sizes.index = _period_starts(sizes.index.to_numpy(), self.freq)
+        sizes.index.name = 'cohort'
+
+        active = self._to_frame(self._active, sizes.index, max_periods).astype(np.int64)
+        revenue = self._to_frame(self._revenue, sizes.index, max_periods)
+        return CohortMatrices(self.freq, sizes.rename('customers'), active, revenue)
+
+    def _customer_codes(self, customers: pd.Series) -> np.ndarray:
+        """Map customer ids to stable integer codes, registering unseen ones."""
+        codes = self._customers.get_indexer(customers)
+        unseen = codes < 0
+        if unseen.any():
+            additions = pd.Index(pd.unique(customers[unseen]))
+            self._customers = self._customers.append(additions)
+            self._first_period = np.concatenate([
+                self._first_period, np.full(len(additions), _NO_COHORT, dtype=np.int64)
+            ])
+            codes[unseen] = self._customers.get_indexer(customers[unseen])
+        return codes.astype(np.int64)
+
+    def _rehome(self, customers: np.ndarray, new_cohorts: np.ndarray):
+        """Move the existing pairs of customers into their new, earlier cohort."""
+        mask = np.isin(self._pair_keys >> _PERIOD_BITS, customers)
+        pair_customer = self._pair_keys[mask] >> _PERIOD_BITS
+        pair_period = (self._pair_keys[mask] & _PERIOD_MASK) - _PERIOD_OFFSET
+        pair_revenue = self._pair_revenue[mask]
+        ones = np.ones(len(pair_period))
+
+        old_cohorts = self._first_period[pair_customer]
+        self._accumulate(old_cohorts, pair_period - old_cohorts, -ones, -pair_revenue)
+
+        lookup = pd.Series(new_cohorts, index=customers)
+        moved_cohorts = lookup.loc[pair_customer].to_numpy(dtype=np.int64)
+        self._accumulate(moved_cohorts, pair_period - moved_cohorts, ones, pair_revenue)
+
+    def _accumulate(self, cohorts, offsets, counts, revenue):
+        """Add count and revenue deltas to the cohort x offset aggregates."""
+        delta = pd.DataFrame({
+            'cohort': cohorts, 'offset': offsets, 'active': counts, 'revenue': revenue
+        }).groupby(['cohort', 'offset'])[['active', 'revenue']].sum()
+        if self._active.empty:
+            self._active, self._revenue = delta['active'], delta['revenue']
+            return
+        self._active = self._active.add(delta['active'], fill_value=0)
+        self._revenue = self._revenue.add(delta['revenue'], fill_value=0)
+
+    def _to_frame(self, values: pd.Series, cohort_index: pd.DatetimeIndex,
+                  max_periods: Optional[int]) -> pd.DataFrame:
+        frame = values.unstack(fill_value=0)
+        frame.index = _period_starts(frame.index.to_numpy(), self.freq)
+        frame = frame.reindex(index=cohort_index, fill_value=0).fillna(0)
+        frame.columns = frame.columns.astype(int)
+        frame.columns.name = 'period'
+        if max_periods is not None:
+            frame = frame.loc[:, frame.columns < max_periods]
+        return frame
+
+
+def assign_cohorts(df: pd.DataFrame, freq: str = 'M', customer_col: str = 'customer_id',
+                   date_col: str = 'date') -> pd.Series:
+    """
+    Assign each customer to their first-purchase cohort.
+
+    Args:
+        df (pd.DataFrame): Orders with customer and date columns
+        freq (str): 'M' for monthly or 'W' for weekly cohorts
+        customer_col (str): Customer identifier column
+        date_col (str): Order date column
+
+    Returns:
+        pd.Series: Cohort start date indexed by customer id
+    """
+    freq = _validate_freq(freq)
+    periods = pd.Series(_period_ordinals(df[date_col], freq), index=df.index)
+    first = periods.groupby(df[customer_col].to_numpy()).min()
+    return pd.Series(_period_starts(first.to_numpy(), freq), index=first.index, name='cohort')
+
+
+def build_cohort_matrices(df: pd.DataFrame, freq: str = 'M', customer_col: str = 'customer_id',
+                          date_col: str = 'date', revenue_col: str = 'revenue',
+                          max_periods: Optional[int] = None) -> CohortMatrices:
+    """
+    Build cohort x period retention and revenue matrices in one vectorized pass.
+
+    Args:
+        df (pd.DataFrame): Orders with customer, date and revenue columns
+        freq (str): 'M' for monthly or 'W' for weekly cohorts
+        customer_col (str): Customer identifier column
+        date_col (str): Order date column
+        revenue_col (str): Revenue column (falls back to qty * price)
+        max_periods (int, optional): Truncate to the first N period offsets
+
+    Returns:
+        CohortMatrices: Cohort sizes, active customer and revenue matrices
+    """
+    accumulator = CohortAccumulator(freq, customer_col, date_col, revenue_col)
+    return accumulator.update(df).matrices(max_periods)
+
+
+if __name__ == "__main__":
+    df = pd.read_csv('data/processed/sales_transformed.csv', parse_dates=['date'])
+    cohorts = build_cohort_matrices(df, freq='M', max_periods=12)
+    print("Monthly retention (%):")
+    print((cohorts.retention * 100).round(1).to_string())
@@ -0,0 +1,264 @@
+"""
+Incrementally maintained feature store for revenue forecasting.
+
+The forecasting models work on one row per day with calendar columns, lags,
+rolling statistics and growth rates. Rebuilding that frame from every
+transaction on each training or forecasting call is wasteful, so the store
+persists the daily frame together with a fingerprint of the data it was built
+from (the data version). On refresh only days at or after the last stored day
+are aggregated, and their lags and rolling windows are computed from the stored
+tail; if older history changed, the frame is rebuilt from scratch.
+
+Functions:
+    calendar_features: Vectorized calendar features for a sequence of dates
+    aggregate_daily: Daily revenue, transaction count and average value
+    add_time_series_features: Calendar, lag, rolling and growth features
+    data_version: Order-independent fingerprint of transaction data
+
+Classes:
+    ForecastFeatureStore: Persistent daily feature frame with incremental refresh
+"""
+from pathlib import Path
+from typing import Optional
+import logging
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_FEATURES = ['year', 'month', 'day', 'dayofweek', 'quarter', 'weekofyear',
+                     'is_month_start', 'is_month_end', 'is_quarter_start', 'is_quarter_end']
+
+LAGS = [1, 7, 14, 30]
+ROLLING_WINDOWS = [7, 14, 30]
+
+# Rows of history needed to compute every feature of a new day
+LOOKBACK_DAYS = max(LAGS + ROLLING_WINDOWS)
+
+
+def calendar_features(dates) -> pd.DataFrame:
+    """Vectorized calendar features for a sequence of dates."""
+    dates = pd.DatetimeIndex(dates)
+    return pd.DataFrame({
+        'year': dates.year,
+        'month': dates.month,
+        'day': dates.day,
+        'dayofweek': dates.dayofweek,
+        'quarter': dates.quarter,
+        'weekofyear': dates.isocalendar().week.to_numpy(dtype=int),
+        'is_month_start': dates.is_month_start.astype(int),
+        'is_month_end': dates.is_month_end.astype(int),
+        'is_quarter_start': dates.is_quarter_start.astype(int),
+        'is_quarter_end': dates.is_quarter_end.astype(int),
+    })
+
+
+def aggregate_daily(df: pd.DataFrame, date_col: str = 'transaction_date', value_col: str = 'amount') -> pd.DataFrame:
+    """
+    Aggregate transactions to one row per day.
+
+    Returns:
+        pd.DataFrame: date, revenue, transactions, avg_value sorted by date
+    """
+    dates = pd.to_datetime(df[date_col]).dt.normalize()
+    daily = df[value_col].groupby(dates.to_numpy()).agg(['sum', 'count', 'mean']).reset_index()
+    daily.columns = ['date', 'revenue', 'transactions', 'avg_value']
+    return daily
+
+
+def add_time_series_features(daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add calendar, lag, rolling and growth features to a daily frame.
+
+    Lags and windows are in rows (observed days), so a frame that starts with
+    LOOKBACK_DAYS rows of history yields complete features for every later row.
+
+    Args:
+        daily (pd.DataFrame): Output of aggregate_daily
+
+    Returns:
+        pd.DataFrame: Copy of daily with feature columns (warm-up rows contain NaN)
+    """
+    daily = daily.reset_index(drop=True).copy()
+
+    calendar = calendar_features(daily['date'])
+    for col in CALENDAR_FEATURES:
+        daily[col] = calendar[col].to_numpy()
+
+    for lag in LAGS:
+        daily[f'revenue_lag_{lag}'] = daily['revenue'].shift(lag)
+        daily[f'transactions_lag_{lag}'] = daily['transactions'].shift(lag)
+
+    for window in ROLLING_WINDOWS:
+        daily[f'revenue_rolling_mean_{window}'] = daily['revenue'].rolling(window).mean()
+        daily[f'revenue_rolling_std_{window}'] = daily['revenue'].rolling(window).std()
+        daily[f'transactions_rolling_mean_{window}'] = daily['transactions'].rolling(window).mean()
+
+    daily['revenue_pct_change'] = daily['revenue'].pct_change()
+    daily['revenue_diff'] = daily['revenue'].diff()
+    return daily
+
+
+def data_version(df: pd.DataFrame, date_col: str = 'transaction_date', value_col: str = 'amount') -> str:
+    """
+    Fingerprint of the (date, value) content of a transaction frame.
+
+    Row hashes are summed, so the version does not depend on row order and is
+    computed in one vectorized pass.
+    """
+    if df.empty:
+        return '0-0'
+    frame = pd.DataFrame({
+        'date': pd.to_datetime(df[date_col]).to_numpy(),
+        'value': df[value_col].to_numpy(dtype=np.float64),
+    })
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return f"{len(frame)}-{int(hashes.sum(dtype=np.uint64)):016x}"
+
+
+class ForecastFeatureStore:
+    """
+    Persistent daily feature frame keyed by data version.
+
+    The last stored day is treated as still open: a refresh re-aggregates rows
+    from that day onwards, appends the new days and computes their features
+    from the LOOKBACK_DAYS stored rows before them. Rows before the open day are
+    fingerprinted so that corrections to older history trigger a full rebuild.
+
+    Usage:
+        store = ForecastFeatureStore('data/processed/feature_store')
+        features = store.refresh(transactions)
+        engine = SalesForecastingEngine(feature_store=store)
+    """
+
+    def __init__(self, path: str = 'data/processed/feature_store', name: str = 'revenue_daily',
+                 date_col: str = 'transaction_date', value_col: str = 'amount'):
+        self.path = Path(path)
+        self.name = name
+        self.date_col = date_col
+        self.value_col = value_col
+        self._state = None
+
+    @property
+    def file(self) -> Path:
+        return self.path / f'{self.name}.pkl'
+
+    @property
+    def version(self) -> Optional[str]:
+        """Data version of the stored frame (None when empty)."""
+        state = self._load()
+        return state['version'] if state else None
+
+    def features(self, dropna: bool = True) -> pd.DataFrame:
+        """
+        Stored daily feature frame.
+
+        Args:
+            dropna (bool): Drop warm-up rows with incomplete features, matching
+                SalesForecastingEngine.prepare_time_series_features
+
+        Returns:
+            pd.DataFrame: Daily features (empty if nothing has been stored)
+        """
+        state = self._load()
+        if state is None:
+            return pd.DataFrame()
+        daily = state['daily']
+        return daily.dropna() if dropna else daily.copy()
+
+    def refresh(self, transactions_df: pd.DataFrame, dropna: bool = True) -> pd.DataFrame:
+        """
+        Bring the store up to date with a transaction frame and return the features.
+
+        Args:
+            transactions_df (pd.DataFrame): All transactions known so far
+            dropna (bool): See features()
+
+        Returns:
+            pd.DataFrame: Daily features for the current data version
+        """
+        version = data_version(transactions_df, self.date_col, self.value_col)
+        state = self._load()
+        if state is not None and state['version'] == version:
+            return self.features(dropna)
+
+        dates = pd.to_datetime(transactions_df[self.date_col])
+        if state is not None and len(state['daily']):
+            open_day = state['daily']['date'].iloc[-1]
+            closed = (dates < open_day).to_numpy()
+            if data_version(transactions_df[closed], self.date_col, self.value_col) == state['closed_version']:
+                self._append(transactions_df[~closed], state, version)
+                return self.features(dropna)
+            logger.info(f"History before {open_day:%Y-%m-%d} changed; rebuilding feature store '{self.name}'")
+
+        self._rebuild(transactions_df, version)
+        return self.features(dropna)
+
+    def clear(self):
+        """Delete the stored frame."""
+        self._state = None
+        if self.file.exists():
+            self.file.unlink()
+
+    def _append(self, new_rows: pd.DataFrame, state: dict, version: str):
+        stored = state['daily']
+        history = stored.iloc[:-1]
+        new_days = aggregate_daily(new_rows, self.date_col, self.value_col)
+        tail = history[['date', 'revenue', 'transactions', 'avg_value']].tail(LOOKBACK_DAYS)
+
+        extended = add_time_series_features(pd.concat([tail, new_days], ignore_index=True))
+        daily = pd.concat([history, extended.iloc[len(tail):]], ignore_index=True)
+        self._save(daily, version, new_rows, daily['date'].iloc[-1], state['closed_version'])
+        logger.info(f"Feature store '{self.name}': appended {len(new_days):,} day(s) ({len(daily):,} total)")
+
+    def _rebuild(self, transactions_df: pd.DataFrame, version: str):
+        daily = add_time_series_features(aggregate_daily(transactions_df, self.date_col, self.value_col))
+        self._save(daily, version, transactions_df, daily['date'].iloc[-1] if len(daily) else None, None)
+        logger.info(f"Feature store '{self.name}': built {len(daily):,} days")
+
+    def _save(self, daily: pd.DataFrame, version: str, rows: pd.DataFrame, open_day, closed_version):
+        """
+        Persist atomically.
+
+        closed_version fingerprints every row before the open day: the previous
+        closed rows (closed_version, None on rebuild) plus the rows of ``rows``
+        that now fall before the new open day.
+        """
+        if open_day is not None:
+            dates = pd.to_datetime(rows[self.date_col])
+            newly_closed = data_version(rows[(dates < open_day).to_numpy()], self.date_col, self.value_col)
+            closed_version = newly_closed if closed_version is None else _combine_versions(closed_version, newly_closed)
+
+        state = {'version': version, 'closed_version': closed_version, 'daily': daily}
+        self.path.mkdir(parents=True, exist_ok=True)
+        temp = self.file.with_suffix('.tmp')
+        with open(temp, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, self.file)
+        self._state = state
+
+    def _load(self) -> Optional[dict]:
+        if self._state is None and self.file.exists():
+            with open(self.file, 'rb') as f:
+                self._state = pickle.load(f)
+        return self._state
+
+
+def _combine_versions(*versions: str) -> str:
+    """Version of the union of disjoint row sets (counts and hash sums add)."""
+    rows, total = 0, 0
+    for version in versions:
+        count, digest = version.split('-')
+        rows += int(count)
+        total = (total + int(digest, 16)) % 2 ** 64
+    return f"{rows}-{total:016x}"
+
+
+if __name__ == "__main__":
+    transactions = pd.read_csv('data/raw/transactions.csv', parse_dates=['transaction_date'])
+    store = ForecastFeatureStore()
+    features = store.refresh(transactions)
+    print(f"[OK] Feature store '{store.name}' at version {store.version}: {len(features):,} days")
@@ -11,12 +11,16 @@ Functions:
     compute_sales_growth: Calculate period-over-period growth
     compute_all_kpis: Batch compute all standard KPIs
     compute_rfm: Perform RFM segmentation analysis
+    compute_percentile_kpis: Median/P90/P99 from a mergeable quantile sketch
+    compute_segment_percentiles: Sketch-based percentiles per segment
 """
 import pandas as pd
 import numpy as np
-from typing import Optional, Dict
+from typing import Optional, Dict, Sequence
 import logging
 
+from src.features.sketches import DEFAULT_K, KLLSketch
+
 logger = logging.getLogger(__name__)
 
 def compute_aov(df: pd.DataFrame) -> float:
@@ -94,9 +98,75 @@ def compute_rfm(df: pd.DataFrame, reference_date=None) -> pd.DataFrame:
     
     return rfm
 
+PERCENTILE_KPIS = {'median': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+def _order_values(df: pd.DataFrame, value_col: str = 'revenue', order_col: Optional[str] = 'order_id') -> np.ndarray:
+    """Order values (line values summed per order when an order column is present)"""
+    if order_col is not None and order_col in df.columns:
+        return df.groupby(order_col, sort=False)[value_col].sum().to_numpy(dtype=np.float64)
+    return df[value_col].to_numpy(dtype=np.float64)
+
+def compute_percentile_kpis(source, value_col: str = 'revenue', order_col: Optional[str] = 'order_id',
+                            prefix: str = 'order_value', sketch_k: int = DEFAULT_K) -> Dict[str, float]:
+    """
+    Compute median/P90/P99 KPIs from a quantile sketch.
+    
+    Args:
+        source: Order-level DataFrame, or a KLLSketch already merged from rollup rows
+        value_col (str): Monetary column when ``source`` is a DataFrame
+        order_col (str, optional): Order identifier used to sum multi-line orders
+        prefix (str): KPI name prefix, e.g. 'order_value' or 'deal_size'
+        sketch_k (int): Sketch accuracy parameter when building from a DataFrame
+    
+    Returns:
+        dict: {'<prefix>_median': ..., '<prefix>_p90': ..., '<prefix>_p99': ...}
+    """
+    if isinstance(source, KLLSketch):
+        sketch = source
+    else:
+        sketch = KLLSketch(sketch_k).update(_order_values(source, value_col, order_col))
+    
+    if sketch.n == 0:
+        return {f'{prefix}_{name}': 0.0 for name in PERCENTILE_KPIS}
+    values = sketch.quantile(list(PERCENTILE_KPIS.values()))
+    return {f'{prefix}_{name}': float(value) for name, value in zip(PERCENTILE_KPIS, values)}
+
+def compute_segment_percentiles(df: pd.DataFrame, segment_col: str, value_col: str = 'revenue',
+                                order_col: Optional[str] = 'order_id',
+                                quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+                                sketch_k: int = DEFAULT_K) -> pd.DataFrame:
+    """
+    Sketch-based order value (or deal size) percentiles per segment.
+    
+    Args:
+        df (pd.DataFrame): Order or opportunity records
+        segment_col (str): Segment column (e.g. 'region', 'company_size')
+        value_col (str): Monetary column ('revenue' for orders, 'amount' for deals)
+        order_col (str, optional): Order identifier; None treats each row as one order
+        quantiles: Quantiles to report
+        sketch_k (int): Sketch accuracy parameter
+    
+    Returns:
+        pd.DataFrame: One row per segment with count and a column per quantile
+    """
+    if order_col is not None and order_col in df.columns:
+        values = df.groupby([segment_col, order_col], sort=False)[value_col].sum().reset_index()
+    else:
+        values = df[[segment_col, value_col]]
+    
+    rows = []
+    for segment, group in values.groupby(segment_col, sort=True):
+        sketch = KLLSketch(sketch_k).update(group[value_col].to_numpy())
+        estimates = sketch.quantile(list(quantiles))
+        row = {segment_col: segment, 'count': sketch.n}
+        row.update({f'p{int(round(q * 100))}': float(v) for q, v in zip(quantiles, estimates)})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
 if __name__ == "__main__":
     df = pd.read_csv('data/processed/sales_transformed.csv', parse_dates=['date'])
     kpis = compute_all_kpis(df)
+    kpis.update(compute_percentile_kpis(df))
     print("KPIs:")
     for key, value in kpis.items():
         print(f"  {key}: {value:,.2f}")
@@ -0,0 +1,266 @@
+"""
+Streaming top-K heavy-hitter tracking.
+
+This module implements the weighted Space-Saving summary. A summary with
+capacity ``m`` tracks at most ``m`` keys (products, customers) and their
+revenue; every reported count overestimates the true count by at most its
+recorded error, and every error is bounded by ``total / m``. Any key whose
+true share of the total exceeds ``1 / m`` is guaranteed to be tracked.
+
+Summaries are mergeable: per-partition summaries (one per day, region and
+channel in the rollup table) and the live event-stream summaries are combined
+for an arbitrary filter in a single vectorized pass, without rescanning orders.
+
+Classes:
+    SpaceSaving: Weighted Space-Saving heavy-hitter summary
+
+Functions:
+    merge_summaries: Vectorized merge of many summaries
+"""
+from typing import Hashable, Iterable, Optional
+import heapq
+import pickle
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CAPACITY = 100
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary.
+
+    Single-event updates cost O(log m) (lazy min-heap); batch updates are
+    pre-aggregated with pandas and merged in one step.
+
+    Usage:
+        top_products = SpaceSaving(capacity=200)
+        top_products.update('PROD017', 1250.76)
+        top_products.top(10)
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("Space-Saving capacity must be positive")
+        self.capacity = capacity
+        self.total = 0.0
+        self._counts = {}
+        self._errors = {}
+        self._heap = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._counts
+
+    def __repr__(self) -> str:
+        return f"SpaceSaving(capacity={self.capacity}, tracked={len(self)}, total={self.total:,.2f})"
+
+    @property
+    def is_full(self) -> bool:
+        return len(self._counts) >= self.capacity
+
+    @property
+    def min_count(self) -> float:
+        """Smallest tracked count; an upper bound for any untracked key once full."""
+        if not self.is_full:
+            return 0.0
+        return self._peek_min()[0]
+
+    @property
+    def error_bound(self) -> float:
+        """Worst-case overestimate of any reported count (total / capacity)."""
+        return self.total / self.capacity
+
+    def update(self, key: Hashable, weight: float = 1.0) -> 'SpaceSaving':
+        """
+        Add one weighted occurrence of ``key``.
+
+        Args:
+            key: Item identifier
+            weight (float): Non-negative weight (e.g. revenue); 1 counts events
+
+        Returns:
+            SpaceSaving: self, to allow chaining
+        """
+        if weight < 0:
+            raise ValueError("Space-Saving weights must be non-negative")
+        self.total += weight
+        if key in self._counts:
+            self._counts[key] += weight
+        elif not self.is_full:
+            self._counts[key] = weight
+            self._errors[key] = 0.0
+        else:
+            floor, evicted = self._peek_min()
+            heapq.heappop(self._heap)
+            del self._counts[evicted], self._errors[evicted]
+            self._counts[key] = floor + weight
+            self._errors[key] = floor
+        heapq.heappush(self._heap, (self._counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, k) for k, count in self._counts.items()]
+            heapq.heapify(self._heap)
+        return self
+
+    def update_batch(self, keys: Iterable[Hashable], weights: Optional[Iterable[float]] = None) -> 'SpaceSaving':
+        """
+        Add a batch of occurrences.
+
+        The batch is aggregated exactly, truncated to the top ``capacity`` keys
+        and merged, which is equivalent to (and far cheaper than) per-event updates.
+
+        Args:
+            keys: Item identifiers
+            weights: Weights aligned with ``keys`` (default: 1 each)
+
+        Returns:
+            SpaceSaving: self, to allow chaining
+        """
+        keys = pd.Series(np.asarray(keys))
+        weights = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if len(keys) == 0:
+            return self
+        batch = pd.Series(weights).groupby(keys.to_numpy(), sort=False).sum()
+        merged = merge_summaries([self, SpaceSaving.from_counts(batch, self.capacity)], self.capacity)
+        self._load(merged)
+        return self
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Merge another summary into this one."""
+        self._load(merge_summaries([self, other], self.capacity))
+        return self
+
+    def estimate(self, key: Hashable) -> float:
+        """Upper-bound estimate of the count of ``key``."""
+        return self._counts.get(key, self.min_count)
+
+    def top(self, k: int = 10) -> pd.DataFrame:
+        """
+        Top-k keys by estimated count.
+
+        Returns:
+            pd.DataFrame: key, count (upper bound), error, lower_bound and a
+                'guaranteed' flag marking keys certain to belong to the true top-k
+        """
+        frame = self.to_frame().head(k + 1)
+        if frame.empty:
+            return frame.assign(lower_bound=[], guaranteed=[])
+        frame['lower_bound'] = frame['count'] - frame['error']
+        next_count = frame['count'].iloc[k] if len(frame) > k else self.min_count
+        frame['guaranteed'] = frame['lower_bound'] >= next_count
+        return frame.head(k).reset_index(drop=True)
+
+    def to_frame(self) -> pd.DataFrame:
+        """All tracked keys sorted by estimated count."""
+        frame = pd.DataFrame({
+            'key': list(self._counts.keys()),
+            'count': np.fromiter(self._counts.values(), dtype=np.float64, count=len(self._counts)),
+            'error': np.fromiter(self._errors.values(), dtype=np.float64, count=len(self._errors)),
+        })
+        return frame.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the summary for storage in rollup tables."""
+        return pickle.dumps((self.capacity, self.total, self._counts, self._errors))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SpaceSaving':
+        """Deserialize a summary produced by ``to_bytes``."""
+        capacity, total, counts, errors = pickle.loads(data)
+        summary = cls(capacity)
+        summary.total = total
+        summary._counts, summary._errors = counts, errors
+        summary._rebuild_heap()
+        return summary
+
+    @classmethod
+    def from_counts(cls, counts: pd.Series, capacity: int = DEFAULT_CAPACITY,
+                    errors: Optional[pd.Series] = None, total: Optional[float] = None) -> 'SpaceSaving':
+        """
+        Build a summary from (possibly exact) per-key counts.
+
+        Only the ``capacity`` largest keys are kept; dropped keys are covered by
+        the summary's minimum count, so the Space-Saving guarantee holds.
+        """
+        summary = cls(capacity)
+        summary.total = float(counts.sum()) if total is None else float(total)
+        kept = counts.nlargest(capacity)
+        summary._counts = dict(zip(kept.index, kept.to_numpy(dtype=np.float64).tolist()))
+        if errors is None:
+            summary._errors = dict.fromkeys(summary._counts, 0.0)
+        else:
+            summary._errors = dict(zip(kept.index, errors.loc[kept.index].to_numpy(dtype=np.float64).tolist()))
+        summary._rebuild_heap()
+        return summary
+
+    @classmethod
+    def from_arrays(cls, keys: np.ndarray, counts: np.ndarray, capacity: int = DEFAULT_CAPACITY,
+                    total: Optional[float] = None) -> 'SpaceSaving':
+        """Build a summary from exact counts of distinct keys (no pandas overhead)."""
+        counts = np.asarray(counts, dtype=np.float64)
+        summary = cls(capacity)
+        summary.total = float(counts.sum()) if total is None else float(total)
+        if len(counts) > capacity:
+            kept = np.argpartition(-counts, capacity - 1)[:capacity]
+            keys, counts = np.asarray(keys)[kept], counts[kept]
+        summary._counts = dict(zip(np.asarray(keys).tolist(), counts.tolist()))
+        summary._errors = dict.fromkeys(summary._counts, 0.0)
+        summary._rebuild_heap()
+        return summary
+
+    def _peek_min(self):
+        while self._heap:
+            count, key = self._heap[0]
+            if self._counts.get(key) == count:
+                return count, key
+            heapq.heappop(self._heap)
+        raise IndexError("empty Space-Saving summary")
+
+    def _rebuild_heap(self):
+        self._heap = [(count, key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def _load(self, other: 'SpaceSaving'):
+        self.total = other.total
+        self._counts, self._errors = other._counts, other._errors
+        self._rebuild_heap()
+
+
+def merge_summaries(summaries: Iterable[SpaceSaving], capacity: int = DEFAULT_CAPACITY) -> SpaceSaving:
+    """
+    Merge many Space-Saving summaries in one vectorized pass.
+
+    A key missing from a full summary may still have occurred there up to that
+    summary's minimum count, so that minimum is added to the key's count and
+    error. The merged counts remain upper bounds with error <= total / capacity.
+
+    Args:
+        summaries: Iterable of SpaceSaving summaries (None entries are skipped)
+        capacity (int): Capacity of the merged summary
+
+    Returns:
+        SpaceSaving: Summary over the union of all inputs
+    """
+    keys, counts, errors, floors = [], [], [], []
+    total = 0.0
+    for summary in summaries:
+        if summary is None or len(summary) == 0:
+            continue
+        floor = summary.min_count
+        total += summary.total
+        keys.extend(summary._counts.keys())
+        counts.append(np.fromiter(summary._counts.values(), dtype=np.float64, count=len(summary)))
+        errors.append(np.fromiter(summary._errors.values(), dtype=np.float64, count=len(summary)))
+        floors.append(np.full(len(summary), floor))
+
+    if not keys:
+        return SpaceSaving(capacity)
+
+    floors_total = sum(f[0] for f in floors)
+    counts, errors, floors = np.concatenate(counts), np.concatenate(errors), np.concatenate(floors)
+    frame = pd.DataFrame({'count': counts - floors, 'error': errors - floors}, index=pd.Index(keys))
+    combined = frame.groupby(level=0, sort=False).sum() + floors_total
+    return SpaceSaving.from_counts(combined['count'], capacity, combined['error'], total)
@@ -0,0 +1,218 @@
+"""
+Mergeable quantile sketches.
+
+This module implements a KLL (Karnin-Lang-Liberty) quantile sketch with numpy
+batch updates. A sketch summarizes a stream of values in O(k log(n/k)) memory,
+and sketches built over disjoint partitions (e.g. one per day and region) can be
+merged into a sketch of their union with the same error guarantee. This makes
+percentile KPIs roll up the same way sums and counts do.
+
+With the default ``k=200`` the normalized rank error is about 1.3% (99%
+confidence): a reported median lies between the true 48.7th and 51.3rd
+percentiles. Sketches holding fewer than ``k`` values are exact.
+
+Classes:
+    KLLSketch: Mergeable quantile sketch
+
+Functions:
+    merge_sketches: Merge an iterable of sketches into a new sketch
+"""
+from typing import Iterable, Optional, Union
+import struct
+
+import numpy as np
+
+DEFAULT_K = 200
+
+_HEADER = struct.Struct('<iiqdd')
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch.
+
+    Values are kept in a hierarchy of compactors; an item at level h stands for
+    2**h original values. When a level exceeds its capacity it is sorted and
+    every other item (random offset) is promoted to the level above.
+
+    Usage:
+        sketch = KLLSketch()
+        sketch.update(order_values)
+        sketch.merge(other_partition_sketch)
+        median, p90, p99 = sketch.quantile([0.5, 0.9, 0.99])
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("KLL sketch parameter k must be at least 8")
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __repr__(self) -> str:
+        return f"KLLSketch(k={self.k}, n={self.n}, retained={self.retained})"
+
+    @property
+    def retained(self) -> int:
+        """Number of values physically stored in the sketch."""
+        return int(sum(len(level) for level in self._levels))
+
+    @property
+    def is_exact(self) -> bool:
+        """True while no compaction has happened (all values retained)."""
+        return len(self._levels) == 1
+
+    def update(self, values: Union[float, Iterable[float], np.ndarray]) -> 'KLLSketch':
+        """
+        Add one value or a batch of values.
+
+        Args:
+            values: Scalar or array-like of numeric values (NaNs are ignored)
+
+        Returns:
+            KLLSketch: self, to allow chaining
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other (KLLSketch): Sketch over a disjoint set of values
+
+        Returns:
+            KLLSketch: self, to allow chaining
+        """
+        if other.n == 0:
+            return self
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for height, level in enumerate(other._levels):
+            self._levels[height] = np.concatenate([self._levels[height], level])
+
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantile(self, q: Union[float, Iterable[float]]) -> Union[float, np.ndarray]:
+        """
+        Estimate one or more quantiles.
+
+        Args:
+            q: Quantile(s) in [0, 1]
+
+        Returns:
+            float or np.ndarray: Estimated value(s); NaN for an empty sketch
+        """
+        scalar = np.isscalar(q)
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if np.any((q < 0) | (q > 1)):
+            raise ValueError("Quantiles must be between 0 and 1")
+        if self.n == 0:
+            result = np.full(len(q), np.nan)
+            return float(result[0]) if scalar else result
+
+        values, weights = self._weighted_items()
+        cumulative = np.cumsum(weights)
+        positions = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        result = values[np.clip(positions, 0, len(values) - 1)]
+        result[q == 0] = self.min
+        result[q == 1] = self.max
+        return float(result[0]) if scalar else result
+
+    def rank(self, value: float) -> float:
+        """Estimate the fraction of values less than or equal to ``value``."""
+        if self.n == 0:
+            return float('nan')
+        values, weights = self._weighted_items()
+        return float(weights[values <= value].sum() / weights.sum())
+
+    def to_bytes(self) -> bytes:
+        """Serialize the sketch for storage in rollup tables."""
+        sizes = np.array([len(level) for level in self._levels], dtype=np.int64)
+        payload = [_HEADER.pack(self.k, len(self._levels), self.n, self.min, self.max), sizes.tobytes()]
+        payload.extend(level.astype(np.float64).tobytes() for level in self._levels)
+        return b''.join(payload)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'KLLSketch':
+        """Deserialize a sketch produced by ``to_bytes``."""
+        k, n_levels, n, min_value, max_value = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+        sizes = np.frombuffer(data, dtype=np.int64, count=n_levels, offset=offset)
+        offset += sizes.nbytes
+
+        sketch = cls(k)
+        sketch.n, sketch.min, sketch.max = n, min_value, max_value
+        sketch._levels = []
+        for size in sizes:
+            sketch._levels.append(np.frombuffer(data, dtype=np.float64, count=int(size), offset=offset).copy())
+            offset += int(size) * 8
+        return sketch
+
+    def _capacity(self, height: int) -> int:
+        """Capacity of a level; lower levels shrink geometrically (factor 2/3)."""
+        depth = len(self._levels) - height - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        while self.retained > sum(self._capacity(h) for h in range(len(self._levels))):
+            for height, level in enumerate(self._levels):
+                if len(level) >= self._capacity(height):
+                    break
+            if height + 1 == len(self._levels):
+                self._levels.append(np.empty(0, dtype=np.float64))
+
+            level = np.sort(self._levels[height])
+            if len(level) % 2:
+                keep, level = level[:1], level[1:]
+            else:
+                keep = level[:0]
+            promoted = level[int(self._rng.integers(2))::2]
+            self._levels[height] = keep
+            self._levels[height + 1] = np.concatenate([self._levels[height + 1], promoted])
+
+    def _weighted_items(self):
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([
+            np.full(len(level), 2.0 ** height) for height, level in enumerate(self._levels)
+        ])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+
+def merge_sketches(sketches: Iterable[KLLSketch], k: int = DEFAULT_K) -> KLLSketch:
+    """
+    Merge sketches (e.g. the rows of a filtered rollup table) into a new sketch.
+
+    Args:
+        sketches: Iterable of KLLSketch instances; None entries are skipped
+        k (int): Parameter of the resulting sketch
+
+    Returns:
+        KLLSketch: Sketch over the union of all inputs
+    """
+    merged = KLLSketch(k)
+    for sketch in sketches:
+        if sketch is not None:
+            merged.merge(sketch)
+    return merged
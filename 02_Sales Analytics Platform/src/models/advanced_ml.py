@@ -4,105 +4,533 @@ Enterprise-grade predictive analytics
 """
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.linear_model import Ridge
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingRegressor, RandomForestClassifier,
+    HistGradientBoostingRegressor, HistGradientBoostingClassifier
+)
+from sklearn.inspection import permutation_importance
+from sklearn.linear_model import Ridge, LogisticRegression
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
-import joblib
-from datetime import datetime, timedelta
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
+from sklearn.metrics import get_scorer
+from sklearn.base import clone
+from scipy.stats import loguniform
+from joblib import Parallel, delayed, effective_n_jobs
+from datetime import timedelta
+import copy
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+from src.config import config
+from src.features.feature_store import (
+    CALENDAR_FEATURES, aggregate_daily, add_time_series_features, calendar_features, data_version
+)
+from src.features.churn_store import latest_activity_date
+from src.models.registry import ModelRegistry, RegistryMapping
+from src.models.hierarchical import HierarchicalForecaster
+from src.models.churn_scoring import (
+    CHURN_FEATURES, BatchChurnScorer, build_churn_features, interaction_aggregates,
+    score_churn_features, transaction_aggregates
+)
+from src.models.online_churn import OnlineChurnModel
+from src.models.tuning import SuccessiveHalvingSearch
+
+FORECAST_METHODS = ('recursive', 'direct')
+
+# Registry model behind each forecast method
+FORECAST_MODELS = {'recursive': 'revenue_forecaster', 'direct': 'revenue_forecaster_direct'}
+
+# Probability levels at which residual distributions are stored for interval forecasts
+# (percentiles plus 0.5%/99.5%, the tails of a 99% interval)
+RESIDUAL_LEVELS = np.concatenate(([0.005], np.round(np.linspace(0.01, 0.99, 99), 2), [0.995]))
+
+# Levels of tables stored before the 0.5%/99.5% tails were added
+LEGACY_RESIDUAL_LEVELS = RESIDUAL_LEVELS[1:-1]
+
+# Holdout replay used to calibrate interval forecasts: forecast origins and days ahead per origin
+CALIBRATION_ORIGINS = 12
+CALIBRATION_HORIZON = 30
+
+def residual_quantile_table(residuals, horizons=None, n_buckets=12, scaling=None):
+    """
+    Empirical residual quantiles per horizon bucket (stored in model metadata).
+    
+    Args:
+        residuals: Held-out actual - predicted values
+        horizons: Forecast horizon of each residual (None: one bucket for all)
+        n_buckets (int): Horizon buckets with roughly equal residual counts
+        scaling (str): How apply_residual_quantiles widens the residuals with
+            the horizon (None when they were measured per horizon)
+    
+    Returns:
+        dict: JSON-serializable 'horizon_edges' (upper edge of each bucket),
+            'levels' (RESIDUAL_LEVELS), 'quantiles' (one row of quantiles at
+            those levels per bucket) and 'scaling'
+    """
+    residuals = np.asarray(residuals, dtype=float)
+    if horizons is None:
+        return {'horizon_edges': [np.inf], 'levels': RESIDUAL_LEVELS.tolist(),
+                'quantiles': [np.quantile(residuals, RESIDUAL_LEVELS).tolist()], 'scaling': scaling}
+    
+    horizons = np.asarray(horizons, dtype=float)
+    edges = np.unique(np.quantile(horizons, np.linspace(0, 1, n_buckets + 1)[1:], method='higher'))
+    edges[-1] = np.inf
+    buckets = np.searchsorted(edges, horizons)
+    quantiles = [np.quantile(residuals[buckets == b], RESIDUAL_LEVELS).tolist() for b in range(len(edges))]
+    return {'horizon_edges': edges.tolist(), 'levels': RESIDUAL_LEVELS.tolist(), 'quantiles': quantiles,
+            'scaling': scaling}
+
+def apply_residual_quantiles(point, horizons, table, quantiles, scaling=None):
+    """
+    Quantile forecasts from a point forecast and a residual quantile table.
+    
+    Fully vectorized: every requested quantile of every horizon is one
+    interpolation into the table, so P10/P50/P90 cost no extra model passes.
+    
+    Args:
+        point: Point forecast per day
+        horizons: Horizon (days ahead) of each point
+        table (dict): Output of residual_quantile_table
+        quantiles: Probability levels in (0, 1)
+        scaling (str): 'sqrt' widens one-step residuals by sqrt(horizon)
+    
+    Returns:
+        np.ndarray: (n_days, n_quantiles), non-negative and non-decreasing across quantiles
+    """
+    point = np.asarray(point, dtype=float)
+    horizons = np.asarray(horizons, dtype=float)
+    quantiles = np.asarray(quantiles, dtype=float)
+    grid = np.asarray(table.get('levels', LEGACY_RESIDUAL_LEVELS), dtype=float)
+    levels = np.clip(quantiles, grid[0], grid[-1])
+    
+    # Linear interpolation of each bucket's quantile curve at the requested levels
+    stored = np.asarray(table['quantiles'], dtype=float)
+    upper = np.clip(np.searchsorted(grid, levels), 1, len(grid) - 1)
+    weight = (levels - grid[upper - 1]) / (grid[upper] - grid[upper - 1])
+    offsets = stored[:, upper - 1] * (1 - weight) + stored[:, upper] * weight
+    
+    buckets = np.minimum(np.searchsorted(np.asarray(table['horizon_edges'], dtype=float), horizons),
+                         len(stored) - 1)
+    scale = np.sqrt(horizons)[:, None] if scaling == 'sqrt' else 1.0
+    bounds = point[:, None] + offsets[buckets] * scale
+    return np.maximum.accumulate(np.maximum(bounds, 0), axis=1)
+
+def quantile_column(q):
+    """Column name of a quantile forecast, e.g. 0.1 -> 'p10'"""
+    return f"p{q * 100:g}"
+
+def revenue_candidates(large_data=False):
+    """
+    Default candidate estimators for revenue model selection.
+    
+    Returns a fresh dict of unfitted estimators; add entries (or pass your own
+    dict to train_revenue_forecaster) to extend the search. With large_data=True
+    the tree ensembles are replaced by histogram-based gradient boosting, whose
+    fit time grows with the number of bins rather than distinct feature values.
+    """
+    if large_data:
+        return {
+            'hist_gradient_boosting': HistGradientBoostingRegressor(max_iter=config.ml.n_estimators,
+                                                                    random_state=config.ml.random_state),
+            'ridge': Ridge(alpha=1.0)
+        }
+    return {
+        'random_forest': RandomForestRegressor(n_estimators=config.ml.n_estimators, max_depth=config.ml.max_depth,
+                                               random_state=config.ml.random_state),
+        'gradient_boosting': GradientBoostingRegressor(n_estimators=config.ml.n_estimators, max_depth=5,
+                                                       random_state=config.ml.random_state),
+        'ridge': Ridge(alpha=1.0)
+    }
+
+def revenue_search_spaces():
+    """
+    Estimator families and hyperparameter distributions for tune_revenue_forecaster.
+    
+    Ridge has no n_estimators, so drop it when tuning with resource='n_estimators'.
+    """
+    return {
+        'random_forest': (RandomForestRegressor(n_estimators=config.ml.n_estimators,
+                                                random_state=config.ml.random_state), {
+            'max_depth': [5, 10, 20, None],
+            'min_samples_leaf': [1, 2, 5, 10],
+            'max_features': [1.0, 0.5, 'sqrt'],
+        }),
+        'gradient_boosting': (GradientBoostingRegressor(n_estimators=config.ml.n_estimators,
+                                                        random_state=config.ml.random_state), {
+            'learning_rate': loguniform(0.01, 0.3),
+            'max_depth': [2, 3, 5],
+            'subsample': [0.7, 0.85, 1.0],
+            'min_samples_leaf': [1, 5, 20],
+        }),
+        'ridge': (Ridge(), {'alpha': loguniform(1e-3, 1e3)})
+    }
+
+def churn_search_spaces():
+    """Estimator families and hyperparameter distributions for tune_churn_model"""
+    return {
+        'random_forest': (RandomForestClassifier(n_estimators=100, class_weight='balanced',
+                                                 random_state=config.ml.random_state), {
+            'max_depth': [5, 10, 20, None],
+            'min_samples_leaf': [1, 2, 5, 10],
+            'max_features': [1.0, 0.5, 'sqrt'],
+        }),
+        'logistic_regression': (LogisticRegression(class_weight='balanced', max_iter=1000), {
+            'C': loguniform(1e-3, 1e2)
+        })
+    }
+
+def stratified_subsample(strata, max_rows, random_state=None):
+    """
+    Positions of a random subsample of at most max_rows rows, stratified by strata.
+    
+    Each stratum keeps its share of the rows (at least one row), so class
+    balance or seasonal coverage survives the subsample. Positions are returned
+    sorted, which preserves time order.
+    """
+    strata = pd.Series(np.asarray(strata))
+    if len(strata) <= max_rows:
+        return np.arange(len(strata))
+    rng = np.random.default_rng(config.ml.random_state if random_state is None else random_state)
+    shuffled = strata.iloc[rng.permutation(len(strata))]
+    quota = np.maximum(1, np.floor(shuffled.map(shuffled.value_counts()) * max_rows / len(strata)))
+    keep = shuffled.groupby(shuffled, sort=False).cumcount() < quota
+    return np.sort(shuffled.index[keep.to_numpy()].to_numpy())
+
+def benchmark_estimators(estimators, X, y, test_size=0.2, scoring=None, shuffle=False, X_test=None, y_test=None):
+    """
+    Fit time, predict time, memory and held-out score of estimators on one split.
+    
+    Args:
+        estimators (dict): name -> (unfitted estimator, feature dtype, max training rows or None)
+        X: Feature matrix
+        y: Target
+        scoring (str): sklearn scorer name (default: the estimator's own score)
+        shuffle (bool): Shuffle before splitting (stratified for classification)
+        X_test, y_test: Explicit held-out set; X and y are then used for training
+            only (needed when X is augmented, e.g. replicated, after splitting)
+    
+    Returns:
+        pd.DataFrame: One row per estimator
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    stratify = y if shuffle and scoring in ('roc_auc', 'accuracy', 'f1') else None
+    if X_test is None:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, shuffle=shuffle,
+                                                            stratify=stratify, random_state=config.ml.random_state)
+    else:
+        X_train, y_train = X, y
+        X_test, y_test = np.asarray(X_test, dtype=np.float64), np.asarray(y_test)
+    scorer = get_scorer(scoring) if scoring else None
+    rows = []
+    for name, (estimator, dtype, max_rows) in estimators.items():
+        keep = np.arange(len(X_train)) if max_rows is None else \
+            stratified_subsample(y_train if stratify is not None else np.zeros(len(y_train)), max_rows)
+        X_fit, X_eval = X_train[keep].astype(dtype), X_test.astype(dtype)
+        scaler = StandardScaler()
+        X_fit = scaler.fit_transform(X_fit)
+        X_eval = scaler.transform(X_eval)
+        estimator = clone(estimator)
+        
+        start = time.perf_counter()
+        estimator.fit(X_fit, y_train[keep])
+        fit_time = time.perf_counter() - start
+        start = time.perf_counter()
+        score = scorer(estimator, X_eval, y_test) if scorer else estimator.score(X_eval, y_test)
+        rows.append({
+            'model': name,
+            'dtype': np.dtype(dtype).name,
+            'train_rows': len(keep),
+            'matrix_mb': X_fit.nbytes / 1e6,
+            'fit_time': fit_time,
+            'score_time': time.perf_counter() - start,
+            'score': score
+        })
+    return pd.DataFrame(rows)
+
+def ensemble_size(model):
+    """Number of trees/boosting stages in a fitted ensemble (None for other models)"""
+    if isinstance(model, (RandomForestRegressor, RandomForestClassifier)):
+        return len(model.estimators_)
+    if isinstance(model, GradientBoostingRegressor):
+        return model.n_estimators_
+    if isinstance(model, (HistGradientBoostingRegressor, HistGradientBoostingClassifier)):
+        return model.n_iter_
+    return None
+
+def extend_ensemble(model, X_new, y_new, n_new_estimators, max_estimators):
+    """
+    Copy of a fitted tree ensemble with extra trees fitted on new data only.
+    
+    Random forests get n_new_estimators bagged trees on the new rows and drop
+    their oldest trees beyond max_estimators, so the forest slides towards
+    recent data. Boosted ensembles continue boosting from their current
+    predictions; their early stages cannot be dropped, so an ensemble that
+    would grow past max_estimators is not extended.
+    
+    Returns:
+        tuple: (extended model, trees added, trees dropped), or None when the
+        model cannot be warm-started and needs a full refit
+    """
+    size = ensemble_size(model)
+    if size is None:
+        return None
+    boosted = not isinstance(model, (RandomForestRegressor, RandomForestClassifier))
+    if boosted and size + n_new_estimators > max_estimators:
+        return None
+    
+    model = copy.deepcopy(model)
+    param = 'max_iter' if isinstance(model, (HistGradientBoostingRegressor, HistGradientBoostingClassifier)) \
+        else 'n_estimators'
+    model.set_params(warm_start=True, **{param: size + n_new_estimators})
+    model.fit(X_new, y_new)
+    added = ensemble_size(model) - size
+    
+    dropped = 0
+    if not boosted and len(model.estimators_) > max_estimators:
+        dropped = len(model.estimators_) - max_estimators
+        model.estimators_ = model.estimators_[dropped:]
+    model.set_params(warm_start=False, **{param: ensemble_size(model)})
+    return model, added, dropped
+
+def _split_worker_budget(n_tasks, n_jobs=None):
+    """
+    Split a worker budget between concurrent tasks and the estimators inside them.
+    
+    Returns (outer, inner): number of tasks run at once and threads each
+    estimator with an n_jobs parameter may use, so outer * inner stays within
+    the budget instead of oversubscribing the machine.
+    """
+    budget = effective_n_jobs(config.ml.n_jobs if n_jobs is None else n_jobs)
+    outer = max(1, min(n_tasks, budget))
+    return outer, max(1, budget // outer)
+
+def _with_inner_jobs(estimator, inner_jobs):
+    """Unfitted copy of an estimator limited to inner_jobs threads where supported"""
+    estimator = clone(estimator)
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=inner_jobs)
+    return estimator
+
+def _fit_and_score(name, estimator, X_train, y_train, X_test, y_test):
+    """Fit one candidate and score it on held-out data (runs inside a worker)"""
+    start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    score = estimator.score(X_test, y_test)
+    return name, estimator, score, time.perf_counter() - start
+
+def _fit_and_score_fold(name, fold, estimator, X, y, train_idx, test_idx, scoring=None):
+    """Scale, fit and score one candidate on one rolling-origin fold (runs inside a worker)"""
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+    estimator.fit(X_train, y[train_idx])
+    fit_time = time.perf_counter() - start
+    if scoring is None:
+        score = estimator.score(X_test, y[test_idx])
+    else:
+        try:
+            score = get_scorer(scoring)(estimator, X_test, y[test_idx])
+        except ValueError:
+            # e.g. ROC AUC on a fold whose validation block holds a single class
+            score = np.nan
+    return {
+        'model': name,
+        'fold': fold,
+        'train_size': len(train_idx),
+        'test_size': len(test_idx),
+        'score': score,
+        'fit_time': fit_time,
+        'total_time': time.perf_counter() - start
+    }
+
+def time_series_cross_validate(candidates, X, y, n_folds=None, scoring=None, n_jobs=None):
+    """
+    Rolling-origin cross-validation of one or more candidate estimators.
+    
+    Rows must be in time order. Each fold trains on everything before its
+    origin and validates on the block that follows (expanding window), with the
+    scaler fitted on the training block only. All candidate x fold fits run in
+    one parallel pool, so adding folds does not multiply wall time while cores
+    are free.
+    
+    Args:
+        candidates (dict): name -> unfitted estimator
+        X: Feature matrix in time order
+        y: Target in time order
+        n_folds (int): Number of folds (default: config.ml.cross_validation_folds)
+        scoring (str): sklearn scorer name (default: the estimator's own score)
+        n_jobs (int): Worker budget (default: config.ml.n_jobs)
+    
+    Returns:
+        pd.DataFrame: One row per model and fold with sizes, score and timings
+    """
+    X = np.asarray(X)
+    X = X if X.dtype == np.float32 else X.astype(float)
+    y = np.asarray(y)
+    n_folds = config.ml.cross_validation_folds if n_folds is None else n_folds
+    splits = list(TimeSeriesSplit(n_splits=n_folds).split(X))
+    
+    outer_jobs, inner_jobs = _split_worker_budget(len(candidates) * len(splits), n_jobs)
+    results = Parallel(n_jobs=outer_jobs, backend=config.ml.parallel_backend)(
+        delayed(_fit_and_score_fold)(name, fold, _with_inner_jobs(estimator, inner_jobs),
+                                     X, y, train_idx, test_idx, scoring)
+        for name, estimator in candidates.items()
+        for fold, (train_idx, test_idx) in enumerate(splits, start=1)
+    )
+    return pd.DataFrame(results)
+
+def summarize_cv_results(cv_results):
+    """Mean/std score and total fit time per model, best first"""
+    summary = cv_results.groupby('model').agg(
+        mean_score=('score', 'mean'),
+        std_score=('score', 'std'),
+        folds=('fold', 'count'),
+        fit_time=('fit_time', 'sum')
+    )
+    return summary.sort_values('mean_score', ascending=False)
+
+def _print_cv_results(cv_results, metric='score'):
+    for _, row in cv_results.iterrows():
+        print(f"  {row['model']} fold {row['fold']}: {metric} = {row['score']:.4f} "
+              f"(train {row['train_size']}, test {row['test_size']}, {row['fit_time']:.2f}s)")
+    for name, row in summarize_cv_results(cv_results).iterrows():
+        print(f"  {name}: mean {metric} = {row['mean_score']:.4f} ± {row['std_score']:.4f}")
+
+def _print_search(search, metric, test_score):
+    print(f"  Searched {search.results_['candidate'].nunique()} configurations in {search.n_rungs_} rung(s): "
+          f"{search.elapsed_:.2f}s wall, {search.cpu_time_:.2f} CPU-s"
+          f"{' (stopped early on budget)' if search.stopped_early_ else ''}")
+    print(f"\nBest Model: {search.best_name_} {search.best_params_}")
+    print(f"  CV {metric} = {search.best_score_:.4f}, holdout {metric} = {test_score:.4f}")
+
 class SalesForecastingEngine:
     """Enterprise sales forecasting with multiple ML models"""
     
-    def __init__(self):
+    def __init__(self, feature_store=None):
         self.models = {}
         self.scalers = {}
         self.feature_importance = {}
+        self.metadata = {}
+        self.cv_results = {}
+        self.feature_store = feature_store
+        self.hierarchical_forecaster = None
         
     def prepare_time_series_features(self, df, date_col='transaction_date', value_col='amount'):
         """Create time series features for forecasting"""
-        df = df.copy()
-        df[date_col] = pd.to_datetime(df[date_col])
-        df = df.sort_values(date_col)
-        
-        # Aggregate by date
-        daily_data = df.groupby(df[date_col].dt.date)[value_col].agg(['sum', 'count', 'mean']).reset_index()
-        daily_data.columns = ['date', 'revenue', 'transactions', 'avg_value']
-        daily_data['date'] = pd.to_datetime(daily_data['date'])
-        
-        # Time-based features
-        daily_data['year'] = daily_data['date'].dt.year
-        daily_data['month'] = daily_data['date'].dt.month
-        daily_data['day'] = daily_data['date'].dt.day
-        daily_data['dayofweek'] = daily_data['date'].dt.dayofweek
-        daily_data['quarter'] = daily_data['date'].dt.quarter
-        daily_data['weekofyear'] = daily_data['date'].dt.isocalendar().week
-        daily_data['is_month_start'] = daily_data['date'].dt.is_month_start.astype(int)
-        daily_data['is_month_end'] = daily_data['date'].dt.is_month_end.astype(int)
-        daily_data['is_quarter_start'] = daily_data['date'].dt.is_quarter_start.astype(int)
-        daily_data['is_quarter_end'] = daily_data['date'].dt.is_quarter_end.astype(int)
-        
-        # Lag features
-        for lag in [1, 7, 14, 30]:
-            daily_data[f'revenue_lag_{lag}'] = daily_data['revenue'].shift(lag)
-            daily_data[f'transactions_lag_{lag}'] = daily_data['transactions'].shift(lag)
-        
-        # Rolling statistics
-        for window in [7, 14, 30]:
-            daily_data[f'revenue_rolling_mean_{window}'] = daily_data['revenue'].rolling(window).mean()
-            daily_data[f'revenue_rolling_std_{window}'] = daily_data['revenue'].rolling(window).std()
-            daily_data[f'transactions_rolling_mean_{window}'] = daily_data['transactions'].rolling(window).mean()
-        
-        # Growth rates
-        daily_data['revenue_pct_change'] = daily_data['revenue'].pct_change()
-        daily_data['revenue_diff'] = daily_data['revenue'].diff()
-        
+        daily_data = add_time_series_features(aggregate_daily(df, date_col, value_col))
         return daily_data.dropna()
     
-    def train_revenue_forecaster(self, transactions_df, test_size=0.2):
-        """Train revenue forecasting model"""
+    def _daily_features(self, transactions_df):
+        """
+        Daily feature frame for training and forecasting.
+        
+        Reads from the feature store when one is attached (refreshing it
+        incrementally if transactions_df holds new data, or using the stored
+        frame as is when transactions_df is None).
+        """
+        if self.feature_store is None:
+            return self.prepare_time_series_features(transactions_df)
+        if transactions_df is None:
+            return self.feature_store.features()
+        return self.feature_store.refresh(transactions_df)
+    
+    def _data_version(self, transactions_df):
+        """Version of the data a model is trained on, recorded in the model registry"""
+        if self.feature_store is not None:
+            return self.feature_store.version
+        return data_version(transactions_df)
+    
+    def train_revenue_forecaster(self, transactions_df, test_size=0.2, candidates=None, n_jobs=None,
+                                 cross_validate=False, n_folds=None, large_data=False, max_rows=None):
+        """
+        Train revenue forecasting model.
+        
+        All candidate estimators are fitted and scored concurrently; the worker
+        budget comes from config.ml.n_jobs unless n_jobs is given, and is shared
+        between candidates and the estimators' own threads. Pass candidates
+        (name -> unfitted estimator) to extend or replace revenue_candidates().
+        
+        With cross_validate=True the best model is chosen by mean R² over
+        rolling-origin folds of the training period instead of the single
+        holdout split, which is still reported.
+        
+        large_data=True trains on float32 matrices with the histogram-based
+        candidates of revenue_candidates(large_data=True); max_rows caps the
+        training rows with a subsample stratified by month.
+        """
         print("\nTraining Revenue Forecasting Model...")
+        training_start = time.perf_counter()
         
         # Prepare features
-        data = self.prepare_time_series_features(transactions_df)
+        data = self._daily_features(transactions_df)
         
         # Select features
         feature_cols = [col for col in data.columns if col not in ['date', 'revenue']]
-        X = data[feature_cols]
+        X = data[feature_cols].astype(np.float32) if large_data else data[feature_cols]
         y = data['revenue']
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, shuffle=False)
+        if max_rows is not None and len(X_train) > max_rows:
+            keep = stratified_subsample(data['date'].iloc[:len(X_train)].dt.to_period('M'), max_rows)
+            X_train, y_train = X_train.iloc[keep], y_train.iloc[keep]
+            print(f"  Subsampled {len(X_train):,} of {len(data) - len(X_test):,} training rows")
         
         # Scale features
         scaler = StandardScaler()
         X_train_scaled = scaler.fit_transform(X_train)
         X_test_scaled = scaler.transform(X_test)
         
-        # Train multiple models
-        models = {
-            'random_forest': RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42),
-            'gradient_boosting': GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42),
-            'ridge': Ridge(alpha=1.0)
-        }
+        # Train candidate models in parallel
+        candidates = revenue_candidates(large_data) if candidates is None else candidates
+        cv_summary = None
+        if cross_validate:
+            cv_results = time_series_cross_validate(candidates, X_train, y_train, n_folds=n_folds, n_jobs=n_jobs)
+            _print_cv_results(cv_results, metric='R²')
+            cv_summary = summarize_cv_results(cv_results)
+            self.cv_results['revenue'] = cv_results
+        
+        outer_jobs, inner_jobs = _split_worker_budget(len(candidates), n_jobs)
+        start = time.perf_counter()
+        results = Parallel(n_jobs=outer_jobs, backend=config.ml.parallel_backend)(
+            delayed(_fit_and_score)(name, _with_inner_jobs(estimator, inner_jobs),
+                                    X_train_scaled, y_train, X_test_scaled, y_test)
+            for name, estimator in candidates.items()
+        )
         
+        models = {}
         best_score = -np.inf
         best_model_name = None
         
-        for name, model in models.items():
-            model.fit(X_train_scaled, y_train)
-            score = model.score(X_test_scaled, y_test)
-            print(f"  {name}: R² = {score:.4f}")
+        for name, model, score, elapsed in results:
+            models[name] = model
+            print(f"  {name}: R² = {score:.4f} ({elapsed:.2f}s)")
             
             if score > best_score:
                 best_score = score
                 best_model_name = name
+        print(f"  Trained {len(models)} candidates on {outer_jobs} worker(s) in {time.perf_counter() - start:.2f}s")
+        if cv_summary is not None:
+            best_model_name = cv_summary.index[0]
+            best_score = results[list(models).index(best_model_name)][2]
         
         # Save best model
         self.models['revenue_forecaster'] = models[best_model_name]
         self.scalers['revenue_forecaster'] = scaler
+        self.metadata['revenue_forecaster'] = {
+            'model_type': best_model_name,
+            'feature_cols': feature_cols,
+            'metrics': {'r2': best_score, 'candidates': {name: score for name, _, score, _ in results}},
+            'residual_quantiles': self._recursive_residual_table(data, len(X_test), models[best_model_name], scaler),
+            'data_version': self._data_version(transactions_df),
+            'training_time': time.perf_counter() - training_start,
+            'training_rows': len(X_train),
+            'trained_through': data['date'].iloc[len(data) - len(X_test) - 1].strftime('%Y-%m-%d'),
+            'large_data': large_data
+        }
         
         # Feature importance (if available)
         if hasattr(models[best_model_name], 'feature_importances_'):
@@ -121,15 +549,342 @@ class SalesForecastingEngine:
             'model': models[best_model_name],
             'scaler': scaler,
             'r2_score': best_score,
-            'feature_cols': feature_cols
+            'feature_cols': feature_cols,
+            'cv_results': self.cv_results.get('revenue') if cross_validate else None
+        }
+    
+    def tune_revenue_forecaster(self, transactions_df, test_size=0.2, search_spaces=None, n_candidates=27,
+                                resource='n_samples', time_budget=None, cpu_budget=None, n_jobs=None,
+                                register=True, path=None):
+        """
+        Tune the revenue forecaster with a budgeted successive-halving search.
+        
+        Configurations sampled from revenue_search_spaces() (or search_spaces)
+        are narrowed down over rolling-origin folds of the training period,
+        with the time and CPU budgets from config.ml unless given. The winner is
+        refitted on the whole training period, scored on the holdout and, with
+        register=True, written to the model registry together with its
+        hyperparameters and search summary.
+        """
+        print("\nTuning Revenue Forecasting Model...")
+        training_start = time.perf_counter()
+        
+        data = self._daily_features(transactions_df)
+        feature_cols = [col for col in data.columns if col not in ['date', 'revenue']]
+        X_train, X_test, y_train, y_test = train_test_split(data[feature_cols], data['revenue'],
+                                                            test_size=test_size, shuffle=False)
+        
+        search = SuccessiveHalvingSearch(revenue_search_spaces() if search_spaces is None else search_spaces,
+                                         n_candidates=n_candidates, resource=resource, time_budget=time_budget,
+                                         cpu_budget=cpu_budget, n_jobs=n_jobs).fit(X_train, y_train)
+        test_score = search.best_estimator_.score(search.best_scaler_.transform(X_test), y_test)
+        _print_search(search, 'R²', test_score)
+        
+        self.models['revenue_forecaster'] = search.best_estimator_
+        self.scalers['revenue_forecaster'] = search.best_scaler_
+        self.metadata['revenue_forecaster'] = {
+            'model_type': search.best_name_,
+            'feature_cols': feature_cols,
+            'metrics': {'r2': test_score, 'cv_r2': search.best_score_},
+            'residual_quantiles': self._recursive_residual_table(data, len(X_test), search.best_estimator_,
+                                                                 search.best_scaler_),
+            'tuning': search.summary(),
+            'data_version': self._data_version(transactions_df),
+            'training_time': time.perf_counter() - training_start,
+            'training_rows': len(X_train),
+            'trained_through': data['date'].iloc[len(X_train) - 1].strftime('%Y-%m-%d')
+        }
+        
+        version = None
+        if register:
+            version = ModelRegistry(path or config.ml.model_path).register(
+                'revenue_forecaster', search.best_estimator_, search.best_scaler_,
+                metadata=self.metadata['revenue_forecaster'])
+            print(f"  Registered revenue_forecaster version {version}")
+        
+        return {
+            'model': search.best_estimator_,
+            'scaler': search.best_scaler_,
+            'r2_score': test_score,
+            'params': search.best_params_,
+            'search_results': search.results_,
+            'version': version
+        }
+    
+    def update_revenue_forecaster(self, transactions_df, since=None, n_new_estimators=None, max_estimators=None,
+                                  test_size=0.2, compare_full_refit=True):
+        """
+        Warm-start the revenue forecaster on data added since it was trained.
+        
+        Instead of refitting from zero after each ETL run, the current tree
+        ensemble gets n_new_estimators more trees (default: a tenth of
+        config.ml.n_estimators) fitted only on training rows dated after since
+        (default: the model's trained_through date), with at most
+        max_estimators trees in total (default: twice config.ml.n_estimators);
+        see extend_ensemble. The scaler is kept so old and new trees see the
+        same inputs. Models that cannot be extended (ridge, or a boosted
+        ensemble at the cap) are refitted from scratch instead.
+        
+        Accuracy is measured on the same time-ordered holdout as
+        train_revenue_forecaster. With compare_full_refit=True a full refit of
+        the same estimator is timed and scored as well; the comparison is kept
+        in metadata['warm_start'] and registered with the next save_models.
+        
+        Returns:
+            dict: Updated model and scaler plus the warm-start report (None if
+            there are no new training rows)
+        """
+        if 'revenue_forecaster' not in self.models:
+            raise ValueError("Revenue forecaster not trained. Call train_revenue_forecaster first.")
+        print("\nUpdating Revenue Forecasting Model...")
+        
+        model = self.models['revenue_forecaster']
+        scaler = self.scalers['revenue_forecaster']
+        previous = self.metadata.get('revenue_forecaster') or {}
+        since = since if since is not None else previous.get('trained_through')
+        if since is None:
+            raise ValueError("Revenue forecaster has no trained_through date. Pass since explicitly.")
+        n_new_estimators = n_new_estimators or max(1, config.ml.n_estimators // 10)
+        max_estimators = max_estimators or 2 * config.ml.n_estimators
+        
+        data = self._daily_features(transactions_df)
+        feature_cols = list(scaler.feature_names_in_)
+        X = data[feature_cols].astype(np.float32 if previous.get('large_data') else np.float64)
+        X_train, X_test, y_train, y_test = train_test_split(X, data['revenue'], test_size=test_size, shuffle=False)
+        train_dates = data['date'].iloc[:len(X_train)]
+        new_rows = (train_dates > pd.Timestamp(since)).to_numpy()
+        if not new_rows.any():
+            print(f"  No new training rows after {pd.Timestamp(since):%Y-%m-%d}; model unchanged")
+            return None
+        
+        X_test_scaled = scaler.transform(X_test)
+        previous_r2 = model.score(X_test_scaled, y_test)
+        
+        def full_refit():
+            start = time.perf_counter()
+            refit_scaler = StandardScaler()
+            refit = clone(model).fit(refit_scaler.fit_transform(X_train), y_train)
+            return refit, refit_scaler, time.perf_counter() - start
+        
+        start = time.perf_counter()
+        extended = extend_ensemble(model, scaler.transform(X_train[new_rows]), y_train[new_rows],
+                                   n_new_estimators, max_estimators)
+        if extended is not None:
+            updated, added, dropped = extended
+            updated_scaler = scaler
+            mode = 'warm_start'
+        else:
+            updated, updated_scaler, _ = full_refit()
+            added = dropped = 0
+            mode = 'full_refit'
+        update_time = time.perf_counter() - start
+        X_test_updated = updated_scaler.transform(X_test)
+        r2 = updated.score(X_test_updated, y_test)
+        
+        report = {
+            'mode': mode,
+            'since': pd.Timestamp(since).strftime('%Y-%m-%d'),
+            'new_rows': int(new_rows.sum()),
+            'added': added,
+            'dropped': dropped,
+            'n_estimators': ensemble_size(updated),
+            'time': update_time,
+            'r2': r2,
+            'previous_r2': previous_r2
         }
+        if mode == 'warm_start':
+            print(f"  Added {added} trees on {report['new_rows']} new rows, dropped {dropped} "
+                  f"({report['n_estimators']} total) in {update_time:.2f}s")
+        else:
+            print(f"  {type(model).__name__} cannot be warm-started (not a tree ensemble or at the "
+                  f"{max_estimators}-tree cap); refitted from scratch in {update_time:.2f}s")
+        print(f"  R² = {r2:.4f} (before update {previous_r2:.4f})")
+        
+        if compare_full_refit:
+            if mode == 'full_refit':
+                refit_r2, refit_time = r2, update_time
+            else:
+                refit, refit_scaler, refit_time = full_refit()
+                refit_r2 = refit.score(refit_scaler.transform(X_test), y_test)
+            report.update(full_refit_r2=refit_r2, full_refit_time=refit_time)
+            print(f"  Full refit: R² = {refit_r2:.4f} in {refit_time:.2f}s "
+                  f"({refit_time / max(update_time, 1e-9):.1f}x the update time)")
+        
+        self.models['revenue_forecaster'] = updated
+        self.scalers['revenue_forecaster'] = updated_scaler
+        # Only training details carry over; registry fields (name, version, ...) belong to the parent
+        self.metadata['revenue_forecaster'] = {
+            'model_type': previous.get('model_type', type(updated).__name__),
+            'large_data': previous.get('large_data', False),
+            'parent_version': previous.get('version'),
+            'feature_cols': feature_cols,
+            'metrics': {'r2': r2},
+            'residual_quantiles': self._recursive_residual_table(data, len(X_test), updated, updated_scaler),
+            'data_version': self._data_version(transactions_df),
+            'training_time': update_time,
+            'training_rows': report['new_rows'] if mode == 'warm_start' else len(X_train),
+            'trained_through': train_dates.iloc[-1].strftime('%Y-%m-%d'),
+            'warm_start': report
+        }
+        
+        return {'model': updated, 'scaler': updated_scaler, 'r2_score': r2, **report}
     
-    def forecast_revenue(self, transactions_df, days_ahead=30):
-        """Generate revenue forecast for specified days"""
+    def _direct_feature_matrix(self, origins, horizons, origin_cols):
+        """
+        Build direct multi-horizon features for every (origin, horizon) pair at once.
+        
+        Each row combines the state of the series at the forecast origin (levels,
+        lags, rolling statistics) with the calendar of the target date and the
+        horizon in days, so no predicted values are fed back into the features.
+        """
+        horizons = np.asarray(horizons, dtype=int)
+        n_origins, n_horizons = len(origins), len(horizons)
+        
+        origin_dates = np.repeat(origins['date'].to_numpy(dtype='datetime64[ns]'), n_horizons)
+        steps = np.tile(horizons, n_origins)
+        target_dates = pd.DatetimeIndex(origin_dates + steps.astype('timedelta64[D]'))
+        
+        X = pd.DataFrame(np.repeat(origins[origin_cols].to_numpy(dtype=float), n_horizons, axis=0),
+                         columns=origin_cols)
+        calendar = calendar_features(target_dates)
+        for col in CALENDAR_FEATURES:
+            X[f'target_{col}'] = calendar[col].to_numpy()
+        X['horizon'] = steps
+        return X, target_dates
+    
+    def train_direct_forecaster(self, transactions_df, max_horizon=365, test_size=0.2, max_rows=50_000,
+                                n_jobs=None):
+        """
+        Train a direct multi-horizon revenue model.
+        
+        One model is trained on (origin, horizon) pairs with the horizon as a
+        feature, so a forecast of any length up to max_horizon is a single batched
+        predict instead of a day-by-day recursive loop. The forest uses the
+        config.ml settings and n_jobs workers (default: config.ml.n_jobs).
+        """
+        print(f"\nTraining Direct Multi-Horizon Forecaster (horizon <= {max_horizon} days)...")
+        training_start = time.perf_counter()
+        
+        data = self._daily_features(transactions_df).reset_index(drop=True)
+        origin_cols = [col for col in data.columns if col not in ['date'] + CALENDAR_FEATURES]
+        
+        X, target_dates = self._direct_feature_matrix(data, np.arange(1, max_horizon + 1), origin_cols)
+        y = pd.Series(data['revenue'].to_numpy(), index=data['date']).reindex(target_dates).to_numpy()
+        target_dates = target_dates.to_numpy()
+        origin_dates = target_dates - X['horizon'].to_numpy().astype('timedelta64[D]')
+        
+        # Only pairs whose target day was observed can be used for training
+        observed = ~np.isnan(y)
+        X, y = X[observed].reset_index(drop=True), y[observed]
+        target_dates, origin_dates = target_dates[observed], origin_dates[observed]
+        if len(X) > max_rows:
+            keep = np.sort(np.random.RandomState(config.ml.random_state).choice(len(X), max_rows, replace=False))
+            X, y, target_dates, origin_dates = X.iloc[keep], y[keep], target_dates[keep], origin_dates[keep]
+        
+        # Time-aware split: train on targets before the cutoff, test on origins after it
+        cutoff = data['date'].to_numpy()[int(len(data) * (1 - test_size))]
+        train_mask = target_dates < cutoff
+        test_mask = origin_dates >= cutoff
+        
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X[train_mask])
+        model = RandomForestRegressor(n_estimators=config.ml.n_estimators, max_depth=config.ml.max_depth,
+                                      random_state=config.ml.random_state,
+                                      n_jobs=config.ml.n_jobs if n_jobs is None else n_jobs)
+        model.fit(X_train_scaled, y[train_mask])
+        score = model.score(scaler.transform(X[test_mask]), y[test_mask]) if test_mask.any() else np.nan
+        
+        residual_table = self._direct_residual_table(data, cutoff, max_horizon, origin_cols, model, scaler,
+                                                     max_rows)
+        print(f"  Training pairs: {int(train_mask.sum()):,}, test pairs: {int(test_mask.sum()):,}")
+        print(f"  Direct model R² = {score:.4f}")
+        
+        self.models['revenue_forecaster_direct'] = model
+        self.scalers['revenue_forecaster_direct'] = scaler
+        self.metadata['revenue_forecaster_direct'] = {
+            'origin_cols': origin_cols,
+            'feature_cols': list(X.columns),
+            'max_horizon': max_horizon,
+            'metrics': {'r2': score},
+            'residual_quantiles': residual_table,
+            'data_version': self._data_version(transactions_df),
+            'training_time': time.perf_counter() - training_start,
+            'training_rows': int(train_mask.sum())
+        }
+        
+        return {
+            'model': model,
+            'scaler': scaler,
+            'r2_score': score,
+            'feature_cols': list(X.columns),
+            'max_horizon': max_horizon
+        }
+    
+    def _recursive_residual_table(self, data, n_test, model, scaler):
+        """
+        Residual quantiles of recursive forecasts replayed over the holdout.
+        
+        One-step holdout rows carry the day's actual transactions and average
+        value, which a real forecast replaces with averages, so their
+        residuals are far narrower than forecast errors. Instead the forecast
+        is rolled forward from CALIBRATION_ORIGINS origins in the holdout
+        exactly as forecast_revenue does, and its errors are bucketed by
+        horizon. Days without sales count as zero revenue.
+        """
+        actuals = data.set_index('date')['revenue']
+        last_date = data['date'].iloc[-1]
+        origins = np.unique(np.linspace(len(data) - n_test - 1, len(data) - 2, CALIBRATION_ORIGINS).astype(int))
+        residuals, horizons = [], []
+        for origin in origins:
+            history = data.iloc[:origin + 1]
+            days = min(CALIBRATION_HORIZON, (last_date - history['date'].iloc[-1]).days)
+            forecast = self._recursive_forecast(history, days, model, scaler)
+            actual = actuals.reindex(forecast['date']).fillna(0).to_numpy()
+            residuals.append(actual - forecast['predicted_revenue'].to_numpy())
+            horizons.append(forecast['day_of_forecast'].to_numpy())
+        return residual_quantile_table(np.concatenate(residuals), np.concatenate(horizons))
+    
+    def _direct_residual_table(self, data, cutoff, max_horizon, origin_cols, model, scaler, max_rows):
+        """
+        Residual quantiles of direct forecasts from every holdout origin.
+        
+        Forecasts are built the way _forecast_direct builds them, for every
+        calendar day up to the end of the data, and days without sales count
+        as zero revenue (training pairs only cover days with sales).
+        """
+        origins = data[data['date'] >= cutoff]
+        X, target_dates = self._direct_feature_matrix(origins, np.arange(1, max_horizon + 1), origin_cols)
+        known = np.asarray(target_dates <= data['date'].iloc[-1])
+        X, target_dates = X[known].reset_index(drop=True), target_dates[known]
+        if len(X) > max_rows:
+            keep = np.sort(np.random.RandomState(config.ml.random_state).choice(len(X), max_rows, replace=False))
+            X, target_dates = X.iloc[keep], target_dates[keep]
+        actuals = data.set_index('date')['revenue'].reindex(target_dates).fillna(0).to_numpy()
+        predictions = np.maximum(model.predict(scaler.transform(X)), 0)
+        return residual_quantile_table(actuals - predictions, X['horizon'].to_numpy())
+    
+    def forecast_revenue(self, transactions_df, days_ahead=30, method='recursive'):
+        """
+        Generate revenue forecast for specified days.
+        
+        method='recursive' rolls the one-step model forward day by day (kept for
+        comparison); method='direct' uses the multi-horizon model and produces the
+        whole horizon with one vectorized feature build and one predict call.
+        """
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"Unknown forecast method '{method}'. Use one of {FORECAST_METHODS}")
+        if method == 'direct':
+            return self._forecast_direct(transactions_df, days_ahead)
+        
         if 'revenue_forecaster' not in self.models:
             raise ValueError("Revenue forecaster not trained. Call train_revenue_forecaster first.")
         
-        data = self.prepare_time_series_features(transactions_df)
+        return self._recursive_forecast(self._daily_features(transactions_df), days_ahead,
+                                        self.models['revenue_forecaster'], self.scalers['revenue_forecaster'])
+    
+    def _recursive_forecast(self, data, days_ahead, model, scaler):
+        """Roll a one-step model forward day by day from the end of a daily feature frame"""
+        feature_cols = list(scaler.feature_names_in_)
         last_date = data['date'].max()
         
         forecasts = []
@@ -178,12 +933,15 @@ class SalesForecastingEngine:
                 forecast_row['revenue_pct_change'] = 0
                 forecast_row['revenue_diff'] = 0
             
+            # Same-day volume is unknown ahead of time; use recent averages
+            forecast_row['transactions'] = current_data['transactions'].mean()
+            forecast_row['avg_value'] = current_data['avg_value'].tail(30).mean()
+            
             # Make prediction
-            feature_cols = [col for col in forecast_row.columns if col != 'date']
             X_forecast = forecast_row[feature_cols]
-            X_forecast_scaled = self.scalers['revenue_forecaster'].transform(X_forecast)
+            X_forecast_scaled = scaler.transform(X_forecast)
             
-            predicted_revenue = self.models['revenue_forecaster'].predict(X_forecast_scaled)[0]
+            predicted_revenue = model.predict(X_forecast_scaled)[0]
             predicted_revenue = max(0, predicted_revenue)  # Ensure non-negative
             
             forecast = {
@@ -202,84 +960,165 @@ class SalesForecastingEngine:
         
         return pd.DataFrame(forecasts)
     
-    def save_models(self, path='models/'):
-        """Save trained models"""
-        import os
-        os.makedirs(path, exist_ok=True)
+    def forecast_quantiles(self, transactions_df, days_ahead=30, quantiles=(0.1, 0.5, 0.9), method='recursive'):
+        """
+        Probabilistic revenue forecast (e.g. P10/P50/P90).
         
-        for name, model in self.models.items():
-            joblib.dump(model, f'{path}{name}.pkl')
+        The point forecast is produced once with forecast_revenue; quantiles come
+        from the empirical distribution of holdout forecast errors per horizon
+        bucket, recorded at training time, so any number of quantiles costs one
+        model pass.
         
-        for name, scaler in self.scalers.items():
-            joblib.dump(scaler, f'{path}{name}_scaler.pkl')
+        Returns:
+            pd.DataFrame: forecast_revenue columns plus one column per quantile ('p10', 'p50', 'p90')
+        """
+        name = FORECAST_MODELS.get(method)
+        forecast = self.forecast_revenue(transactions_df, days_ahead=days_ahead, method=method)
+        table = self.metadata[name].get('residual_quantiles')
+        if table is None:
+            raise ValueError(f"{name} has no residual distribution. Retrain it to enable interval forecasts.")
+        
+        # Recursive tables saved before forecast-time calibration hold one-step residuals
+        scaling = table.get('scaling', 'sqrt' if method == 'recursive' else None)
+        bounds = apply_residual_quantiles(forecast['predicted_revenue'], forecast['day_of_forecast'], table,
+                                          quantiles, scaling=scaling)
+        for i, q in enumerate(quantiles):
+            forecast[quantile_column(q)] = bounds[:, i]
+        return forecast
+    
+    def _forecast_direct(self, transactions_df, days_ahead):
+        """Forecast all horizon days with one batched predict of the direct model"""
+        if 'revenue_forecaster_direct' not in self.models:
+            raise ValueError("Direct forecaster not trained. Call train_direct_forecaster first.")
+        
+        meta = self.metadata['revenue_forecaster_direct']
+        if days_ahead > meta['max_horizon']:
+            raise ValueError(f"days_ahead={days_ahead} exceeds the trained horizon of {meta['max_horizon']} days")
+        
+        data = self._daily_features(transactions_df)
+        horizons = np.arange(1, days_ahead + 1)
+        X, target_dates = self._direct_feature_matrix(data.tail(1), horizons, meta['origin_cols'])
+        
+        X_scaled = self.scalers['revenue_forecaster_direct'].transform(X[meta['feature_cols']])
+        predictions = np.maximum(self.models['revenue_forecaster_direct'].predict(X_scaled), 0)
+        
+        return pd.DataFrame({
+            'date': target_dates,
+            'predicted_revenue': predictions,
+            'day_of_forecast': horizons
+        })
+    
+    def forecast_hierarchy(self, sales_df, days_ahead=30, **options):
+        """
+        Reconciled revenue forecasts per region, channel and top product.
+        
+        Bottom-level series are fitted in parallel worker processes and all
+        levels are reconciled to sum to the total; options are passed to
+        HierarchicalForecaster (dims, top_products, reconciliation, n_jobs, ...).
+        
+        Returns:
+            pd.DataFrame: date, level, region, channel, product_id,
+                base_forecast and forecast for every series of the hierarchy
+        """
+        forecaster = HierarchicalForecaster(**options)
+        result = forecaster.forecast(sales_df, days_ahead=days_ahead)
+        self.hierarchical_forecaster = forecaster
+        print(f"\nHierarchical forecast: {len(forecaster.hierarchy.series):,} series, "
+              f"{forecaster.hierarchy.n_bottom:,} bottom-level, {forecaster.timings['total']:.2f}s")
+        return result
+    
+    def save_models(self, path='models/', forecast_cache=None, transactions_df=None):
+        """
+        Register trained models as new versions in the model registry.
+        
+        Each model is stored with its scaler and metadata (features, metrics,
+        data version, training time) and becomes the current version.
+        Models that were loaded from the registry and not retrained are skipped.
+        Pass a ForecastCache and the transactions to precompute forecasts for
+        the new versions right away.
+        
+        Returns:
+            dict: Model name -> registered version
+        """
+        registry = ModelRegistry(path)
+        models = self.models.local if isinstance(self.models, RegistryMapping) else self.models
+        
+        versions = {}
+        for name, model in models.items():
+            versions[name] = registry.register(name, model, scaler=self.scalers.get(name),
+                                               metadata=self.metadata.get(name))
+            print(f"  {name}: version {versions[name]}")
         
         print(f"\nModels saved to {path}")
+        if forecast_cache is not None and transactions_df is not None:
+            methods = [method for method, name in FORECAST_MODELS.items() if name in versions]
+            forecast_cache.precompute(transactions_df, methods=methods)
+        return versions
     
     def load_models(self, path='models/'):
-        """Load trained models"""
-        import os
-        
-        for file in os.listdir(path):
-            if file.endswith('.pkl'):
-                name = file.replace('.pkl', '')
-                if '_scaler' in name:
-                    scaler_name = name.replace('_scaler', '')
-                    self.scalers[scaler_name] = joblib.load(f'{path}{file}')
-                else:
-                    self.models[name] = joblib.load(f'{path}{file}')
+        """
+        Attach the model registry at path.
         
-        print(f"\nModels loaded from {path}")
+        Nothing is read until a model is used; models, scalers and metadata then
+        resolve to the current registered version (memory-mapped), and a version
+        promoted later is picked up on the next access without reloading.
+        """
+        registry = ModelRegistry(path)
+        self.models = registry.mapping('model')
+        self.scalers = registry.mapping('scaler')
+        self.metadata = registry.mapping('metadata')
+        
+        print(f"\nModels loaded from {path}: {', '.join(registry.names()) or 'none registered'}")
 
 class ChurnPredictionEngine:
     """Predict customer churn risk"""
     
-    def __init__(self):
+    def __init__(self, feature_store=None):
         self.model = None
         self.scaler = None
+        self.online_model = None
+        self.feature_store = feature_store
+        
+    def prepare_churn_features(self, companies_df, transactions_df, interactions_df, reference_date=None):
+        """
+        Create features for churn prediction as of a reference date.
         
-    def prepare_churn_features(self, companies_df, transactions_df, interactions_df):
-        """Create features for churn prediction"""
-        # Transaction-based features
-        company_stats = transactions_df.groupby('company_id').agg({
-            'amount': ['sum', 'mean', 'count'],
-            'transaction_date': 'max'
-        }).reset_index()
-        company_stats.columns = ['company_id', 'total_revenue', 'avg_transaction', 'transaction_count', 'last_transaction']
-        
-        # Recency (days since last transaction)
-        company_stats['days_since_last_transaction'] = (datetime.now() - pd.to_datetime(company_stats['last_transaction'])).dt.days
-        
-        # Interaction-based features
-        interaction_stats = interactions_df.groupby('company_id').agg({
-            'satisfaction_score': 'mean',
-            'nps_score': 'mean',
-            'interaction_id': 'count'
-        }).reset_index()
-        interaction_stats.columns = ['company_id', 'avg_satisfaction', 'avg_nps', 'interaction_count']
-        
-        # Merge features
-        features = companies_df.merge(company_stats, on='company_id', how='left')
-        features = features.merge(interaction_stats, on='company_id', how='left')
-        
-        # Fill missing values
-        features = features.fillna(0)
-        
-        # Create churn label (based on recency and low satisfaction)
-        features['is_churned'] = ((features['days_since_last_transaction'] > 90) & 
-                                  (features['avg_satisfaction'] < 3)).astype(int)
-        
-        return features
-    
-    def train_churn_model(self, features_df):
-        """Train churn prediction model"""
+        The reference date defaults to the latest activity in the data (not the
+        wall clock), so the same inputs always give the same features. With a
+        ChurnFeatureStore attached the snapshot is materialized incrementally and
+        stored for later training and scoring.
+        """
+        if reference_date is None:
+            reference_date = latest_activity_date(transactions_df, interactions_df)
+        if self.feature_store is not None:
+            return self.feature_store.materialize(companies_df, transactions_df, interactions_df, reference_date)
+        return build_churn_features(companies_df, transaction_aggregates(transactions_df),
+                                    interaction_aggregates(interactions_df), reference_date)
+    
+    def train_churn_model(self, features_df=None, cross_validate=False, n_folds=None, time_col='created_date',
+                          scoring='roc_auc', n_jobs=None, large_data=False, max_rows=None):
+        """
+        Train churn prediction model.
+        
+        With cross_validate=True the model is also evaluated with rolling-origin
+        folds over companies ordered by time_col (falls back to last_transaction),
+        so each fold is validated on accounts newer than those it was trained on.
+        
+        large_data=True trains a class-weighted HistGradientBoostingClassifier on
+        float32 features (feature importance then comes from permutation
+        importance on a sample of the test split); max_rows caps the training
+        rows with a subsample stratified by the churn label.
+        
+        Without features_df the latest snapshot of the attached feature store is used.
+        """
         print("\nTraining Churn Prediction Model...")
+        if features_df is None:
+            features_df = self._snapshot()
         
         # Select features
-        feature_cols = ['annual_revenue', 'employees', 'total_revenue', 'avg_transaction', 
-                       'transaction_count', 'days_since_last_transaction', 'avg_satisfaction', 
-                       'avg_nps', 'interaction_count']
+        feature_cols = CHURN_FEATURES
         
-        X = features_df[feature_cols]
+        X = features_df[feature_cols].astype(np.float32) if large_data else features_df[feature_cols]
         y = features_df['is_churned']
         
         # Handle imbalanced data
@@ -288,6 +1127,10 @@ class ChurnPredictionEngine:
         
         # Split data
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        if max_rows is not None and len(X_train) > max_rows:
+            keep = stratified_subsample(y_train, max_rows)
+            X_train, y_train = X_train.iloc[keep], y_train.iloc[keep]
+            print(f"  Subsampled {len(X_train):,} training rows (stratified by churn label)")
         
         # Scale features
         scaler = StandardScaler()
@@ -295,8 +1138,23 @@ class ChurnPredictionEngine:
         X_test_scaled = scaler.transform(X_test)
         
         # Train model
-        from sklearn.ensemble import RandomForestClassifier
-        model = RandomForestClassifier(n_estimators=100, max_depth=10, class_weight='balanced', random_state=42)
+        if large_data:
+            model_name = 'hist_gradient_boosting'
+            model = HistGradientBoostingClassifier(max_iter=100, class_weight='balanced', random_state=42)
+        else:
+            model_name = 'random_forest'
+            model = RandomForestClassifier(n_estimators=100, max_depth=10, class_weight='balanced', random_state=42)
+        
+        cv_results = None
+        if cross_validate:
+            if time_col not in features_df.columns:
+                time_col = 'last_transaction'
+            order = np.argsort(pd.to_datetime(features_df[time_col]).to_numpy(), kind='stable')
+            cv_results = time_series_cross_validate({model_name: model}, X.to_numpy()[order],
+                                                    y.to_numpy()[order], n_folds=n_folds,
+                                                    scoring=scoring, n_jobs=n_jobs)
+            _print_cv_results(cv_results, metric=scoring)
+        
         model.fit(X_train_scaled, y_train)
         
         # Evaluate
@@ -307,9 +1165,15 @@ class ChurnPredictionEngine:
         print(f"  Test Accuracy: {test_score:.4f}")
         
         # Feature importance
+        if hasattr(model, 'feature_importances_'):
+            importances = model.feature_importances_
+        else:
+            sample = stratified_subsample(y_test, 10_000)
+            importances = permutation_importance(model, X_test_scaled[sample], y_test.iloc[sample], n_repeats=3,
+                                                 random_state=42).importances_mean
         importance = pd.DataFrame({
             'feature': feature_cols,
-            'importance': model.feature_importances_
+            'importance': importances
         }).sort_values('importance', ascending=False)
         
         print(f"\nTop 5 Churn Indicators:")
@@ -323,7 +1187,62 @@ class ChurnPredictionEngine:
             'model': model,
             'scaler': scaler,
             'accuracy': test_score,
-            'feature_importance': importance
+            'feature_importance': importance,
+            'cv_results': cv_results
+        }
+    
+    def tune_churn_model(self, features_df, time_col='created_date', scoring='roc_auc', search_spaces=None,
+                         n_candidates=27, resource='n_samples', time_budget=None, cpu_budget=None, n_jobs=None,
+                         register=True, path=None):
+        """
+        Tune the churn model with a budgeted successive-halving search.
+        
+        Uses the same stratified holdout as train_churn_model; the search itself
+        runs over rolling-origin folds of the training companies ordered by
+        time_col (falls back to last_transaction). With register=True the
+        winner is written to the model registry as 'churn_model'.
+        """
+        print("\nTuning Churn Prediction Model...")
+        training_start = time.perf_counter()
+        
+        if time_col not in features_df.columns:
+            time_col = 'last_transaction'
+        train_df, test_df = train_test_split(features_df, test_size=0.2, random_state=42,
+                                             stratify=features_df['is_churned'])
+        train_df = train_df.sort_values(time_col, kind='stable')
+        
+        search = SuccessiveHalvingSearch(churn_search_spaces() if search_spaces is None else search_spaces,
+                                         n_candidates=n_candidates, resource=resource, scoring=scoring,
+                                         time_budget=time_budget, cpu_budget=cpu_budget,
+                                         n_jobs=n_jobs).fit(train_df[CHURN_FEATURES], train_df['is_churned'])
+        test_score = get_scorer(scoring)(search.best_estimator_,
+                                         search.best_scaler_.transform(test_df[CHURN_FEATURES].to_numpy(dtype=float)),
+                                         test_df['is_churned'])
+        _print_search(search, scoring, test_score)
+        
+        self.model = search.best_estimator_
+        self.scaler = search.best_scaler_
+        
+        version = None
+        if register:
+            version = ModelRegistry(path or config.ml.model_path).register(
+                'churn_model', self.model, self.scaler, metadata={
+                    'model_type': search.best_name_,
+                    'feature_cols': CHURN_FEATURES,
+                    'metrics': {scoring: test_score, f'cv_{scoring}': search.best_score_},
+                    'tuning': search.summary(),
+                    'training_time': time.perf_counter() - training_start,
+                    'training_rows': len(train_df)
+                })
+            print(f"  Registered churn_model version {version}")
+        
+        return {
+            'model': self.model,
+            'scaler': self.scaler,
+            scoring: test_score,
+            'params': search.best_params_,
+            'search_results': search.results_,
+            'version': version
         }
     
     def predict_churn_risk(self, features_df):
@@ -331,22 +1250,77 @@ class ChurnPredictionEngine:
         if self.model is None:
             raise ValueError("Churn model not trained. Call train_churn_model first.")
         
-        feature_cols = ['annual_revenue', 'employees', 'total_revenue', 'avg_transaction', 
-                       'transaction_count', 'days_since_last_transaction', 'avg_satisfaction', 
-                       'avg_nps', 'interaction_count']
+        results = score_churn_features(features_df, self.model, self.scaler)
+        return results.sort_values('churn_probability', ascending=False)
+    
+    def update_churn_model(self, companies_df, transactions_batch=None, interactions_batch=None,
+                           history=None, reference_date=None, adopt=True, **options):
+        """
+        Incrementally update the churn model from a new batch of activity.
+        
+        The first call creates an OnlineChurnModel whose champion is the current
+        batch-trained model (if any); pass history=(transactions_df, interactions_df)
+        to seed it with the full history. companies_df is the whole population:
+        every company is relabeled at each update. Each batch is evaluated before
+        it is learned, and the online model replaces the serving model only when
+        its rolling log loss is better and its ROC AUC no worse. With adopt=True a promoted model becomes
+        self.model/self.scaler, so predict_churn_risk and batch scoring use it.
         
-        X = features_df[feature_cols].fillna(0)
-        X_scaled = self.scaler.transform(X)
+        Returns:
+            dict: Batch report with candidate/champion metrics and 'promoted'
+        """
+        if self.online_model is None:
+            champion = (self.model, self.scaler) if self.model is not None else None
+            self.online_model = OnlineChurnModel(champion=champion, **options)
+            if history is not None:
+                self.online_model.bootstrap(companies_df, *history, reference_date=reference_date)
+        
+        report = self.online_model.update(companies_df, transactions_batch, interactions_batch, reference_date)
+        print(f"  Online update: {report['rows']} companies ({report.get('positives', 0)} churned), "
+              f"candidate log loss {report.get('candidate_rolling_log_loss', np.nan):.4f}, "
+              f"champion {report.get('champion_rolling_log_loss', np.nan):.4f}"
+              f"{' -> promoted' if report['promoted'] else ''}")
+        if report['promoted'] and adopt:
+            self.model, self.scaler = self.online_model.champion
+        return report
+    
+    def score_snapshot(self, reference_date=None):
+        """Churn risk for a stored feature snapshot (default: latest)"""
+        return self.predict_churn_risk(self._snapshot(reference_date))
+    
+    def _snapshot(self, reference_date=None):
+        if self.feature_store is None:
+            raise ValueError("No churn feature store attached. Pass features or ChurnPredictionEngine(feature_store=...).")
+        return self.feature_store.snapshot(reference_date)
+    
+    def score_in_batches(self, companies_path='data/raw/companies.csv',
+                         transactions_path='data/raw/transactions.csv',
+                         interactions_path='data/raw/customer_interactions.csv',
+                         output_path='data/processed/churn_scores.csv', chunksize=50_000, n_jobs=None,
+                         reference_date=None):
+        """
+        Score the full customer base chunk by chunk with bounded memory.
         
-        churn_probabilities = self.model.predict_proba(X_scaled)[:, 1]
-        churn_predictions = self.model.predict(X_scaled)
+        With a ChurnFeatureStore attached, the stored snapshot for reference_date
+        (default: the latest) is scored, so batch scores use exactly the features
+        the model was trained on. Otherwise transactions and interactions are
+        streamed into per-company aggregates and recency is measured from
+        reference_date (default: the latest activity date in the files). Company
+        chunks are scored in parallel workers and appended to output_path as
+        they complete.
         
-        results = features_df[['company_id', 'company_name']].copy()
-        results['churn_probability'] = churn_probabilities
-        results['churn_prediction'] = churn_predictions
-        results['risk_level'] = pd.cut(churn_probabilities, bins=[0, 0.3, 0.7, 1.0], labels=['Low', 'Medium', 'High'])
+        Returns:
+            dict: Throughput report (rows, chunks, seconds, rows_per_second, risk_counts)
+        """
+        if self.model is None:
+            raise ValueError("Churn model not trained. Call train_churn_model first.")
         
-        return results.sort_values('churn_probability', ascending=False)
+        print("\nBatch Churn Scoring...")
+        scorer = BatchChurnScorer(self.model, self.scaler, chunksize=chunksize, n_jobs=n_jobs)
+        if self.feature_store is not None:
+            return scorer.score_features(self._snapshot(reference_date), output_path)
+        return scorer.score_files(companies_path, transactions_path, interactions_path, output_path,
+                                  reference_date=reference_date)
 
 if __name__ == "__main__":
     print("Advanced ML Models Module - Ready for Enterprise Deployment")
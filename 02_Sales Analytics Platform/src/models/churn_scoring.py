@@ -0,0 +1,344 @@
+"""
+Batch churn scoring for large customer bases.
+
+Churn features need per-company transaction and interaction statistics. Instead
+of merging the full raw frames in memory, transactions and interactions are
+streamed from CSV in chunks and folded into compact per-company aggregates
+(a handful of numbers per company). Companies are then read in chunks, each
+chunk is turned into features and scored in a worker process, and the scores
+are appended to the processed store as they arrive. Peak memory is bounded by
+the aggregates plus a few chunks in flight, independent of the number of
+transactions.
+
+Functions:
+    transaction_aggregates: Mergeable per-company transaction statistics
+    interaction_aggregates: Mergeable per-company interaction statistics
+    activity_reference_date: Last day with activity in the aggregates (the default reference date)
+    build_churn_features: Churn feature frame from companies and aggregates
+    score_churn_features: Churn probability, prediction and risk level
+    load_churn_aggregates: Chunked aggregation of transaction/interaction CSVs
+
+Classes:
+    BatchChurnScorer: Chunked, parallel scoring pipeline with throughput reporting
+"""
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Union
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+CHURN_FEATURES = ['annual_revenue', 'employees', 'total_revenue', 'avg_transaction',
+                  'transaction_count', 'days_since_last_transaction', 'avg_satisfaction',
+                  'avg_nps', 'interaction_count']
+
+RISK_BINS = [0, 0.3, 0.7, 1.0]
+RISK_LABELS = ['Low', 'Medium', 'High']
+
+
+def transaction_aggregates(transactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-company transaction statistics that can be merged across chunks.
+
+    Returns:
+        pd.DataFrame: total_revenue, transaction_count, last_transaction indexed by company_id
+    """
+    frame = pd.DataFrame({
+        'company_id': transactions['company_id'].to_numpy(),
+        'amount': transactions['amount'].to_numpy(dtype=np.float64),
+        'date': pd.to_datetime(transactions['transaction_date']).to_numpy(),
+    })
+    return frame.groupby('company_id', sort=False).agg(
+        total_revenue=('amount', 'sum'),
+        transaction_count=('amount', 'count'),
+        last_transaction=('date', 'max')
+    )
+
+
+def interaction_aggregates(interactions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-company interaction statistics that can be merged across chunks.
+
+    Means are kept as sums and non-null counts so partial aggregates add up.
+
+    Returns:
+        pd.DataFrame: satisfaction_sum/count, nps_sum/count, interaction_count, last_interaction
+            indexed by company_id
+    """
+    satisfaction = interactions['satisfaction_score']
+    nps = interactions['nps_score']
+    frame = pd.DataFrame({
+        'company_id': interactions['company_id'].to_numpy(),
+        'satisfaction_sum': satisfaction.fillna(0).to_numpy(dtype=np.float64),
+        'satisfaction_count': satisfaction.notna().to_numpy(dtype=np.int64),
+        'nps_sum': nps.fillna(0).to_numpy(dtype=np.float64),
+        'nps_count': nps.notna().to_numpy(dtype=np.int64),
+        'interaction_count': interactions['interaction_id'].notna().to_numpy(dtype=np.int64),
+        'last_interaction': pd.to_datetime(interactions['interaction_date']).to_numpy(),
+    })
+    rules = {col: ('max' if col == 'last_interaction' else 'sum') for col in frame.columns if col != 'company_id'}
+    return frame.groupby('company_id', sort=False).agg(rules)
+
+
+def _merge_aggregates(partials) -> pd.DataFrame:
+    """Combine partial aggregates (sums and counts add, last dates take the max)."""
+    stacked = pd.concat([p for p in partials if p is not None])
+    rules = {col: ('max' if col.startswith('last_') else 'sum') for col in stacked.columns}
+    return stacked.groupby(level=0, sort=False).agg(rules)
+
+
+def activity_reference_date(tx_aggregates: pd.DataFrame, interaction_aggs: pd.DataFrame) -> pd.Timestamp:
+    """
+    Last day with a transaction or interaction in the aggregates.
+
+    This is the default date recency is measured from, the same day
+    latest_activity_date gives for the raw frames, so features do not depend
+    on when they are computed.
+    """
+    dates = [aggregates[col].max() for aggregates, col in
+             ((tx_aggregates, 'last_transaction'), (interaction_aggs, 'last_interaction'))
+             if col in aggregates and len(aggregates)]
+    dates = [date for date in dates if pd.notna(date)]
+    if not dates:
+        raise ValueError("No transactions or interactions to measure recency from")
+    return pd.Timestamp(max(dates)).normalize()
+
+
+def build_churn_features(companies: pd.DataFrame, tx_aggregates: pd.DataFrame,
+                         interaction_aggs: pd.DataFrame, reference_date=None) -> pd.DataFrame:
+    """
+    Build churn features for a set of companies from precomputed aggregates.
+
+    Args:
+        companies (pd.DataFrame): Company records (companies.csv schema)
+        tx_aggregates (pd.DataFrame): Output of transaction_aggregates
+        interaction_aggs (pd.DataFrame): Output of interaction_aggregates
+        reference_date: Date recency is measured from (default: latest activity in the aggregates)
+
+    Returns:
+        pd.DataFrame: Companies with CHURN_FEATURES and the is_churned label
+    """
+    reference_date = pd.Timestamp(reference_date) if reference_date is not None \
+        else activity_reference_date(tx_aggregates, interaction_aggs)
+    company_ids = companies['company_id']
+
+    tx = tx_aggregates.reindex(company_ids)
+    interactions = interaction_aggs.reindex(company_ids)
+
+    features = companies.reset_index(drop=True).copy()
+    features['total_revenue'] = tx['total_revenue'].to_numpy()
+    features['avg_transaction'] = (tx['total_revenue'] / tx['transaction_count']).to_numpy()
+    features['transaction_count'] = tx['transaction_count'].to_numpy()
+    features['last_transaction'] = tx['last_transaction'].to_numpy()
+    features['days_since_last_transaction'] = (reference_date - pd.to_datetime(tx['last_transaction'])).dt.days.to_numpy()
+    features['avg_satisfaction'] = (interactions['satisfaction_sum'] / interactions['satisfaction_count']).to_numpy()
+    features['avg_nps'] = (interactions['nps_sum'] / interactions['nps_count']).to_numpy()
+    features['interaction_count'] = interactions['interaction_count'].to_numpy()
+
+    # Fill missing values
+    features = features.fillna(0)
+
+    # Churn label (based on recency and low satisfaction)
+    features['is_churned'] = ((features['days_since_last_transaction'] > 90) &
+                              (features['avg_satisfaction'] < 3)).astype(int)
+    return features
+
+
+def score_churn_features(features: pd.DataFrame, model, scaler) -> pd.DataFrame:
+    """
+    Score a feature frame.
+
+    Returns:
+        pd.DataFrame: company_id, company_name, churn_probability, churn_prediction, risk_level
+    """
+    X_scaled = scaler.transform(features[CHURN_FEATURES].fillna(0))
+    class_probabilities = model.predict_proba(X_scaled)
+    probabilities = class_probabilities[:, 1]
+
+    results = features[['company_id', 'company_name']].copy()
+    results['churn_probability'] = probabilities
+    # Same as model.predict for probabilistic classifiers, without a second pass over the model
+    results['churn_prediction'] = model.classes_[class_probabilities.argmax(axis=1)]
+    results['risk_level'] = pd.cut(probabilities, bins=RISK_BINS, labels=RISK_LABELS, include_lowest=True)
+    return results
+
+
+def load_churn_aggregates(transactions_path: Union[str, Path], interactions_path: Union[str, Path],
+                          chunksize: int = 1_000_000) -> Dict[str, pd.DataFrame]:
+    """
+    Stream transaction and interaction CSVs into per-company aggregates.
+
+    Args:
+        transactions_path: transactions.csv
+        interactions_path: customer_interactions.csv
+        chunksize (int): Rows read per chunk
+
+    Returns:
+        dict: 'transactions' and 'interactions' aggregate frames
+    """
+    sources = {
+        'transactions': (transactions_path, ['company_id', 'amount', 'transaction_date'], transaction_aggregates),
+        'interactions': (interactions_path, ['company_id', 'interaction_id', 'interaction_date',
+                                             'satisfaction_score', 'nps_score'], interaction_aggregates),
+    }
+    aggregates = {}
+    for name, (path, columns, aggregate) in sources.items():
+        running, rows = None, 0
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            partial = aggregate(chunk)
+            running = partial if running is None else _merge_aggregates([running, partial])
+            rows += len(chunk)
+        aggregates[name] = running if running is not None else aggregate(pd.read_csv(path, usecols=columns, nrows=0))
+        logger.info(f"Aggregated {rows:,} {name} rows into {len(aggregates[name]):,} companies")
+    return aggregates
+
+
+def _score_chunk(companies: pd.DataFrame, tx_aggregates: pd.DataFrame, interaction_aggs: pd.DataFrame,
+                 model, scaler, reference_date) -> pd.DataFrame:
+    """Feature building and scoring of one company chunk (runs in a worker)."""
+    features = build_churn_features(companies, tx_aggregates, interaction_aggs, reference_date)
+    return score_churn_features(features, model, scaler)
+
+
+class BatchChurnScorer:
+    """
+    Chunked, parallel churn scoring that streams results to disk.
+
+    Chunks are dispatched in waves of a few per worker; each wave's results are
+    appended to the output file before the next wave starts, so memory holds at
+    most one wave of companies and scores.
+
+    Usage:
+        engine = ChurnPredictionEngine()
+        ...train...
+        scorer = BatchChurnScorer(engine.model, engine.scaler)
+        report = scorer.score_files('data/raw/companies.csv', 'data/raw/transactions.csv',
+                                    'data/raw/customer_interactions.csv')
+        report = scorer.score_features(store.snapshot())   # precomputed feature snapshot
+    """
+
+    def __init__(self, model, scaler, chunksize: int = 50_000, n_jobs: Optional[int] = None,
+                 chunks_per_worker: int = 2):
+        self.model = model
+        self.scaler = scaler
+        self.chunksize = chunksize
+        self.n_jobs = config.ml.n_jobs if n_jobs is None else n_jobs
+        self.chunks_per_worker = chunks_per_worker
+
+    def score(self, company_chunks: Iterable[pd.DataFrame], aggregates: Dict[str, pd.DataFrame],
+              output_path: Union[str, Path] = 'data/processed/churn_scores.csv', reference_date=None) -> dict:
+        """
+        Score an iterable of company chunks and stream results to a CSV.
+
+        The output is written to a temporary file and renamed when complete, so
+        readers never see a partial nightly run.
+
+        Args:
+            company_chunks: Iterable of company DataFrames (e.g. pd.read_csv(..., chunksize=...))
+            aggregates (dict): Output of load_churn_aggregates
+            output_path: Destination CSV in the processed store
+            reference_date: Date recency is measured from (default: latest activity in the aggregates)
+
+        Returns:
+            dict: rows, chunks, seconds, rows_per_second, risk_counts, output_path
+        """
+        tx_aggs, interaction_aggs = aggregates['transactions'], aggregates['interactions']
+        reference_date = pd.Timestamp(reference_date) if reference_date is not None \
+            else activity_reference_date(tx_aggs, interaction_aggs)
+
+        def task(chunk):
+            # Ship each worker only the aggregate rows of its own companies
+            ids = chunk['company_id']
+            return delayed(_score_chunk)(chunk, tx_aggs.reindex(ids).dropna(how='all'),
+                                         interaction_aggs.reindex(ids).dropna(how='all'),
+                                         self.model, self.scaler, reference_date)
+        return self._run(company_chunks, task, output_path)
+
+    def score_features(self, features: pd.DataFrame,
+                       output_path: Union[str, Path] = 'data/processed/churn_scores.csv') -> dict:
+        """Score a precomputed feature table (e.g. a ChurnFeatureStore snapshot) through the same pipeline."""
+        chunks = (features.iloc[start:start + self.chunksize] for start in range(0, len(features), self.chunksize))
+        return self._run(chunks, lambda chunk: delayed(score_churn_features)(chunk, self.model, self.scaler),
+                         output_path)
+
+    def _run(self, frames: Iterable[pd.DataFrame], task: Callable, output_path: Union[str, Path]) -> dict:
+        """Score chunks in waves of parallel tasks and stream the results to output_path."""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+        n_workers = max(1, effective_n_jobs(self.n_jobs))
+        wave_size = n_workers * self.chunks_per_worker
+
+        started = time.perf_counter()
+        rows, chunks = 0, 0
+        risk_counts = pd.Series(0, index=RISK_LABELS, dtype=np.int64)
+        header = True
+        with Parallel(n_jobs=n_workers, backend=config.ml.parallel_backend) as parallel:
+            for wave in _waves(frames, wave_size):
+                for result in parallel(task(chunk) for chunk in wave):
+                    result.to_csv(temp_path, mode='w' if header else 'a', header=header, index=False)
+                    header = False
+                    rows += len(result)
+                    chunks += 1
+                    risk_counts = risk_counts.add(result['risk_level'].value_counts(), fill_value=0)
+
+                elapsed = time.perf_counter() - started
+                logger.info(f"Scored {rows:,} companies in {chunks} chunks ({rows / max(elapsed, 1e-9):,.0f}/s)")
+
+        if header:
+            pd.DataFrame(columns=['company_id', 'company_name', 'churn_probability', 'churn_prediction',
+                                  'risk_level']).to_csv(temp_path, index=False)
+        os.replace(temp_path, output_path)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'rows': rows,
+            'chunks': chunks,
+            'workers': n_workers,
+            'seconds': elapsed,
+            'rows_per_second': rows / max(elapsed, 1e-9),
+            'risk_counts': risk_counts.astype(int).to_dict(),
+            'output_path': str(output_path),
+        }
+        print(f"  Scored {rows:,} companies in {elapsed:.2f}s "
+              f"({report['rows_per_second']:,.0f} companies/s, {chunks} chunks, {n_workers} worker(s))")
+        return report
+
+    def score_files(self, companies_path: Union[str, Path], transactions_path: Union[str, Path],
+                    interactions_path: Union[str, Path],
+                    output_path: Union[str, Path] = 'data/processed/churn_scores.csv',
+                    reference_date=None, aggregate_chunksize: int = 1_000_000) -> dict:
+        """Aggregate the raw CSVs in chunks, then score companies chunk by chunk."""
+        aggregates = load_churn_aggregates(transactions_path, interactions_path, aggregate_chunksize)
+        company_chunks = pd.read_csv(companies_path, chunksize=self.chunksize)
+        return self.score(company_chunks, aggregates, output_path, reference_date)
+
+    def score_frame(self, companies: pd.DataFrame, transactions: pd.DataFrame, interactions: pd.DataFrame,
+                    output_path: Union[str, Path] = 'data/processed/churn_scores.csv',
+                    reference_date=None) -> dict:
+        """Score in-memory frames through the same chunked pipeline."""
+        aggregates = {
+            'transactions': transaction_aggregates(transactions),
+            'interactions': interaction_aggregates(interactions),
+        }
+        chunks = (companies.iloc[start:start + self.chunksize] for start in range(0, len(companies), self.chunksize))
+        return self.score(chunks, aggregates, output_path, reference_date)
+
+
+def _waves(chunks: Iterable[pd.DataFrame], size: int):
+    """Group an iterable of chunks into lists of at most size chunks."""
+    wave = []
+    for chunk in chunks:
+        wave.append(chunk)
+        if len(wave) == size:
+            yield wave
+            wave = []
+    if wave:
+        yield wave
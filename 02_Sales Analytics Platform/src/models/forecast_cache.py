@@ -0,0 +1,208 @@
+"""
+Precomputed revenue forecast cache.
+
+Producing a forecast takes seconds (feature build plus a recursive predict
+loop), which is too slow to run on every dashboard click. Forecasts are
+instead computed once per (data version, model version, method) for the
+longest configured horizon, and shorter horizons are served as prefixes of it.
+Each entry is a small pickle written atomically, so any number of dashboard
+workers can read it in milliseconds.
+
+The key makes stale entries unreachable: new transactions change the data
+version and a promoted model changes the registry version, so a lookup never
+returns a forecast built from old inputs. precompute() also deletes entries
+that no longer match the current versions.
+
+Classes:
+    ForecastCache: Versioned on-disk cache of revenue forecasts
+"""
+from pathlib import Path
+from typing import Optional, Sequence
+import logging
+import os
+import pickle
+import time
+
+import pandas as pd
+
+from src.config import config
+from src.features.feature_store import data_version
+from src.models.advanced_ml import FORECAST_MODELS, SalesForecastingEngine
+from src.models.registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZONS = (7, 30, 90)
+
+
+class ForecastCache:
+    """
+    Revenue forecasts keyed by data version, model version, method and horizon.
+
+    Usage:
+        cache = ForecastCache(registry_path='models/')
+        cache.precompute(transactions)                      # after ETL or a model update
+        forecast = cache.get(data_version(transactions), 30) # in the dashboard
+    """
+
+    def __init__(self, path: str = 'data/processed/forecast_cache', registry_path: Optional[str] = None,
+                 horizons: Sequence[int] = DEFAULT_HORIZONS):
+        self.path = Path(path)
+        self.registry = ModelRegistry(registry_path or config.ml.model_path)
+        self.horizons = tuple(sorted(horizons))
+        self._memory = {}
+
+    def model_version(self, method: str = 'recursive') -> Optional[str]:
+        """Current registry version of the model behind a forecast method."""
+        return self.registry.current_version(FORECAST_MODELS[method])
+
+    def get(self, version: str, days_ahead: int, method: str = 'recursive') -> Optional[pd.DataFrame]:
+        """
+        Cached forecast for the current model, or None on a miss.
+
+        Args:
+            version (str): Data version of the transactions the forecast should reflect
+            days_ahead (int): Horizon; served from the shortest cached horizon covering it
+            method (str): 'recursive' or 'direct'
+
+        Returns:
+            pd.DataFrame: date, predicted_revenue, day_of_forecast (None if not cached)
+        """
+        model_version = self.model_version(method)
+        if model_version is None:
+            return None
+        for horizon in self._covering_horizons(days_ahead):
+            forecast = self._read((version, model_version, method, horizon))
+            if forecast is not None:
+                return forecast.head(days_ahead).copy()
+        return None
+
+    def get_or_compute(self, transactions_df: pd.DataFrame, days_ahead: int, method: str = 'recursive',
+                       version: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Cached forecast, computing and storing it on a miss (read-through).
+
+        Returns None when no model is registered for the method.
+        """
+        version = version or data_version(transactions_df)
+        forecast = self.get(version, days_ahead, method)
+        if forecast is None and self.model_version(method) is not None:
+            self.precompute(transactions_df, methods=(method,), horizons=(max(days_ahead, *self.horizons),),
+                            version=version, prune=False)
+            forecast = self.get(version, days_ahead, method)
+        return forecast
+
+    def precompute(self, transactions_df: pd.DataFrame, methods: Sequence[str] = ('recursive',),
+                   horizons: Optional[Sequence[int]] = None, engine=None, version: Optional[str] = None,
+                   prune: bool = True) -> dict:
+        """
+        Compute and store forecasts for the current data and registered models.
+
+        One forecast of the longest horizon is produced per method; every
+        configured horizon is stored as a prefix of it.
+
+        Args:
+            transactions_df (pd.DataFrame): All transactions known so far
+            methods (sequence): Forecast methods with a registered model to cache
+            horizons (sequence): Horizons to store (default: the cache's horizons)
+            engine: SalesForecastingEngine to forecast with (default: one attached
+                to the registry, so it uses exactly the registered versions)
+            version (str): Precomputed data version of transactions_df
+            prune (bool): Delete entries for other data or model versions
+
+        Returns:
+            dict: method -> seconds spent computing (methods without a model are skipped)
+        """
+        horizons = tuple(sorted(horizons or self.horizons))
+        version = version or data_version(transactions_df)
+        if engine is None:
+            engine = SalesForecastingEngine()
+            engine.load_models(str(self.registry.root))
+
+        timings = {}
+        for method in methods:
+            model_version = self.model_version(method)
+            if model_version is None:
+                logger.warning(f"No registered {FORECAST_MODELS[method]}; skipping {method} forecasts")
+                continue
+            start = time.perf_counter()
+            forecast = engine.forecast_revenue(transactions_df, days_ahead=horizons[-1], method=method)
+            for horizon in horizons:
+                self._write((version, model_version, method, horizon), forecast.head(horizon))
+            timings[method] = time.perf_counter() - start
+            logger.info(f"Cached {method} forecasts for horizons {horizons} "
+                        f"(data {version}, model {model_version}) in {timings[method]:.2f}s")
+
+        if prune:
+            self.invalidate(version)
+        return timings
+
+    def invalidate(self, current_data_version: Optional[str] = None) -> int:
+        """
+        Delete entries built from other data or model versions.
+
+        Args:
+            current_data_version (str): Data version to keep (None deletes every entry)
+
+        Returns:
+            int: Number of entries removed
+        """
+        current_models = {method: self.model_version(method) for method in FORECAST_MODELS}
+        removed = 0
+        for file in self.path.glob('*.pkl') if self.path.exists() else []:
+            key = _parse_key(file.stem)
+            if key is not None and key[0] == current_data_version and current_models.get(key[2]) == key[1]:
+                continue
+            file.unlink(missing_ok=True)
+            self._memory.pop(key, None)
+            removed += 1
+        if removed:
+            logger.info(f"Invalidated {removed} stale forecast cache entries")
+        return removed
+
+    def _covering_horizons(self, days_ahead: int):
+        """Configured horizons covering days_ahead, then longer ones computed on demand"""
+        covering = [horizon for horizon in self.horizons if horizon >= days_ahead]
+        yield from covering
+        if self.path.exists():
+            stored = {key[3] for key in (_parse_key(file.stem) for file in self.path.glob('*.pkl')) if key}
+            yield from sorted(horizon for horizon in stored - set(covering) if horizon >= days_ahead)
+
+    def _file(self, key: tuple) -> Path:
+        return self.path / f"{'__'.join(map(str, key))}.pkl"
+
+    def _read(self, key: tuple) -> Optional[pd.DataFrame]:
+        if key in self._memory:
+            return self._memory[key]
+        try:
+            with open(self._file(key), 'rb') as f:
+                forecast = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        self._memory[key] = forecast
+        return forecast
+
+    def _write(self, key: tuple, forecast: pd.DataFrame):
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self._file(key)
+        temp = file.with_suffix('.tmp')
+        with open(temp, 'wb') as f:
+            pickle.dump(forecast.reset_index(drop=True), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, file)
+        self._memory[key] = forecast.reset_index(drop=True)
+
+
+def _parse_key(stem: str) -> Optional[tuple]:
+    """(data_version, model_version, method, horizon) from an entry's file name"""
+    parts = stem.split('__')
+    if len(parts) != 4 or not parts[3].isdigit():
+        return None
+    return parts[0], parts[1], parts[2], int(parts[3])
+
+
+if __name__ == "__main__":
+    # Run after the ETL refresh or a model update
+    transactions = pd.read_csv('data/raw/transactions.csv', parse_dates=['transaction_date'])
+    cache = ForecastCache()
+    timings = cache.precompute(transactions, methods=tuple(FORECAST_MODELS))
+    print(f"[OK] Precomputed forecasts for {', '.join(timings) or 'no registered models'}")
@@ -0,0 +1,335 @@
+"""
+Hierarchical revenue forecasting across region, channel and product.
+
+Order-level sales are pivoted into bottom-level daily series (region x channel
+x product, with products outside the top N pooled into 'Other'). Every series
+of the hierarchy - total, each region, channel and product, each region x
+channel pair and each bottom series - gets a base forecast from a seasonal
+ridge regression of log revenue on trend, day-of-week and month terms
+(multiplicative seasonality, retransformed with Duan's smearing estimate).
+Series are fitted in
+column blocks (one closed-form multi-output solve per block) spread over
+worker processes, so thousands of series fit in seconds.
+
+Base forecasts of different levels do not add up, so they are reconciled with
+the summing matrix S (aggregate series = S @ bottom series):
+
+    bottom_up   keep bottom forecasts, sum them up
+    ols         y~ = S (S'S)^-1 S' y^
+    wls_struct  y~ = S (S'WS)^-1 S'W y^, W = diag(1 / number of bottom series)
+
+The result is coherent: every region, channel and product forecast equals the
+sum of its bottom series, and the total equals the sum of any level.
+
+Classes:
+    Hierarchy: Bottom-level series matrix, summing matrix and series labels
+    HierarchicalForecaster: Parallel base forecasts and reconciliation
+
+Functions:
+    build_hierarchy: Pivot order data into a Hierarchy
+"""
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Optional, Sequence
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy import sparse
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_METHODS = ('bottom_up', 'ols', 'wls_struct')
+
+OTHER_PRODUCTS = 'Other'
+
+
+@dataclass
+class Hierarchy:
+    """
+    Daily bottom-level series and the structure that aggregates them.
+
+    Attributes:
+        dates: Daily DatetimeIndex of the history
+        bottom: [n_days, n_bottom] revenue matrix
+        summing: Sparse [n_series, n_bottom] 0/1 summing matrix S
+        series: One row per series with level, region, channel and product labels
+            (aggregated dimensions hold 'All'); the last n_bottom rows are the bottom level
+    """
+    dates: pd.DatetimeIndex
+    bottom: np.ndarray
+    summing: sparse.csr_matrix
+    series: pd.DataFrame
+
+    @property
+    def n_bottom(self) -> int:
+        return self.bottom.shape[1]
+
+    def all_series(self) -> np.ndarray:
+        """[n_days, n_series] history of every series (Y_bottom S')."""
+        return np.asarray(self.summing @ self.bottom.T).T
+
+
+def build_hierarchy(df: pd.DataFrame, date_col: str = 'date', value_col: str = 'revenue',
+                    dims: Sequence[str] = ('region', 'channel'), product_col: Optional[str] = 'product_id',
+                    top_products: int = 20) -> Hierarchy:
+    """
+    Pivot order data into bottom-level daily series and a summing matrix.
+
+    Args:
+        df (pd.DataFrame): Order-level data (sales_data.csv schema)
+        date_col (str): Order date column
+        value_col (str): Revenue column
+        dims: Crossed dimensions of the hierarchy
+        product_col (str, optional): Product column; None forecasts dims only
+        top_products (int): Products kept as their own series (by total revenue)
+
+    Returns:
+        Hierarchy: Bottom series, summing matrix and labels
+    """
+    dims = list(dims)
+    keys = df[dims].astype(str).copy()
+    if product_col is not None:
+        revenue_by_product = df.groupby(product_col)[value_col].sum()
+        top = revenue_by_product.nlargest(top_products).index
+        products = df[product_col].where(df[product_col].isin(top), OTHER_PRODUCTS).astype(str)
+        keys[product_col] = products.to_numpy()
+        dims = dims + [product_col]
+
+    dates = pd.to_datetime(df[date_col]).dt.normalize()
+    frame = keys.assign(date=dates.to_numpy(), value=df[value_col].to_numpy(dtype=np.float64))
+    pivot = frame.pivot_table(index='date', columns=dims, values='value', aggfunc='sum', fill_value=0.0)
+    pivot = pivot.asfreq('D', fill_value=0.0)
+
+    bottom_labels = pivot.columns.to_frame(index=False)
+    blocks, labels = [], []
+    # All aggregation levels: every subset of dims from the total down to the bottom level
+    for size in range(len(dims) + 1):
+        for level in map(list, combinations(dims, size)):
+            codes, uniques = _group_codes(bottom_labels, level)
+            blocks.append(sparse.csr_matrix(
+                (np.ones(len(codes)), (codes, np.arange(len(codes)))), shape=(len(uniques), len(codes))
+            ))
+            level_labels = pd.DataFrame({dim: 'All' for dim in dims}, index=range(len(uniques)))
+            for dim in level:
+                level_labels[dim] = uniques[dim].to_numpy()
+            level_labels.insert(0, 'level', '/'.join(level) if level else 'total')
+            labels.append(level_labels)
+
+    series = pd.concat(labels, ignore_index=True)
+    summing = sparse.vstack(blocks).tocsr()
+    logger.info(f"Hierarchy: {pivot.shape[1]:,} bottom series, {len(series):,} series in total, "
+                f"{len(pivot):,} days")
+    return Hierarchy(pivot.index, pivot.to_numpy(dtype=np.float64), summing, series)
+
+
+def _group_codes(labels: pd.DataFrame, level):
+    """Group number of each bottom series at an aggregation level, plus the group labels."""
+    if not level:
+        return np.zeros(len(labels), dtype=np.int64), pd.DataFrame(index=[0])
+    codes = labels.groupby(level, sort=True).ngroup().to_numpy()
+    uniques = labels[level].drop_duplicates().sort_values(level).reset_index(drop=True)
+    return codes, uniques
+
+
+def _seasonal_design(dates: pd.DatetimeIndex, origin: pd.Timestamp) -> np.ndarray:
+    """Intercept, linear trend (years since origin), day-of-week and month dummies."""
+    trend = ((dates - origin).days.to_numpy(dtype=np.float64) / 365.25)[:, None]
+    dow = np.eye(7)[dates.dayofweek.to_numpy()][:, 1:]
+    month = np.eye(12)[dates.month.to_numpy() - 1][:, 1:]
+    return np.hstack([np.ones((len(dates), 1)), trend, dow, month])
+
+
+def _fit_block(X_train: np.ndarray, Y_block: np.ndarray, X_future: np.ndarray, alpha: float,
+               log_transform: bool = True):
+    """
+    Closed-form ridge fit of many series sharing one design matrix (runs in a worker).
+
+    Returns:
+        tuple: (future forecasts [horizon, n], in-sample residual variance [n])
+    """
+    target = np.log1p(np.clip(Y_block, 0, None)) if log_transform else Y_block
+    penalty = alpha * np.eye(X_train.shape[1])
+    penalty[0, 0] = 0.0  # do not shrink the intercept
+    coef = np.linalg.solve(X_train.T @ X_train + penalty, X_train.T @ target)
+    residuals = target - X_train @ coef
+    forecasts = X_future @ coef
+    if log_transform:
+        smearing = np.exp(residuals).mean(axis=0)
+        forecasts = np.exp(forecasts) * smearing - 1.0
+    return forecasts, residuals.var(axis=0)
+
+
+def _solve_normal_equations(S: sparse.csr_matrix, weights: np.ndarray, rhs: np.ndarray,
+                            tol: float = 1e-10, max_iter: int = 1000) -> np.ndarray:
+    """
+    Solve (S'WS) X = rhs for all right-hand-side columns at once.
+
+    S'WS is dense whenever the hierarchy has a total row, so it is never formed:
+    a Jacobi-preconditioned conjugate gradient runs on every column together
+    using only sparse products with S. With structural weights the matrix's
+    eigenvalues lie between 1 and the number of levels, so few iterations are needed.
+    """
+    def apply(X):
+        return S.T @ (weights[:, None] * (S @ X))
+
+    inv_diag = 1.0 / (S.T @ weights)[:, None]
+    X = np.zeros_like(rhs)
+    R = rhs.copy()
+    Z = inv_diag * R
+    P = Z.copy()
+    rz = np.einsum('ij,ij->j', R, Z)
+    threshold = tol * np.maximum(np.linalg.norm(rhs, axis=0), 1e-12)
+    for _ in range(max_iter):
+        if np.all(np.linalg.norm(R, axis=0) <= threshold):
+            break
+        AP = apply(P)
+        step = rz / np.maximum(np.einsum('ij,ij->j', P, AP), 1e-300)
+        X += step * P
+        R -= step * AP
+        Z = inv_diag * R
+        rz_next = np.einsum('ij,ij->j', R, Z)
+        P = Z + (rz_next / np.maximum(rz, 1e-300)) * P
+        rz = rz_next
+    else:
+        logger.warning("Reconciliation solve did not fully converge")
+    return X
+
+
+class HierarchicalForecaster:
+    """
+    Reconciled forecasts for every level of a region/channel/product hierarchy.
+
+    Usage:
+        forecaster = HierarchicalForecaster(top_products=20)
+        result = forecaster.forecast(sales_df, days_ahead=30)
+        result[result['level'] == 'region']
+    """
+
+    def __init__(self, dims: Sequence[str] = ('region', 'channel'), product_col: Optional[str] = 'product_id',
+                 top_products: int = 20, reconciliation: str = 'wls_struct', alpha: float = 1.0,
+                 history_days: Optional[int] = 730, block_size: int = 256, log_transform: bool = True,
+                 n_jobs: Optional[int] = None):
+        if reconciliation not in RECONCILIATION_METHODS:
+            raise ValueError(f"Unknown reconciliation '{reconciliation}'. Use one of {RECONCILIATION_METHODS}")
+        self.dims = list(dims)
+        self.product_col = product_col
+        self.top_products = top_products
+        self.reconciliation = reconciliation
+        self.alpha = alpha
+        self.history_days = history_days
+        self.block_size = block_size
+        self.log_transform = log_transform
+        self.n_jobs = config.ml.n_jobs if n_jobs is None else n_jobs
+        self.hierarchy = None
+        self.timings = {}
+
+    def fit_hierarchy(self, df: pd.DataFrame, date_col: str = 'date', value_col: str = 'revenue') -> Hierarchy:
+        """Build (and keep) the hierarchy from order data."""
+        self.hierarchy = build_hierarchy(df, date_col, value_col, self.dims, self.product_col, self.top_products)
+        return self.hierarchy
+
+    def base_forecasts(self, Y: np.ndarray, dates: pd.DatetimeIndex, days_ahead: int):
+        """
+        Independent base forecasts for the columns of Y, fitted block-wise in parallel.
+
+        Returns:
+            tuple: (forecasts [days_ahead, n_series], future dates, residual variance [n_series])
+        """
+        if self.history_days is not None and len(dates) > self.history_days:
+            Y, dates = Y[-self.history_days:], dates[-self.history_days:]
+        future_dates = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=days_ahead, freq='D')
+        X_train = _seasonal_design(dates, dates[0])
+        X_future = _seasonal_design(future_dates, dates[0])
+
+        blocks = [slice(start, min(start + self.block_size, Y.shape[1]))
+                  for start in range(0, Y.shape[1], self.block_size)]
+        n_workers = max(1, min(len(blocks), effective_n_jobs(self.n_jobs)))
+        results = Parallel(n_jobs=n_workers, backend=config.ml.parallel_backend)(
+            delayed(_fit_block)(X_train, Y[:, block], X_future, self.alpha, self.log_transform) for block in blocks
+        )
+        forecasts = np.hstack([forecast for forecast, _ in results])
+        variances = np.concatenate([variance for _, variance in results])
+        return forecasts, future_dates, variances
+
+    def reconcile(self, base: np.ndarray) -> np.ndarray:
+        """
+        Make base forecasts of all series coherent.
+
+        Args:
+            base: [horizon, n_series] base forecasts in hierarchy series order
+
+        Returns:
+            np.ndarray: [horizon, n_series] reconciled forecasts
+        """
+        S = self.hierarchy.summing
+        if self.reconciliation == 'bottom_up':
+            bottom = base[:, -self.hierarchy.n_bottom:]
+        else:
+            if self.reconciliation == 'ols':
+                weights = np.ones(S.shape[0])
+            else:
+                weights = 1.0 / np.asarray(S.sum(axis=1)).ravel()
+            rhs = S.T @ (weights[:, None] * base.T)
+            bottom = _solve_normal_equations(S, weights, rhs).T
+        return np.asarray(S @ bottom.T).T
+
+    def forecast(self, df: Optional[pd.DataFrame] = None, days_ahead: int = 30, date_col: str = 'date',
+                 value_col: str = 'revenue', non_negative: bool = True) -> pd.DataFrame:
+        """
+        Forecast every series of the hierarchy and reconcile.
+
+        Args:
+            df (pd.DataFrame, optional): Order data; None reuses the last hierarchy
+            days_ahead (int): Forecast horizon in days
+            date_col (str): Order date column
+            value_col (str): Revenue column
+            non_negative (bool): Clip negative bottom forecasts before re-aggregating
+
+        Returns:
+            pd.DataFrame: Long format with date, level, dimension labels,
+                base_forecast and forecast (reconciled) for every series
+        """
+        started = time.perf_counter()
+        if df is not None:
+            self.fit_hierarchy(df, date_col, value_col)
+        if self.hierarchy is None:
+            raise ValueError("No hierarchy built. Pass order data to forecast or call fit_hierarchy first.")
+        hierarchy = self.hierarchy
+        self.timings['hierarchy'] = time.perf_counter() - started
+
+        step = time.perf_counter()
+        base, future_dates, _ = self.base_forecasts(hierarchy.all_series(), hierarchy.dates, days_ahead)
+        self.timings['base_forecasts'] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        reconciled = self.reconcile(base)
+        if non_negative:
+            bottom = np.clip(reconciled[:, -hierarchy.n_bottom:], 0, None)
+            reconciled = np.asarray(hierarchy.summing @ bottom.T).T
+        self.timings['reconciliation'] = time.perf_counter() - step
+        self.timings['total'] = time.perf_counter() - started
+
+        n_series = len(hierarchy.series)
+        result = hierarchy.series.loc[np.tile(np.arange(n_series), days_ahead)].reset_index(drop=True)
+        result.insert(0, 'date', np.repeat(future_dates.to_numpy(), n_series))
+        result['base_forecast'] = base.ravel()
+        result['forecast'] = reconciled.ravel()
+        logger.info(f"Forecast {n_series:,} series x {days_ahead} days in {self.timings['total']:.2f}s "
+                    f"({self.reconciliation} reconciliation)")
+        return result
+
+
+if __name__ == "__main__":
+    sales = pd.read_csv('data/processed/sales_transformed.csv', parse_dates=['date'])
+    forecaster = HierarchicalForecaster()
+    result = forecaster.forecast(sales, days_ahead=30)
+    result.to_csv('data/processed/hierarchical_forecast.csv', index=False)
+    totals = result[result['level'] == 'total']
+    print(f"[OK] Hierarchical forecast: {result['level'].nunique()} levels, "
+          f"{len(forecaster.hierarchy.series):,} series in {forecaster.timings['total']:.2f}s")
+    print(f"  Next 30 days total revenue: ${totals['forecast'].sum():,.2f}")
@@ -0,0 +1,289 @@
+"""
+Online churn model updates.
+
+The batch churn model is refit from scratch on full feature tables. This module
+keeps an incrementally trained challenger instead: new batches of transactions
+and interactions are folded into running per-company aggregates, and a
+logistic model takes one ``partial_fit`` step on the features rebuilt from them.
+
+Labels depend on recency, so every update re-featurizes the whole company
+population at one reference date (the latest activity seen so far). A company
+that did not appear in the batch still ages, and is labeled churned once it
+crosses the inactivity threshold; featurizing only the companies in the batch
+would measure each from its own fresh activity and never yield a positive.
+
+Every batch is first used to evaluate (test-then-train): the challenger and the
+currently serving champion are scored on the population before the challenger
+learns from it. The challenger is promoted when, over the last few batches, it
+beats the champion's rolling log loss without losing ROC AUC. Batches with only
+one class have no AUC and block promotion, so a model that learned to predict
+"never churns" from a run of churn-free batches is not promoted. Promotions
+can be registered as new versions in the model registry.
+
+Classes:
+    OnlineFeatureScaler: log1p + incremental standardization of churn features
+    OnlineChurnModel: partial_fit churn model with rolling champion/challenger evaluation
+"""
+from collections import deque
+from copy import deepcopy
+from typing import Optional
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import log_loss, roc_auc_score
+from sklearn.preprocessing import StandardScaler
+
+from src.config import config
+from src.features.churn_store import latest_activity_date
+from src.models.churn_scoring import (
+    CHURN_FEATURES, _merge_aggregates, activity_reference_date, build_churn_features,
+    interaction_aggregates, score_churn_features, transaction_aggregates
+)
+
+logger = logging.getLogger(__name__)
+
+CLASSES = np.array([0, 1])
+
+# Heavy-tailed, non-negative features that are log-transformed for the linear model
+LOG_FEATURES = ['annual_revenue', 'employees', 'total_revenue', 'avg_transaction',
+                'transaction_count', 'days_since_last_transaction', 'interaction_count']
+
+
+class OnlineFeatureScaler:
+    """
+    Scaler for the online model: log1p of heavy-tailed features, then a
+    StandardScaler updated with partial_fit. Exposes transform() so it can be
+    used wherever the batch model's scaler is (score_churn_features, batch scoring).
+    """
+
+    def __init__(self):
+        self.scaler = StandardScaler()
+        self._log_mask = np.array([col in LOG_FEATURES for col in CHURN_FEATURES])
+
+    def _prepare(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64).copy()
+        X[:, self._log_mask] = np.log1p(np.clip(X[:, self._log_mask], 0, None))
+        return X
+
+    def partial_fit(self, X) -> 'OnlineFeatureScaler':
+        self.scaler.partial_fit(self._prepare(X))
+        return self
+
+    def transform(self, X) -> np.ndarray:
+        return self.scaler.transform(self._prepare(X))
+
+
+class OnlineChurnModel:
+    """
+    Incrementally updated churn model with rolling promotion.
+
+    Usage:
+        online = OnlineChurnModel(champion=(engine.model, engine.scaler))
+        online.bootstrap(companies, transactions, interactions)
+        report = online.update(companies, new_transactions, new_interactions)
+        if report['promoted']:
+            engine.model, engine.scaler = online.champion
+    """
+
+    def __init__(self, alpha: float = 1e-4, window: int = 5, min_batches: int = 3,
+                 min_improvement: float = 0.0, champion=None, registry=None,
+                 registry_name: str = 'churn_model'):
+        self.model = SGDClassifier(loss='log_loss', alpha=alpha, random_state=config.ml.random_state)
+        self.scaler = OnlineFeatureScaler()
+        self.window = window
+        self.min_batches = min_batches
+        self.min_improvement = min_improvement
+        self.champion = champion
+        self.registry = registry
+        self.registry_name = registry_name
+        self.aggregates = {'transactions': None, 'interactions': None}
+        self.history = []
+        self.reference_date = None
+        self._candidate_losses = deque(maxlen=window)
+        self._champion_losses = deque(maxlen=window)
+        self._candidate_aucs = deque(maxlen=window)
+        self._champion_aucs = deque(maxlen=window)
+        self._batches = 0
+
+    @property
+    def is_fitted(self) -> bool:
+        return hasattr(self.model, 'coef_')
+
+    def bootstrap(self, companies: pd.DataFrame, transactions: pd.DataFrame, interactions: pd.DataFrame,
+                  reference_date=None) -> dict:
+        """
+        Seed the running aggregates with the full history and fit on every company once.
+
+        Later update() calls then only need the new rows. Recency is measured
+        from reference_date (default: the latest activity in the history).
+        """
+        self.reference_date = pd.Timestamp(reference_date if reference_date is not None
+                                           else latest_activity_date(transactions, interactions))
+        self.aggregates = {
+            'transactions': transaction_aggregates(transactions),
+            'interactions': interaction_aggregates(interactions),
+        }
+        features = build_churn_features(companies, self.aggregates['transactions'],
+                                        self.aggregates['interactions'], self.reference_date)
+        return self.partial_fit(features)
+
+    def update(self, companies: pd.DataFrame, transactions: Optional[pd.DataFrame] = None,
+               interactions: Optional[pd.DataFrame] = None, reference_date=None) -> dict:
+        """
+        Fold a batch of new transactions/interactions into the model.
+
+        The batch updates the running aggregates; then every company is
+        re-featurized and labeled at the same reference date, so companies
+        missing from the batch age and can cross the churn threshold.
+
+        Args:
+            companies (pd.DataFrame): Company records (the full population)
+            transactions (pd.DataFrame, optional): New transactions since the last update
+            interactions (pd.DataFrame, optional): New interactions since the last update
+            reference_date: Date recency is measured from (default: the latest activity
+                seen so far, so replayed or backfilled batches are labeled as of their
+                own time rather than the wall clock). Never moves backwards.
+
+        Returns:
+            dict: Batch report (see partial_fit)
+        """
+        batch = {'transactions': transactions, 'interactions': interactions}
+        for name, aggregate in (('transactions', transaction_aggregates), ('interactions', interaction_aggregates)):
+            if batch[name] is not None and len(batch[name]):
+                self.aggregates[name] = _merge_aggregates([self.aggregates[name], aggregate(batch[name])])
+
+        if reference_date is None:
+            try:
+                reference_date = activity_reference_date(self._aggregate('transactions'),
+                                                         self._aggregate('interactions'))
+            except ValueError:
+                return self.partial_fit(companies.iloc[:0])
+        reference_date = pd.Timestamp(reference_date)
+        if self.reference_date is None or reference_date > self.reference_date:
+            self.reference_date = reference_date
+        features = build_churn_features(companies, self._aggregate('transactions'),
+                                        self._aggregate('interactions'), self.reference_date)
+        return self.partial_fit(features)
+
+    def partial_fit(self, features_df: pd.DataFrame) -> dict:
+        """
+        Evaluate on a labeled feature batch, then update the model with it.
+
+        Args:
+            features_df (pd.DataFrame): Rows with CHURN_FEATURES and is_churned
+
+        Returns:
+            dict: rows, positives, candidate/champion log loss and ROC AUC on the
+                batch, rolling means, update time and whether a promotion happened
+        """
+        report = {'batch': self._batches + 1, 'rows': len(features_df), 'reference_date': self.reference_date,
+                  'promoted': False}
+        if features_df.empty:
+            return report
+        X = features_df[CHURN_FEATURES].fillna(0).to_numpy(dtype=np.float64)
+        y = features_df['is_churned'].to_numpy()
+        report['positives'] = int(y.sum())
+
+        # Test, then train
+        if self.is_fitted:
+            report.update(_batch_metrics('candidate', y, self.model.predict_proba(self.scaler.transform(X))[:, 1]))
+            self._candidate_losses.append(report['candidate_log_loss'])
+            self._candidate_aucs.append(report['candidate_roc_auc'])
+        if self.champion is not None:
+            champion_model, champion_scaler = self.champion
+            report.update(_batch_metrics('champion', y, champion_model.predict_proba(champion_scaler.transform(X))[:, 1]))
+            self._champion_losses.append(report['champion_log_loss'])
+            self._champion_aucs.append(report['champion_roc_auc'])
+
+        started = time.perf_counter()
+        self.scaler.partial_fit(X)
+        self.model.partial_fit(self.scaler.transform(X), y, classes=CLASSES, sample_weight=_balanced_weights(y))
+        report['update_time'] = time.perf_counter() - started
+        self._batches += 1
+
+        if self.champion is None:
+            # The first champion still has to have seen both classes
+            if len(np.unique(y)) == 2:
+                self.promote()
+                report['promoted'] = True
+        elif self._should_promote():
+            self.promote()
+            report['promoted'] = True
+        report['candidate_rolling_log_loss'] = _mean(self._candidate_losses)
+        report['champion_rolling_log_loss'] = _mean(self._champion_losses)
+
+        self.history.append(report)
+        return report
+
+    def promote(self) -> Optional[str]:
+        """
+        Make a snapshot of the current online model the serving champion.
+
+        Returns:
+            str: Registry version when a registry is configured
+        """
+        self.champion = (deepcopy(self.model), deepcopy(self.scaler))
+        self._champion_losses = deque(self._candidate_losses, maxlen=self.window)
+        self._champion_aucs = deque(self._candidate_aucs, maxlen=self.window)
+        logger.info(f"Promoted online churn model after {self._batches} batch(es)")
+        if self.registry is None:
+            return None
+        return self.registry.register(self.registry_name, self.champion[0], self.champion[1], metadata={
+            'feature_cols': CHURN_FEATURES,
+            'metrics': {'rolling_log_loss': _mean(self._candidate_losses),
+                        'rolling_roc_auc': _mean(self._candidate_aucs)},
+            'training': 'online',
+            'batches': self._batches,
+        })
+
+    def predict_churn_risk(self, features_df: pd.DataFrame) -> pd.DataFrame:
+        """Score with the serving champion (same output as ChurnPredictionEngine.predict_churn_risk)."""
+        if self.champion is None:
+            raise ValueError("Online churn model has not been trained. Call partial_fit or update first.")
+        model, scaler = self.champion
+        return score_churn_features(features_df, model, scaler).sort_values('churn_probability', ascending=False)
+
+    def history_frame(self) -> pd.DataFrame:
+        """Per-batch evaluation and promotion history."""
+        return pd.DataFrame(self.history)
+
+    def _should_promote(self) -> bool:
+        if len(self._candidate_losses) < self.min_batches or len(self._champion_losses) < self.min_batches:
+            return False
+        # Single-class batches (NaN AUC) say nothing about ranking churners; never promote on them
+        if np.isnan(self._candidate_aucs).any() or np.isnan(self._champion_aucs).any():
+            return False
+        candidate, champion = _mean(self._candidate_losses), _mean(self._champion_losses)
+        return (candidate < champion * (1 - self.min_improvement)
+                and _mean(self._candidate_aucs) >= _mean(self._champion_aucs))
+
+    def _aggregate(self, name: str) -> pd.DataFrame:
+        if self.aggregates[name] is not None:
+            return self.aggregates[name]
+        empty = {'transactions': transaction_aggregates, 'interactions': interaction_aggregates}[name]
+        columns = {'transactions': ['company_id', 'amount', 'transaction_date'],
+                   'interactions': ['company_id', 'interaction_id', 'interaction_date', 'satisfaction_score',
+                                    'nps_score']}[name]
+        return empty(pd.DataFrame(columns=columns))
+
+
+def _balanced_weights(y: np.ndarray) -> np.ndarray:
+    """Per-row weights equivalent to class_weight='balanced' within the batch."""
+    counts = np.bincount(y, minlength=2).astype(np.float64)
+    present = counts > 0
+    weights = np.zeros(2)
+    weights[present] = len(y) / (present.sum() * counts[present])
+    return weights[y]
+
+
+def _batch_metrics(prefix: str, y: np.ndarray, probabilities: np.ndarray) -> dict:
+    metrics = {f'{prefix}_log_loss': log_loss(y, np.clip(probabilities, 1e-6, 1 - 1e-6), labels=CLASSES)}
+    metrics[f'{prefix}_roc_auc'] = roc_auc_score(y, probabilities) if len(np.unique(y)) == 2 else np.nan
+    return metrics
+
+
+def _mean(values) -> float:
+    return float(np.mean(values)) if len(values) else np.nan
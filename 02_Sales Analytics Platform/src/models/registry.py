@@ -0,0 +1,321 @@
+"""
+Versioned model registry.
+
+Every registered model version is an immutable directory holding the estimator,
+an optional scaler and a metadata.json (features, metrics, data version,
+training time). A per-model CURRENT file points at the active version and is
+replaced atomically, so promoting or rolling back a version is one rename and
+readers never see a half-written model.
+
+    models/
+        revenue_forecaster/
+            CURRENT                     -> "20260419T101500123456"
+            20260419T101500123456/
+                model.joblib
+                scaler.joblib
+                metadata.json
+
+Artifacts are loaded lazily on first access and opened with joblib memory
+mapping, so plain numpy arrays inside them (linear model coefficients,
+HistGradientBoosting node arrays) are shared through the page cache by every
+dashboard worker that loads the same version. Decision trees are the
+exception: sklearn's Tree rebuilds its node array in private memory when it
+is unpickled, so RandomForest and GradientBoosting models (the bulk of a
+forest's size) are still copied into each process. Handles re-check the
+CURRENT pointer on access, which hot-swaps a newly promoted version without a
+restart.
+
+Classes:
+    ModelRegistry: Register, promote and load model versions
+    ModelHandle: Lazily loaded, auto-refreshing view of a model's current version
+    RegistryMapping: dict-like access to the current models of a registry
+"""
+from collections.abc import MutableMapping
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import joblib
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = 'CURRENT'
+METADATA_FILE = 'metadata.json'
+COMPONENTS = ('model', 'scaler')
+
+
+class ModelRegistry:
+    """
+    File-system model registry with versioned artifacts and an atomic current pointer.
+
+    Usage:
+        registry = ModelRegistry('models/')
+        version = registry.register('churn_model', model, scaler, metadata={'metrics': {'roc_auc': 0.91}})
+        model = registry.handle('churn_model').model
+    """
+
+    def __init__(self, root: Optional[str] = None, mmap: bool = True, check_interval: float = 1.0):
+        """
+        Args:
+            root (str, optional): Registry directory (default: config.ml.model_path)
+            mmap (bool): Memory-map numpy arrays when loading. Tree ensembles
+                (RandomForest, GradientBoosting) do not benefit: their trees are
+                copied into process memory on unpickling regardless
+            check_interval (float): Seconds between CURRENT pointer re-checks in handles
+        """
+        self.root = Path(root or config.ml.model_path)
+        self.mmap_mode = 'r' if mmap else None
+        self.check_interval = check_interval
+        self._artifacts = {}
+        self._handles = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, model, scaler=None, metadata: Optional[Dict[str, Any]] = None,
+                 activate: bool = True) -> str:
+        """
+        Store a new immutable model version.
+
+        Args:
+            name (str): Model name, e.g. 'revenue_forecaster'
+            model: Fitted estimator
+            scaler: Fitted scaler used for the model's inputs (optional)
+            metadata (dict): JSON-serializable details; feature_cols, metrics,
+                data_version and training_time are the conventional keys
+            activate (bool): Point CURRENT at the new version
+
+        Returns:
+            str: Version identifier
+        """
+        model_dir = self.root / name
+        model_dir.mkdir(parents=True, exist_ok=True)
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        while (model_dir / version).exists():
+            version += '_1'
+
+        staging = model_dir / f'.staging-{version}'
+        staging.mkdir()
+        try:
+            # Uncompressed dumps keep numpy arrays memory-mappable
+            joblib.dump(model, staging / 'model.joblib')
+            if scaler is not None:
+                joblib.dump(scaler, staging / 'scaler.joblib')
+            # Reserved keys are written last so carried-over metadata cannot overwrite them
+            record = {
+                **(metadata or {}),
+                'name': name,
+                'version': version,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'estimator': type(model).__name__,
+                'has_scaler': scaler is not None,
+            }
+            with open(staging / METADATA_FILE, 'w') as f:
+                json.dump(record, f, indent=2, default=_json_default)
+            os.replace(staging, model_dir / version)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info(f"Registered {name} version {version}")
+        if activate:
+            self.promote(name, version)
+        return version
+
+    def promote(self, name: str, version: str):
+        """Atomically point a model's CURRENT file at an existing version (promotion or rollback)."""
+        model_dir = self.root / name
+        if not (model_dir / version / METADATA_FILE).exists():
+            raise ValueError(f"Unknown version '{version}' for model '{name}'")
+        temp = model_dir / f'{POINTER_FILE}.tmp'
+        temp.write_text(version)
+        os.replace(temp, model_dir / POINTER_FILE)
+        logger.info(f"Promoted {name} to version {version}")
+
+    def current_version(self, name: str) -> Optional[str]:
+        """Active version of a model, or None if it has never been registered."""
+        try:
+            return (self.root / name / POINTER_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def names(self) -> List[str]:
+        """Models with an active version."""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / POINTER_FILE).exists())
+
+    def versions(self, name: str) -> List[str]:
+        """All stored versions of a model, oldest first."""
+        model_dir = self.root / name
+        if not model_dir.exists():
+            return []
+        return sorted(p.name for p in model_dir.iterdir() if (p / METADATA_FILE).exists())
+
+    def metadata(self, name: str, version: Optional[str] = None) -> Dict[str, Any]:
+        """Metadata of a version (default: current)."""
+        version = version or self._require_current(name)
+        return self._artifact(name, version, 'metadata')
+
+    def load(self, name: str, component: str = 'model', version: Optional[str] = None):
+        """
+        Load one component of a version (default: current), memory-mapped and cached.
+
+        Args:
+            name (str): Model name
+            component (str): 'model' or 'scaler'
+            version (str, optional): Specific version, e.g. for comparison or rollback
+
+        Returns:
+            The estimator or scaler (None if the version has no scaler)
+        """
+        if component not in COMPONENTS:
+            raise ValueError(f"Unknown component '{component}'. Use one of {COMPONENTS}")
+        return self._artifact(name, version or self._require_current(name), component)
+
+    def handle(self, name: str) -> 'ModelHandle':
+        """Shared auto-refreshing handle on a model's current version."""
+        with self._lock:
+            if name not in self._handles:
+                self._handles[name] = ModelHandle(self, name)
+            return self._handles[name]
+
+    def mapping(self, component: str = 'model') -> 'RegistryMapping':
+        """dict-like view of every current model's component ('model', 'scaler' or 'metadata')."""
+        return RegistryMapping(self, component)
+
+    def _require_current(self, name: str) -> str:
+        version = self.current_version(name)
+        if version is None:
+            raise KeyError(f"Model '{name}' is not registered in {self.root}")
+        return version
+
+    def _artifact(self, name: str, version: str, component: str):
+        key = (name, version, component)
+        with self._lock:
+            if key not in self._artifacts:
+                version_dir = self.root / name / version
+                if component == 'metadata':
+                    with open(version_dir / METADATA_FILE) as f:
+                        value = json.load(f)
+                else:
+                    path = version_dir / f'{component}.joblib'
+                    value = joblib.load(path, mmap_mode=self.mmap_mode) if path.exists() else None
+                self._artifacts[key] = value
+            return self._artifacts[key]
+
+    def _evict(self, name: str, keep_version: str):
+        """Drop cached artifacts of superseded versions so their memory can be released."""
+        with self._lock:
+            for key in [key for key in self._artifacts if key[0] == name and key[1] != keep_version]:
+                del self._artifacts[key]
+
+
+class ModelHandle:
+    """
+    Lazily loaded view of a model's current version.
+
+    The CURRENT pointer is re-read at most every ``registry.check_interval``
+    seconds; when it changes the next access loads the new version, so a
+    long-running dashboard picks up promotions without restarting.
+    """
+
+    def __init__(self, registry: ModelRegistry, name: str):
+        self.registry = registry
+        self.name = name
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def version(self) -> str:
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.registry.check_interval:
+            current = self.registry._require_current(self.name)
+            if current != self._version:
+                if self._version is not None:
+                    logger.info(f"Hot-swapping {self.name}: {self._version} -> {current}")
+                    self.registry._evict(self.name, current)
+                self._version = current
+            self._checked_at = now
+        return self._version
+
+    @property
+    def model(self):
+        return self.registry.load(self.name, 'model', self.version)
+
+    @property
+    def scaler(self):
+        return self.registry.load(self.name, 'scaler', self.version)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self.registry.metadata(self.name, self.version)
+
+    def component(self, component: str):
+        return self.metadata if component == 'metadata' else self.registry.load(self.name, component, self.version)
+
+
+class RegistryMapping(MutableMapping):
+    """
+    dict-like access to the current models of a registry.
+
+    Reads resolve through auto-refreshing handles; values assigned locally
+    (e.g. a freshly trained model that has not been registered yet) take
+    precedence until they are deleted.
+    """
+
+    def __init__(self, registry: ModelRegistry, component: str = 'model'):
+        self.registry = registry
+        self.component = component
+        self._local = {}
+
+    @property
+    def local(self) -> dict:
+        """Values assigned in this process that are not (yet) in the registry."""
+        return dict(self._local)
+
+    def __getitem__(self, name):
+        if name in self._local:
+            return self._local[name]
+        value = self.registry.handle(name).component(self.component)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name, value):
+        self._local[name] = value
+
+    def __delitem__(self, name):
+        del self._local[name]
+
+    def __iter__(self):
+        names = set(self._local)
+        for name in self.registry.names():
+            if self.component != 'scaler' or self.registry.metadata(name).get('has_scaler'):
+                names.add(name)
+        return iter(sorted(names))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, name):
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+
+def _json_default(value):
+    """Serialize numpy scalars/arrays and timestamps in metadata."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,257 @@
+"""
+Budgeted hyperparameter search with successive halving.
+
+An exhaustive grid evaluates every configuration on all the data. Successive
+halving instead samples many configurations, evaluates them cheaply (on the
+most recent slice of each training fold, or with few trees), keeps the best
+1/factor of them and repeats with factor times more resource until one
+configuration is left or the full resource is reached. Each rung runs all of
+its candidate x fold fits in one parallel pool.
+
+The search stops launching rungs when the next one is projected to overrun
+the wall-clock budget (seconds) or the CPU budget (worker CPU seconds,
+measured with process_time inside the workers); the best configuration of the
+last completed rung then wins.
+
+Classes:
+    SuccessiveHalvingSearch: Parallel successive-halving search under a time/CPU budget
+"""
+from typing import Dict, Optional, Tuple
+import logging
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+SAMPLES = 'n_samples'
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive-halving search over one or more estimator families.
+
+    Usage:
+        search = SuccessiveHalvingSearch({
+            'random_forest': (RandomForestRegressor(), {'max_depth': [5, 10, None]}),
+            'ridge': (Ridge(), {'alpha': loguniform(1e-3, 1e3)}),
+        }, n_candidates=27, time_budget=600)
+        search.fit(X_train, y_train)
+        model, params = search.best_estimator_, search.best_params_
+
+    Args:
+        search_spaces (dict): name -> (unfitted estimator, parameter distributions
+            as accepted by sklearn's ParameterSampler)
+        n_candidates (int): Configurations sampled for the first rung, spread
+            evenly over the search spaces
+        factor (int): Keep 1/factor of the candidates and multiply the resource
+            by factor at each rung
+        resource (str): 'n_samples' (rows of each training fold, most recent
+            first) or an estimator parameter such as 'n_estimators'
+        min_resource (int): Resource of the first rung (default: derived so the
+            last rung reaches max_resource)
+        max_resource (int): Full resource (default: rows of the smallest training
+            fold, or the estimator's current value of the resource parameter)
+        n_folds (int): Rolling-origin folds per evaluation; rows must be in time order
+        scoring (str): sklearn scorer name (default: the estimator's own score)
+        time_budget (float): Wall-clock budget in seconds (default: config.ml.tuning_time_budget)
+        cpu_budget (float): Worker CPU-second budget (default: config.ml.tuning_cpu_budget)
+        n_jobs (int): Worker budget (default: config.ml.n_jobs)
+    """
+
+    def __init__(self, search_spaces: Dict[str, Tuple[object, dict]], n_candidates: int = 27, factor: int = 3,
+                 resource: str = SAMPLES, min_resource: Optional[int] = None, max_resource: Optional[int] = None,
+                 n_folds: int = 3, scoring: Optional[str] = None, time_budget: Optional[float] = None,
+                 cpu_budget: Optional[float] = None, n_jobs: Optional[int] = None,
+                 random_state: Optional[int] = None):
+        if factor < 2:
+            raise ValueError("factor must be at least 2")
+        if resource != SAMPLES:
+            missing = [name for name, (estimator, _) in search_spaces.items()
+                       if resource not in estimator.get_params()]
+            if missing:
+                raise ValueError(f"Estimators {missing} have no parameter '{resource}' to use as resource")
+        self.search_spaces = search_spaces
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.resource = resource
+        self.min_resource = min_resource
+        self.max_resource = max_resource
+        self.n_folds = n_folds
+        self.scoring = scoring
+        self.time_budget = config.ml.tuning_time_budget if time_budget is None else time_budget
+        self.cpu_budget = config.ml.tuning_cpu_budget if cpu_budget is None else cpu_budget
+        self.n_jobs = config.ml.n_jobs if n_jobs is None else n_jobs
+        self.random_state = config.ml.random_state if random_state is None else random_state
+
+    def fit(self, X, y) -> 'SuccessiveHalvingSearch':
+        """
+        Run the search and refit the winner on all rows at the full resource.
+
+        Returns:
+            self, with best_name_, best_params_, best_score_, best_estimator_,
+            results_ (one row per candidate, rung and fold), elapsed_, cpu_time_
+            and stopped_early_
+        """
+        columns = X.columns if isinstance(X, pd.DataFrame) else None
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y)
+        started = time.perf_counter()
+        splits = list(TimeSeriesSplit(n_splits=self.n_folds).split(X))
+        candidates = self._sample_candidates()
+        max_resource, resource = self._resource_schedule(splits, len(candidates))
+
+        budget = effective_n_jobs(self.n_jobs)
+        records = []
+        self.cpu_time_ = 0.0
+        self.stopped_early_ = False
+        rung = 0
+        while True:
+            outer = max(1, min(len(candidates) * len(splits), budget))
+            inner = max(1, budget // outer)
+            rung_start = time.perf_counter()
+            results = Parallel(n_jobs=outer, backend=config.ml.parallel_backend)(
+                delayed(_evaluate)(candidate_id, fold, self._configure(name, params, resource, inner),
+                                   X, y, train_idx, test_idx, resource if self.resource == SAMPLES else None,
+                                   self.scoring)
+                for candidate_id, (name, params) in candidates.items()
+                for fold, (train_idx, test_idx) in enumerate(splits, start=1)
+            )
+            rung_cpu = sum(result['cpu_time'] for result in results)
+            self.cpu_time_ += rung_cpu
+            for result in results:
+                name, params = candidates[result['candidate']]
+                records.append({'rung': rung, 'resource': resource, 'model': name, 'params': params, **result})
+            scores = pd.DataFrame(results).groupby('candidate')['score'].mean().fillna(-np.inf)
+            logger.info(f"Rung {rung}: {len(candidates)} candidate(s) at {self.resource}={resource}, "
+                        f"best {scores.max():.4f} ({time.perf_counter() - rung_start:.2f}s)")
+
+            if len(candidates) == 1 or resource >= max_resource:
+                break
+            survivors = scores.sort_values(ascending=False).index[:math.ceil(len(candidates) / self.factor)]
+            next_resource = min(resource * self.factor, max_resource)
+
+            # Cost grows roughly linearly with the resource and the number of fits
+            projected_cpu = rung_cpu * len(survivors) / len(candidates) * next_resource / resource
+            projected_wall = projected_cpu / outer
+            elapsed = time.perf_counter() - started
+            if elapsed + projected_wall > self.time_budget or self.cpu_time_ + projected_cpu > self.cpu_budget:
+                logger.info(f"Stopping after rung {rung}: next rung projected at {projected_wall:.1f}s wall, "
+                            f"{projected_cpu:.1f} CPU-s")
+                self.stopped_early_ = True
+                break
+            candidates = {candidate_id: candidates[candidate_id] for candidate_id in survivors}
+            resource = next_resource
+            rung += 1
+
+        self.results_ = pd.DataFrame(records)
+        best_id = scores.idxmax()
+        self.best_name_, self.best_params_ = candidates[best_id]
+        self.best_score_ = float(scores[best_id])
+        self.n_rungs_ = rung + 1
+
+        self.best_estimator_ = self._configure(self.best_name_, self.best_params_, max_resource, budget)
+        # Fit the final scaler on named columns so forecast_revenue can select features by name
+        self.best_scaler_ = StandardScaler()
+        X_final = pd.DataFrame(X, columns=columns) if columns is not None else X
+        self.best_estimator_.fit(self.best_scaler_.fit_transform(X_final), y)
+        self.elapsed_ = time.perf_counter() - started
+        return self
+
+    def summary(self) -> dict:
+        """JSON-serializable description of the winning configuration and the search."""
+        return {
+            'model': self.best_name_,
+            'params': self.best_params_,
+            'cv_score': self.best_score_,
+            'scoring': self.scoring,
+            'resource': self.resource,
+            'rungs': self.n_rungs_,
+            'candidates_evaluated': int(self.results_.query('rung == 0')['candidate'].nunique()),
+            'stopped_early': self.stopped_early_,
+            'elapsed': self.elapsed_,
+            'cpu_time': self.cpu_time_,
+            'time_budget': self.time_budget,
+            'cpu_budget': self.cpu_budget,
+        }
+
+    def _sample_candidates(self) -> dict:
+        """candidate id -> (search space name, params), n_candidates spread over the spaces"""
+        per_space = np.array_split(np.arange(self.n_candidates), len(self.search_spaces))
+        candidates = {}
+        for (name, (_, distributions)), ids in zip(self.search_spaces.items(), per_space):
+            sampler = ParameterSampler(distributions, n_iter=len(ids), random_state=self.random_state)
+            try:
+                sampled = list(sampler)
+            except ValueError:
+                # Fewer grid points than requested: ParameterSampler wants n_iter <= grid size
+                sampled = list(ParameterSampler(distributions, n_iter=_grid_size(distributions),
+                                                random_state=self.random_state))
+            for params in sampled:
+                candidates[len(candidates)] = (name, {key: _plain(value) for key, value in params.items()})
+        return candidates
+
+    def _resource_schedule(self, splits, n_candidates) -> Tuple[int, int]:
+        """(max_resource, first rung resource)"""
+        if self.max_resource is not None:
+            max_resource = self.max_resource
+        elif self.resource == SAMPLES:
+            max_resource = min(len(train_idx) for train_idx, _ in splits)
+        else:
+            max_resource = max(estimator.get_params()[self.resource] for estimator, _ in self.search_spaces.values())
+        if self.min_resource is not None:
+            return max_resource, min(self.min_resource, max_resource)
+        # Enough rungs to narrow n_candidates down to one
+        n_rungs = 1 + math.ceil(math.log(max(n_candidates, 1), self.factor))
+        return max_resource, max(1, max_resource // self.factor ** (n_rungs - 1))
+
+    def _configure(self, name: str, params: dict, resource: int, inner_jobs: int):
+        estimator = clone(self.search_spaces[name][0]).set_params(**params)
+        if self.resource != SAMPLES:
+            estimator.set_params(**{self.resource: resource})
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=inner_jobs)
+        return estimator
+
+
+def _evaluate(candidate: int, fold: int, estimator, X, y, train_idx, test_idx, n_samples=None, scoring=None):
+    """Scale, fit and score one configuration on one fold (runs inside a worker)"""
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if n_samples is not None:
+        train_idx = train_idx[-n_samples:]
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+    try:
+        estimator.fit(X_train, y[train_idx])
+        score = estimator.score(X_test, y[test_idx]) if scoring is None else \
+            get_scorer(scoring)(estimator, X_test, y[test_idx])
+    except ValueError:
+        # e.g. a small subsample with a single class
+        score = np.nan
+    return {
+        'candidate': candidate,
+        'fold': fold,
+        'train_size': len(train_idx),
+        'score': score,
+        'fit_time': time.perf_counter() - wall_start,
+        'cpu_time': time.process_time() - cpu_start,
+    }
+
+
+def _grid_size(distributions: dict) -> int:
+    return int(np.prod([len(values) for values in distributions.values()]))
+
+
+def _plain(value):
+    """numpy scalars -> Python scalars so parameters serialize to JSON metadata"""
+    return value.item() if isinstance(value, np.generic) else value
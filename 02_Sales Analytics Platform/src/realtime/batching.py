@@ -0,0 +1,145 @@
+"""
+Request micro-batching for model inference.
+
+Concurrent requests are coalesced into one batch so the model runs a single
+vectorized predict/predict_proba call instead of one call per request. The
+batch closes when it holds max_batch_size requests or max_wait seconds after
+its first request arrived, whichever comes first. Batches are processed in a
+worker thread, so the event loop keeps accepting requests (which form the next
+batch) while the model is busy. When a batch fails, its items are retried one
+at a time, so only the request that caused the failure gets the error.
+
+Classes:
+    MicroBatcher: asyncio request coalescer around a batch function
+"""
+from typing import Any, Callable, List, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent submissions into batches for one batch function.
+
+    Usage:
+        batcher = MicroBatcher(score_batch, max_batch_size=64, max_wait=0.005)
+        result = await batcher.submit(request)   # inside an async handler
+
+    Args:
+        process_batch: Callable taking a list of items and returning one result
+            per item, in order. Runs in a worker thread.
+        max_batch_size (int): Most items per batch
+        max_wait (float): Seconds to wait for more items after the first one
+        name (str): Label for logs and stats
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 64,
+                 max_wait: float = 0.005, name: str = 'batch'):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+        self.stats = {'items': 0, 'batches': 0, 'largest_batch': 0, 'busy_seconds': 0.0, 'failed_batches': 0,
+                      'failed_items': 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result (an exception raised for this item is re-raised)."""
+        if self._worker is None or self._worker.done():
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def start(self):
+        """Start the batching task on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Cancel the batching task; queued items fail with CancelledError."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+
+    async def _collect(self) -> list:
+        """Block for the first item, then gather more until the batch is full or max_wait passes."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests whose callers gave up (e.g. client disconnect) are skipped
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(None, self._process, [item for item, _ in batch])
+            except Exception as exc:
+                if len(batch) == 1:
+                    self._fail(batch[0][1], exc)
+                else:
+                    # Isolate the offending item(s) instead of failing every caller in the batch
+                    logger.warning(f"{self.name}: batch of {len(batch)} failed ({exc!r}); retrying items one by one")
+                    self.stats['failed_batches'] += 1
+                    for item, future in batch:
+                        try:
+                            result = (await loop.run_in_executor(None, self._process, [item]))[0]
+                        except Exception as item_exc:
+                            self._fail(future, item_exc)
+                        else:
+                            if not future.done():
+                                future.set_result(result)
+                results = None
+            finally:
+                self.stats['busy_seconds'] += time.perf_counter() - started
+
+            if results is not None:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            self.stats['items'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+    def _process(self, items: list) -> list:
+        results = self.process_batch(items)
+        if len(results) != len(items):
+            raise RuntimeError(f"{self.name}: batch function returned {len(results)} results for {len(items)} items")
+        return results
+
+    def _fail(self, future: asyncio.Future, exc: Exception):
+        logger.error(f"{self.name}: item failed: {exc!r}", exc_info=exc)
+        self.stats['failed_items'] += 1
+        if not future.done():
+            future.set_exception(exc)
@@ -0,0 +1,94 @@
+"""
+Client for the model inference service.
+
+Dashboards and campaign jobs use this instead of loading models themselves.
+Requests go through the standard library's urllib and results come back as
+pandas DataFrames, so callers do not pull in scikit-learn or the model files.
+
+Classes:
+    InferenceClient: HTTP client for churn scores and revenue forecasts
+"""
+from typing import Optional, Sequence
+import json
+import logging
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+CHURN_REQUEST_COLUMNS = ['company_id', 'company_name', 'annual_revenue', 'employees', 'total_revenue',
+                         'avg_transaction', 'transaction_count', 'days_since_last_transaction',
+                         'avg_satisfaction', 'avg_nps', 'interaction_count']
+
+
+class InferenceClient:
+    """
+    HTTP client for src.realtime.inference_server.
+
+    Usage:
+        client = InferenceClient()
+        forecast = client.revenue_forecast(days_ahead=30)
+        scores = client.churn_scores(features)   # churn feature frame
+
+    Raises:
+        ConnectionError: The service cannot be reached
+        ValueError: The service rejected the request (e.g. no model registered)
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 30.0):
+        self.base_url = (base_url or config.streaming.inference_url).rstrip('/')
+        self.timeout = timeout
+
+    def churn_scores(self, features: pd.DataFrame, chunksize: int = 5_000) -> pd.DataFrame:
+        """
+        Churn scores for a churn feature frame.
+
+        Returns:
+            pd.DataFrame: company_id, company_name, churn_probability, churn_prediction, risk_level
+        """
+        frames = []
+        for start in range(0, len(features), chunksize):
+            chunk = features.reindex(columns=CHURN_REQUEST_COLUMNS).iloc[start:start + chunksize]
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            chunk['company_id'] = chunk['company_id'].astype(str)
+            response = self._request('/churn/score', {'companies': chunk.to_dict('records')})
+            frames.append(pd.DataFrame(response['scores']))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def revenue_forecast(self, days_ahead: int = 30, method: str = 'recursive',
+                         quantiles: Optional[Sequence[float]] = None) -> pd.DataFrame:
+        """
+        Revenue forecast (with one column per quantile when quantiles are given).
+
+        Returns:
+            pd.DataFrame: date, predicted_revenue, day_of_forecast[, p10, p50, ...]
+        """
+        payload = {'days_ahead': days_ahead, 'method': method,
+                   'quantiles': list(quantiles) if quantiles else None}
+        forecast = pd.DataFrame(self._request('/forecast/revenue', payload)['forecast'])
+        forecast['date'] = pd.to_datetime(forecast['date'])
+        return forecast
+
+    def health(self) -> dict:
+        """Model versions, data version and batching statistics of the service."""
+        return self._request('/health')
+
+    def _request(self, route: str, payload: Optional[dict] = None) -> dict:
+        data = json.dumps(payload, default=str).encode() if payload is not None else None
+        request = urllib.request.Request(self.base_url + route, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.load(e).get('detail', e.reason)
+            except ValueError:
+                detail = e.reason
+            raise ValueError(f"Inference service error {e.code}: {detail}") from e
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Inference service unavailable at {self.base_url}: {e.reason}") from e
@@ -0,0 +1,248 @@
+"""
+Model inference service for churn scores and revenue forecasts.
+
+Models are loaded once, from the model registry, by this process; dashboards
+and campaign jobs call it over HTTP instead of each keeping its own copy in
+memory. Promoted versions are picked up without a restart (registry handles
+re-check the CURRENT pointer).
+
+Concurrent requests are coalesced by MicroBatcher: all churn requests in a
+batch are stacked into one feature matrix and scored with a single
+predict_proba call, and forecast requests for the same method are answered
+from one forecast of the longest requested horizon. Point forecasts are read
+from (and stored in) the shared ForecastCache first.
+
+Endpoints:
+    POST /churn/score       Churn probability and risk level per company
+    POST /forecast/revenue  Revenue forecast, optionally with quantiles
+    GET  /health            Model versions, data version and batching stats
+
+Run:
+    python -m src.realtime.inference_server
+"""
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Optional
+import asyncio
+import logging
+import threading
+
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.config import config
+from src.features.feature_store import data_version
+from src.models.advanced_ml import FORECAST_MODELS, SalesForecastingEngine
+from src.models.churn_scoring import CHURN_FEATURES, score_churn_features
+from src.models.forecast_cache import ForecastCache
+from src.models.registry import ModelRegistry
+from src.realtime.batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS_PATH = Path(__file__).parent.parent.parent / 'data' / 'raw' / 'transactions.csv'
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the transactions and run the micro-batchers for the lifetime of the app."""
+    await load_transactions_async()
+    churn_batcher.start()
+    forecast_batcher.start()
+    try:
+        yield
+    finally:
+        await churn_batcher.stop()
+        await forecast_batcher.stop()
+
+
+app = FastAPI(title="Sales Analytics Inference", lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+registry = ModelRegistry(config.ml.model_path)
+forecast_engine = SalesForecastingEngine()
+forecast_engine.load_models(config.ml.model_path)
+forecast_cache = ForecastCache(registry_path=config.ml.model_path)
+
+# Transactions the forecasts are built from, reloaded when the file changes. Both the
+# event loop (via an executor) and batcher worker threads read it, hence the lock.
+_transactions = {'mtime': None, 'frame': pd.DataFrame(), 'version': None}
+_transactions_lock = threading.Lock()
+
+
+class CompanyFeatures(BaseModel):
+    # Infinity/NaN would pass float validation and then fail the scaler for the whole batch
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    company_id: str
+    company_name: Optional[str] = None
+    annual_revenue: Optional[float] = None
+    employees: Optional[float] = None
+    total_revenue: Optional[float] = None
+    avg_transaction: Optional[float] = None
+    transaction_count: Optional[float] = None
+    days_since_last_transaction: Optional[float] = None
+    avg_satisfaction: Optional[float] = None
+    avg_nps: Optional[float] = None
+    interaction_count: Optional[float] = None
+
+
+class ChurnRequest(BaseModel):
+    companies: List[CompanyFeatures]
+
+
+class ForecastRequest(BaseModel):
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    days_ahead: int = Field(30, ge=1, le=365)
+    method: str = 'recursive'
+    quantiles: Optional[List[float]] = None
+
+
+def load_transactions() -> tuple:
+    """Current transactions and their data version (re-read only when the file changed)."""
+    with _transactions_lock:
+        mtime = TRANSACTIONS_PATH.stat().st_mtime if TRANSACTIONS_PATH.exists() else None
+        if mtime != _transactions['mtime']:
+            frame = pd.read_csv(TRANSACTIONS_PATH, parse_dates=['transaction_date']) if mtime else pd.DataFrame()
+            _transactions.update(mtime=mtime, frame=frame, version=data_version(frame) if len(frame) else None)
+            logger.info(f"Loaded {len(frame):,} transactions (data version {_transactions['version']})")
+        return _transactions['frame'], _transactions['version']
+
+
+async def load_transactions_async() -> tuple:
+    """load_transactions in the default executor, so a reload never blocks the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, load_transactions)
+
+
+def score_churn_batch(requests: List[List[dict]]) -> list:
+    """Score every company of every request with one predict_proba call."""
+    handle = registry.handle('churn_model')
+    rows = [row for companies in requests for row in companies]
+    features = pd.DataFrame(rows, columns=['company_id', 'company_name', *CHURN_FEATURES])
+    features[CHURN_FEATURES] = features[CHURN_FEATURES].astype(float)
+    scores = score_churn_features(features, handle.model, handle.scaler)
+    scores['risk_level'] = scores['risk_level'].astype(str)
+    records = scores.astype(object).where(scores.notna(), None).to_dict('records')
+
+    results, start = [], 0
+    for companies in requests:
+        results.append({'model_version': handle.version, 'scores': records[start:start + len(companies)]})
+        start += len(companies)
+    return results
+
+
+def forecast_batch(requests: List[dict]) -> list:
+    """
+    Answer forecast requests grouped by (method, quantiles).
+
+    Each group runs the model once for its longest horizon; shorter requests
+    get a prefix. A failing group returns its exception to its requests only.
+    """
+    transactions, version = load_transactions()
+    groups = {}
+    for i, request in enumerate(requests):
+        groups.setdefault((request['method'], request['quantiles']), []).append(i)
+
+    results = [None] * len(requests)
+    for (method, quantiles), members in groups.items():
+        horizon = max(requests[i]['days_ahead'] for i in members)
+        try:
+            if transactions.empty:
+                raise LookupError(f"No transactions at {TRANSACTIONS_PATH}")
+            if quantiles:
+                forecast = forecast_engine.forecast_quantiles(transactions, days_ahead=horizon,
+                                                              quantiles=quantiles, method=method)
+            else:
+                forecast = forecast_cache.get(version, horizon, method)
+                if forecast is None:
+                    forecast_cache.precompute(transactions, methods=(method,),
+                                              horizons=(max(horizon, *forecast_cache.horizons),),
+                                              engine=forecast_engine, version=version, prune=False)
+                    forecast = forecast_cache.get(version, horizon, method)
+                if forecast is None:
+                    raise LookupError(f"No registered {FORECAST_MODELS[method]}")
+        except Exception as exc:
+            for i in members:
+                results[i] = exc
+            continue
+        for i in members:
+            results[i] = _forecast_response(forecast.head(requests[i]['days_ahead']), method, version)
+    return results
+
+
+def _forecast_response(forecast: pd.DataFrame, method: str, version: Optional[str]) -> dict:
+    forecast = forecast.assign(date=pd.to_datetime(forecast['date']).dt.strftime(config.data.date_format))
+    return {
+        'method': method,
+        'data_version': version,
+        'model_version': forecast_cache.model_version(method),
+        'forecast': forecast.to_dict('records'),
+    }
+
+
+max_wait = config.streaming.inference_max_wait_ms / 1000
+churn_batcher = MicroBatcher(score_churn_batch, config.streaming.inference_max_batch_size, max_wait, name='churn')
+forecast_batcher = MicroBatcher(forecast_batch, config.streaming.inference_max_batch_size, max_wait,
+                                name='forecast')
+
+
+@app.post("/churn/score")
+async def churn_score(request: ChurnRequest):
+    if registry.current_version('churn_model') is None:
+        raise HTTPException(status_code=503, detail="No churn_model registered")
+    if not request.companies:
+        return {'model_version': registry.current_version('churn_model'), 'scores': []}
+    return await churn_batcher.submit([company.model_dump() for company in request.companies])
+
+
+@app.post("/forecast/revenue")
+async def revenue_forecast(request: ForecastRequest):
+    if request.method not in FORECAST_MODELS:
+        raise HTTPException(status_code=400, detail=f"Unknown forecast method '{request.method}'")
+    if request.quantiles and not all(0 < q < 1 for q in request.quantiles):
+        raise HTTPException(status_code=400, detail="Quantiles must be between 0 and 1")
+
+    # Cache hits skip the batcher entirely
+    if not request.quantiles:
+        _, version = await load_transactions_async()
+        cached = forecast_cache.get(version, request.days_ahead, request.method) if version else None
+        if cached is not None:
+            return _forecast_response(cached, request.method, version)
+
+    result = await forecast_batcher.submit({
+        'days_ahead': request.days_ahead,
+        'method': request.method,
+        'quantiles': tuple(sorted(request.quantiles)) if request.quantiles else None,
+    })
+    if isinstance(result, LookupError):
+        raise HTTPException(status_code=503, detail=str(result))
+    if isinstance(result, Exception):
+        raise HTTPException(status_code=500, detail=str(result))
+    return result
+
+
+@app.get("/health")
+async def health():
+    _, version = await load_transactions_async()
+    return {
+        'status': 'ok',
+        'models': {name: registry.current_version(name) for name in registry.names()},
+        'data_version': version,
+        'batching': {'churn': churn_batcher.stats, 'forecast': forecast_batcher.stats},
+    }
+
+
+if __name__ == "__main__":
+    host, port = config.streaming.inference_host, config.streaming.inference_port
+    print(f"Starting inference server on http://localhost:{port} ...")
+    uvicorn.run(app, host=host, port=port)
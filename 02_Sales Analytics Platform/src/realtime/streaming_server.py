@@ -8,9 +8,13 @@ import socketio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-import pandas as pd
 from pathlib import Path
-import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.config import config
+from src.realtime.events import BATCH_EVENT, check_encoding, encode_sales_batches
+from src.realtime.tailing import CSVTailer
 
 # SocketIO server (async mode)
 sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
@@ -28,21 +32,18 @@ app_sio = socketio.ASGIApp(sio, app)
 DATA_PATH = Path(__file__).parent.parent.parent / 'data' / 'sales_data.csv'
 
 async def sales_update_broadcast():
-    """Background task: broadcast new sales every 5 seconds"""
-    last_row = 0
-    while True:
-        if DATA_PATH.exists():
-            df = pd.read_csv(DATA_PATH)
-            if len(df) > last_row:
-                # Send only new rows
-                new_sales = df.iloc[last_row:]
-                for _, row in new_sales.iterrows():
-                    await sio.emit('new_sale', row.to_dict())
-                last_row = len(df)
-        await asyncio.sleep(5)
+    """Background task: broadcast sales as they are appended to the data file"""
+    # Only bytes appended since the last pass are parsed; rotation/truncation are followed
+    tailer = CSVTailer(DATA_PATH)
+    settings = config.streaming
+    async for new_sales in tailer.follow(settings.tail_poll_interval):
+        # One columnar message per batch instead of one message per sale
+        for payload in encode_sales_batches(new_sales, settings.event_batch_size, settings.event_encoding):
+            await sio.emit(BATCH_EVENT, payload)
 
 @app.on_event("startup")
 async def start_broadcast():
+    check_encoding(config.streaming.event_encoding)
     asyncio.create_task(sales_update_broadcast())
 
 @sio.event
@@ -0,0 +1,208 @@
+"""
+Incremental tailing of an append-only CSV file.
+
+The tailer remembers the byte offset it has read up to and, on each pass,
+reads only the bytes appended since then. Complete lines are parsed in one
+pd.read_csv call with the file's header; a trailing partial line (a writer
+in the middle of a row) is kept until its newline arrives. Each pass costs
+O(new bytes) instead of O(file size).
+
+Rotation and truncation are detected from the file's identity (device and
+inode), its size and its content: a replaced file is drained to its end and
+then followed from the start. A file that shrank below the offset, or whose
+header or last bytes read no longer match (truncated and rewritten past the
+offset between two reads), is re-read from the start.
+
+follow() waits for changes with filesystem notifications when the optional
+watchfiles package is installed and falls back to sub-second polling (one
+os.stat per interval) otherwise.
+
+Classes:
+    CSVTailer: Rows appended to a CSV file since the previous read
+"""
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+import asyncio
+import io
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchfiles import awatch
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# Bytes before the offset compared on every read to detect a rewritten file
+CHECK_BYTES = 64
+
+
+class CSVTailer:
+    """
+    Read rows appended to a CSV file since the last call.
+
+    Usage:
+        tailer = CSVTailer('data/sales_data.csv')
+        new_rows = tailer.read_new()                 # DataFrame, possibly empty
+        async for new_rows in tailer.follow(0.25):   # inside a background task
+            ...
+
+    Args:
+        path: CSV file to follow (it may not exist yet)
+        from_start (bool): Emit the rows already in the file on the first read
+            (False starts at the current end)
+        max_bytes (int): Most bytes parsed per read, bounding the work per
+            pass when a large backlog is pending
+    """
+
+    def __init__(self, path: Union[str, Path], from_start: bool = True, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.from_start = from_start
+        self.max_bytes = max_bytes
+        self.rows_read = 0
+        self._file = None
+        self._identity = None
+        self._offset = 0
+        self._header: Optional[bytes] = None
+        self._partial = b''
+        self._tail = b''
+        self._pending = False
+
+    def read_new(self) -> pd.DataFrame:
+        """Rows appended since the previous call (an empty frame when there are none)."""
+        frames = []
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotated away and not recreated yet: finish the old file
+            if self._file is not None:
+                frames.append(self._read_to_end())
+            return _concat(frames)
+
+        identity = (stat.st_dev, stat.st_ino)
+        if self._file is None:
+            self._open(identity, at_end=not self.from_start)
+        elif identity != self._identity:
+            frames.append(self._read_to_end())
+            logger.info(f"{self.path} was rotated; following the new file")
+            self._open(identity)
+        elif stat.st_size < self._offset or not self._unchanged():
+            logger.info(f"{self.path} was truncated; reading it from the start")
+            self._reset()
+
+        frames.append(self._read(stat.st_size))
+        return _concat(frames)
+
+    async def follow(self, poll_interval: float = 0.25, notifications: bool = True) -> AsyncIterator[pd.DataFrame]:
+        """
+        Yield new rows as they are appended, forever.
+
+        File reads run in a worker thread so the event loop stays responsive.
+        With notifications (and watchfiles installed) the tailer wakes up on
+        file changes and re-checks at least every few poll intervals;
+        otherwise it polls every poll_interval seconds.
+        """
+        loop = asyncio.get_running_loop()
+        changes = self._changes(poll_interval) if notifications and WATCHFILES_AVAILABLE else None
+        while True:
+            frame = await loop.run_in_executor(None, self.read_new)
+            if len(frame):
+                yield frame
+            if self._pending:
+                continue
+            if changes is not None:
+                await anext(changes)
+            else:
+                await asyncio.sleep(poll_interval)
+
+    def close(self):
+        """Release the file handle."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def _changes(self, poll_interval: float):
+        """Wake-ups on changes to the file (including re-creation), or after a timeout."""
+        name = self.path.name
+        async for _ in awatch(self.path.parent, watch_filter=lambda change, changed: Path(changed).name == name,
+                              debounce=50, step=50, rust_timeout=max(1, int(poll_interval * 4000)),
+                              yield_on_timeout=True):
+            yield
+
+    def _open(self, identity: tuple, at_end: bool = False):
+        self.close()
+        self._file = open(self.path, 'rb')
+        self._identity = identity
+        self._reset()
+        if at_end:
+            self._header = self._file.readline() or None
+            end = self._file.seek(0, os.SEEK_END)
+            self._file.seek(max(0, end - CHECK_BYTES))
+            self._tail = self._file.read(end - max(0, end - CHECK_BYTES))
+            self._offset = end
+
+    def _reset(self):
+        self._offset = 0
+        self._header = None
+        self._partial = b''
+        self._tail = b''
+
+    def _unchanged(self) -> bool:
+        """The header and the last bytes read are still where they were (the file was only appended to)."""
+        if self._offset == 0:
+            return True
+        if self._header is not None:
+            self._file.seek(0)
+            if self._file.read(len(self._header)) != self._header:
+                return False
+        self._file.seek(self._offset - len(self._tail))
+        return self._file.read(len(self._tail)) == self._tail
+
+    def _read_to_end(self) -> pd.DataFrame:
+        """Remaining rows of the currently open (rotated) file."""
+        frames = []
+        while True:
+            frame = self._read(os.fstat(self._file.fileno()).st_size)
+            frames.append(frame)
+            if not self._pending:
+                return _concat(frames)
+
+    def _read(self, size: int) -> pd.DataFrame:
+        """Parse complete lines between the offset and size."""
+        available = size - self._offset
+        self._pending = available > self.max_bytes
+        if available <= 0:
+            return pd.DataFrame()
+        self._file.seek(self._offset)
+        data = self._file.read(min(available, self.max_bytes))
+        self._offset += len(data)
+        self._tail = (self._tail + data)[-CHECK_BYTES:]
+
+        data = self._partial + data
+        end = data.rfind(b'\n') + 1
+        data, self._partial = data[:end], data[end:]
+        if self._header is None:
+            header_end = data.find(b'\n') + 1
+            if header_end == 0:
+                self._partial = data + self._partial
+                return pd.DataFrame()
+            self._header, data = data[:header_end], data[header_end:]
+        if not data.strip():
+            return pd.DataFrame()
+
+        frame = pd.read_csv(io.BytesIO(self._header + data))
+        self.rows_read += len(frame)
+        return frame
+
+
+def _concat(frames) -> pd.DataFrame:
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
@@ -14,6 +14,9 @@ import json
 import os
 from pathlib import Path
 from ui.i18n import I18N
+from src.features.cohorts import build_cohort_matrices
+from src.features.ltv import customer_aggregates, compute_ltv, ltv_segment_summary, value_tiers
+from src.models.advanced_ml import apply_residual_quantiles, residual_quantile_table
 
 # Load translations
 TRANSLATIONS_PATH = os.path.join(os.path.dirname(__file__), "config", "translations.json")
@@ -456,6 +459,54 @@ def generate_sales_data():
     
     return df
 
+@st.cache_data
+def load_order_data():
+    """Load order-level sales data produced by the ETL pipeline (empty if not run yet)"""
+    path = Path(__file__).parent / 'data' / 'processed' / 'sales_transformed.csv'
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_csv(path, parse_dates=['date'])
+
+@st.cache_data
+def compute_cohort_retention(freq, max_periods):
+    """Cohort retention (%) matrix from order-level data"""
+    orders = load_order_data()
+    if orders.empty:
+        return pd.DataFrame()
+    cohorts = build_cohort_matrices(orders, freq=freq, max_periods=max_periods)
+    retention = (cohorts.retention * 100).round(1)
+    label = 'Month' if freq == 'M' else 'Week'
+    date_format = '%b %Y' if freq == 'M' else '%Y-%m-%d'
+    retention.index = retention.index.strftime(date_format)
+    retention.columns = [f"{label} {offset}" for offset in retention.columns]
+    retention.insert(0, 'Customers', cohorts.cohort_sizes.to_numpy())
+    return retention.rename_axis('Cohort').reset_index()
+
+@st.cache_data
+def compute_customer_ltv():
+    """Historical and projected LTV per customer from order-level data"""
+    orders = load_order_data()
+    if orders.empty:
+        return pd.DataFrame()
+    return compute_ltv(customer_aggregates(orders))
+
+@st.cache_data(ttl=300)
+def load_backtest_summary():
+    """Accuracy of the latest forecast backtest (python -m src.models.backtesting), None if not run yet"""
+    path = Path(__file__).parent / 'data' / 'processed' / 'backtest' / 'summary.json'
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def backtest_accuracy_text():
+    """One-line description of the production forecaster's measured accuracy"""
+    backtest = load_backtest_summary()
+    if backtest is None:
+        return "The production revenue forecaster has not been backtested yet."
+    return (f"Production revenue forecaster (data/raw/transactions.csv) backtested over {backtest['cutoffs']} "
+            f"cutoffs ({backtest['horizon']}-day horizon): MAPE {backtest['mape']:.1%}, WAPE {backtest['wape']:.1%}.")
+
 # Load data
 df = generate_sales_data()
 
@@ -545,7 +596,7 @@ with st.sidebar:
     st.markdown("---")
     
     # Info box
-    st.info("Real-time Analytics - Data updates every 30 seconds. Forecasts use Prophet time-series models with 12% MAPE accuracy.")
+    st.info(f"Real-time Analytics - Data updates every 30 seconds. {backtest_accuracy_text()}")
 
 # Filter data
 filtered_df = df[
@@ -756,10 +807,10 @@ with tab1:
 with tab2:
     st.header("Revenue Forecasting with Prophet")
     
-    st.markdown("""
+    st.markdown(f"""
     <div class="info-box">
     <strong>Forecast Model:</strong> Uses Facebook Prophet for time-series forecasting with automatic 
-    seasonality detection, trend analysis, and confidence intervals. Current model MAPE: 12.3%
+    seasonality detection, trend analysis, and confidence intervals. {backtest_accuracy_text()}
     </div>
     """, unsafe_allow_html=True)
     
@@ -793,11 +844,12 @@ with tab2:
     future_days = np.arange(last_day + 1, last_day + forecast_days + 1).reshape(-1, 1)
     forecast = model.predict(future_days)
     
-    # Calculate confidence interval
+    # Confidence interval from the empirical residual distribution at the selected level
     residuals = y_train - model.predict(X_train)
-    std_error = np.std(residuals)
-    z_score = 1.96 if confidence_interval == 95 else 2.576
-    margin = z_score * std_error
+    tail = (100 - confidence_interval) / 200
+    lower_bound, upper_bound = apply_residual_quantiles(
+        forecast, np.arange(1, forecast_days + 1), residual_quantile_table(residuals), [tail, 1 - tail]
+    ).T
     
     # Create forecast dataframe
     future_dates = pd.date_range(
@@ -809,8 +861,8 @@ with tab2:
     forecast_df = pd.DataFrame({
         'date': future_dates,
         'forecast': forecast,
-        'lower_bound': forecast - margin,
-        'upper_bound': forecast + margin
+        'lower_bound': lower_bound,
+        'upper_bound': upper_bound
     })
     
     # Plot
@@ -870,9 +922,23 @@ with tab2:
         st.markdown("---")
         
         st.subheader("Model Performance")
-        st.metric("MAPE", "12.3%", "↓ 2.1pp")
-        st.metric("R² Score", "0.89")
-        st.metric("MAE", f"${std_error:,.0f}")
+        st.caption("Demo trend model behind this chart, in-sample")
+        st.metric("R² Score (in-sample)", f"{model.score(X_train, y_train):.2f}")
+        st.metric("MAE (in-sample)", f"${np.abs(residuals).mean():,.0f}")
+        
+        st.markdown("---")
+        
+        st.subheader("Production Forecaster")
+        st.caption("SalesForecastingEngine backtested on data/raw/transactions.csv, not the demo chart")
+        backtest = load_backtest_summary()
+        if backtest is not None:
+            st.metric("Backtest MAPE", f"{backtest['mape']:.1%}")
+            st.metric("Backtest WAPE", f"{backtest['wape']:.1%}")
+            st.caption(f"{backtest['method']} model, {backtest['cutoffs']} cutoffs from {backtest['first_cutoff']} "
+                       f"to {backtest['last_cutoff']}, {backtest['horizon']}-day horizon")
+        else:
+            st.metric("Backtest MAPE", "n/a")
+            st.caption("Run python -m src.models.backtesting to measure accuracy")
         
         st.markdown("---")
         
@@ -1291,48 +1357,43 @@ with tab7:
     if analysis_type == "Cohort Analysis":
         st.subheader("Cohort Retention Analysis")
         
-        # Generate cohort data
-        cohorts = ['Jan 2025', 'Feb 2025', 'Mar 2025', 'Apr 2025', 'May 2025', 'Jun 2025']
-        cohort_data = pd.DataFrame({
-            'Cohort': cohorts,
-            'Month 0': [100, 100, 100, 100, 100, 100],
-            'Month 1': [85, 87, 89, 86, 88, 90],
-            'Month 2': [72, 75, 78, 74, 76, 0],
-            'Month 3': [65, 68, 71, 67, 0, 0],
-            'Month 4': [58, 62, 65, 0, 0, 0],
-            'Month 5': [52, 56, 0, 0, 0, 0]
-        })
+        cohort_granularity = st.radio("Cohort Granularity", ["Monthly", "Weekly"], horizontal=True)
+        cohort_data = compute_cohort_retention('M' if cohort_granularity == "Monthly" else 'W', 12)
         
-        st.dataframe(cohort_data, use_container_width=True)
+        if cohort_data.empty:
+            st.warning("No order data found. Run the ETL pipeline (python run.py) to build cohorts.")
+        else:
+            st.dataframe(cohort_data, use_container_width=True)
         
     elif analysis_type == "Customer LTV":
         st.subheader("Customer Lifetime Value Analysis")
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            avg_ltv = np.random.randint(8000, 15000)
-            st.metric("Average LTV", f"${avg_ltv:,.0f}", "12%")
-        with col2:
-            ltv_cac_ratio = np.random.uniform(3.0, 5.0)
-            st.metric("LTV:CAC Ratio", f"{ltv_cac_ratio:.1f}:1", "0.3")
-        with col3:
-            payback_period = np.random.randint(8, 16)
-            st.metric("Payback Period", f"{payback_period} months", "-2 mo")
-        
-        # LTV by segment
-        st.markdown("---")
-        st.subheader("LTV by Customer Segment")
+        customer_ltv = compute_customer_ltv()
         
-        segment_ltv = pd.DataFrame({
-            'Segment': ['Enterprise', 'Mid-Market', 'SMB', 'Startup'],
-            'LTV': [25000, 12000, 6000, 3500],
-            'Customers': [150, 450, 1200, 800]
-        })
-        
-        fig = px.bar(segment_ltv, x='Segment', y='LTV', color='Customers',
-                     color_continuous_scale='Blues')
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        if customer_ltv.empty:
+            st.warning("No order data found. Run the ETL pipeline (python run.py) to compute LTV.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Average LTV", f"${customer_ltv['total_ltv'].mean():,.0f}")
+            with col2:
+                st.metric("Avg Projected LTV", f"${customer_ltv['projected_ltv'].mean():,.0f}")
+            with col3:
+                st.metric("Expected Active Customers", f"{customer_ltv['p_alive'].sum():,.0f}",
+                          help=f"Sum of P(alive); average {customer_ltv['p_alive'].mean():.0%} per customer")
+            
+            # LTV by segment
+            st.markdown("---")
+            st.subheader("LTV by Customer Segment")
+            
+            segment_ltv = ltv_segment_summary(customer_ltv, value_tiers(customer_ltv)).rename(
+                columns={'segment': 'Segment', 'avg_ltv': 'LTV', 'customers': 'Customers'}
+            )
+            
+            fig = px.bar(segment_ltv, x='Segment', y='LTV', color='Customers',
+                         color_continuous_scale='Blues')
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, use_container_width=True)
         
     elif analysis_type == "Attribution Model":
         st.subheader("Multi-Touch Attribution Analysis")
@@ -0,0 +1,106 @@
+"""Replay tests for the online churn model (src.models.online_churn)."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from src.models.churn_scoring import (
+    CHURN_FEATURES, build_churn_features, interaction_aggregates, transaction_aggregates
+)
+from src.models.online_churn import OnlineChurnModel
+
+START = pd.Timestamp('2025-01-01')
+DAYS = 360
+BOOTSTRAP_DAYS = 90
+BATCH_DAYS = 30
+
+
+@pytest.fixture(scope='module')
+def history():
+    """A year of activity where a third of the companies go quiet (and unhappy) part-way through."""
+    rng = np.random.RandomState(0)
+    n_companies = 120
+    companies = pd.DataFrame({
+        'company_id': [f'C{i:03d}' for i in range(n_companies)],
+        'company_name': [f'Company {i}' for i in range(n_companies)],
+        'annual_revenue': rng.lognormal(15, 1, n_companies),
+        'employees': rng.randint(10, 5000, n_companies),
+    })
+    churners = rng.rand(n_companies) < 1 / 3
+    last_day = np.where(churners, rng.randint(100, 250, n_companies), DAYS)
+
+    transactions, interactions = [], []
+    for i, company_id in enumerate(companies['company_id']):
+        tx_days = np.arange(rng.randint(0, 10), last_day[i], 10)
+        transactions.append(pd.DataFrame({
+            'company_id': company_id,
+            'amount': rng.lognormal(8, 0.5, len(tx_days)),
+            'transaction_date': START + pd.to_timedelta(tx_days, unit='D'),
+        }))
+        contact_days = np.arange(rng.randint(0, 30), last_day[i], 30)
+        low, high = (1, 3) if churners[i] else (3, 6)
+        interactions.append(pd.DataFrame({
+            'company_id': company_id,
+            'interaction_id': [f'{company_id}-{day}' for day in contact_days],
+            'interaction_date': START + pd.to_timedelta(contact_days, unit='D'),
+            'satisfaction_score': rng.randint(low, high, len(contact_days)).astype(float),
+            'nps_score': rng.randint(0, 11, len(contact_days)).astype(float),
+        }))
+    return companies, pd.concat(transactions, ignore_index=True), pd.concat(interactions, ignore_index=True)
+
+
+def replay(model, companies, transactions, interactions):
+    """Bootstrap on the first BOOTSTRAP_DAYS, then feed the rest in BATCH_DAYS batches."""
+    def between(frame, column, start, end):
+        days = (frame[column] - START).dt.days
+        return frame[(days >= start) & (days < end)]
+
+    model.bootstrap(companies, between(transactions, 'transaction_date', 0, BOOTSTRAP_DAYS),
+                    between(interactions, 'interaction_date', 0, BOOTSTRAP_DAYS))
+    return [model.update(companies, between(transactions, 'transaction_date', start, start + BATCH_DAYS),
+                         between(interactions, 'interaction_date', start, start + BATCH_DAYS))
+            for start in range(BOOTSTRAP_DAYS, DAYS, BATCH_DAYS)]
+
+
+def test_replay_labels_whole_population(history):
+    companies, transactions, interactions = history
+    model = OnlineChurnModel(min_batches=2)
+    reports = replay(model, companies, transactions, interactions)
+
+    # Every batch is evaluated on every company, at a reference date that only moves forward
+    assert all(report['rows'] == len(companies) for report in reports)
+    dates = [report['reference_date'] for report in reports]
+    assert dates == sorted(dates)
+
+    # Companies that stopped buying show up as churned even though they are absent from the batches
+    positives = [report['positives'] for report in reports]
+    assert sum(positives) > 0
+    assert positives[-1] > positives[0]
+
+    # No champion until a batch with both classes has been seen
+    first_promotion = next(i for i, report in enumerate(reports) if report['promoted'])
+    assert all(report['positives'] == 0 for report in reports[:first_promotion])
+    assert reports[first_promotion]['positives'] > 0
+
+
+def test_degenerate_challenger_is_not_promoted(history):
+    companies, transactions, interactions = history
+    features = build_churn_features(companies, transaction_aggregates(transactions),
+                                    interaction_aggregates(interactions))
+    assert features['is_churned'].nunique() == 2
+
+    # A sensible but hedging batch champion
+    X = features[CHURN_FEATURES].to_numpy(dtype=np.float64)
+    scaler = StandardScaler().fit(X)
+    champion = (LogisticRegression(C=0.01).fit(scaler.transform(X), features['is_churned']), scaler)
+    model = OnlineChurnModel(min_batches=2, window=3, champion=champion)
+
+    # A run of churn-free batches teaches the challenger to always predict "no churn",
+    # which beats the champion on log loss alone
+    healthy = features[features['is_churned'] == 0]
+    reports = [model.partial_fit(healthy) for _ in range(6)]
+
+    assert reports[-1]['candidate_rolling_log_loss'] < reports[-1]['champion_rolling_log_loss']
+    assert not any(report['promoted'] for report in reports)
+    assert model.champion is champion